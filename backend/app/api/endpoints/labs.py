@@ -1,24 +1,66 @@
 # backend/app/api/endpoints/labs.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, joinedload
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
 import logging
 
-from app.database import get_db
+from app.database import AnySession, AsyncSessionLocal, fetch_all, get_async_db, get_db
+from app.core.semantic_search import search_engine
+from app.core.lab_pagination import InvalidCursor, decode_cursor, encode_cursor, list_labs_query, sort_key
+from app.core.serialization import lab_dict
 from app.models import ResearchLab as ResearchLabModel, University as UniversityModel
-from app.schemas import ResearchLab, University, ResearchLabSearchResult
+from app.schemas import (
+    ResearchLab, University, ResearchLabSearchResult,
+    SimilarLabsBatchRequest, SimilarLabsBatchResponse,
+    LabBatchRequest, LabBatchResponse, MAX_LAB_BATCH_IDS,
+    LabPageResponse, UniversityLabStats
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _to_similar_result(row) -> ResearchLabSearchResult:
+    """類似研究室の行をレスポンス形式に変換"""
+    return ResearchLabSearchResult(
+        id=row.id,
+        name=row.name,
+        professor_name=row.professor_name or '',
+        department=row.department or '',
+        research_theme=row.research_theme,
+        research_content=row.research_content,
+        research_field=row.research_field,
+        speciality=row.speciality or '',
+        keywords=row.keywords or '',
+        lab_url=row.lab_url,
+        university_name=row.university_name,  # 大学名を確実に設定
+        prefecture=row.prefecture,            # 都道府県を確実に設定
+        region=row.region,                   # 地域を確実に設定
+        similarity_score=float(row.similarity_score)
+    )
+
+
+def _similar_target_query(lab_id: int):
+    """類似検索の対象研究室の存在と埋め込みベクトルの有無"""
+    return (
+        select(ResearchLabModel.id, ResearchLabModel.embedding.isnot(None).label("has_embedding"))
+        .where(ResearchLabModel.id == lab_id)
+    )
+
+
 @router.get("/similar/{lab_id}", response_model=List[ResearchLabSearchResult])
 async def get_similar_labs(
     lab_id: int,
     limit: int = Query(5, ge=1, le=20, description="類似研究室数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     類似研究室取得API（大学情報付き完全版）
@@ -26,10 +68,8 @@ async def get_similar_labs(
     指定された研究室と類似する研究室を取得します。
     """
     try:
-        # 対象研究室の存在確認
-        target_lab = db.query(ResearchLabModel)\
-            .filter(ResearchLabModel.id == lab_id)\
-            .first()
+        # 対象研究室の存在確認と埋め込みベクトルの有無（ベクトル自体は読み込まない）
+        target_lab = (await db.execute(_similar_target_query(lab_id))).first()
         
         if not target_lab:
             raise HTTPException(
@@ -38,7 +78,7 @@ async def get_similar_labs(
             )
         
         # 埋め込みベクトルの存在確認
-        if target_lab.embedding is None:
+        if not target_lab.has_embedding:
             logger.warning(f"研究室ID {lab_id} の埋め込みベクトルが生成されていません")
             raise HTTPException(
                 status_code=400,
@@ -46,69 +86,14 @@ async def get_similar_labs(
             )
         
         # 類似研究室を検索（大学情報を含む完全版）
-        sql_query = text("""
-            SELECT 
-                rl.id,
-                rl.name,
-                rl.professor_name,
-                rl.department,
-                rl.research_theme,
-                rl.research_content,
-                rl.research_field,
-                rl.speciality,
-                rl.keywords,
-                rl.lab_url,
-                u.name as university_name,
-                u.prefecture,
-                u.region,
-                1 - (rl.embedding <=> (
-                    SELECT embedding 
-                    FROM research_labs 
-                    WHERE id = :target_id
-                )) as similarity_score
-            FROM research_labs rl
-            JOIN universities u ON rl.university_id = u.id
-            WHERE rl.id != :target_id 
-            AND rl.embedding IS NOT NULL
-            ORDER BY rl.embedding <=> (
-                SELECT embedding 
-                FROM research_labs 
-                WHERE id = :target_id
-            )
-            LIMIT :limit
-        """)
-        
-        result = db.execute(sql_query, {
-            "target_id": lab_id,
-            "limit": limit
-        })
-        
-        similar_labs_data = result.fetchall()
+        similar_labs_data = await search_engine.find_similar_labs(db, lab_id, limit)
         
         if not similar_labs_data:
             logger.info(f"研究室ID {lab_id} の類似研究室が見つかりませんでした")
             return []
         
         # ResearchLabSearchResult形式に変換
-        similar_labs = []
-        for row in similar_labs_data:
-            lab_result = ResearchLabSearchResult(
-                id=row.id,
-                name=row.name,
-                professor_name=row.professor_name or '',
-                department=row.department or '',
-                research_theme=row.research_theme,
-                research_content=row.research_content,
-                research_field=row.research_field,
-                speciality=row.speciality or '',
-                keywords=row.keywords or '',
-                lab_url=row.lab_url,
-                university_name=row.university_name,  # 大学名を確実に設定
-                prefecture=row.prefecture,            # 都道府県を確実に設定
-                region=row.region,                   # 地域を確実に設定
-                similarity_score=float(row.similarity_score)
-            )
-            similar_labs.append(lab_result)
+        similar_labs = [_to_similar_result(row) for row in similar_labs_data]
         
         logger.info(f"研究室ID {lab_id} に類似する {len(similar_labs)} 件の研究室を取得しました")
         return similar_labs
@@ -123,16 +108,254 @@ async def get_similar_labs(
         )
 
 
+@router.post("/similar:batch", response_model=SimilarLabsBatchResponse)
+async def get_similar_labs_batch(
+    request: SimilarLabsBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    類似研究室一括取得API
+    
+    複数の研究室それぞれに類似する研究室を、研究室IDをキーとしてまとめて返します。
+    """
+    try:
+        results, missing_ids, no_embedding_ids = await search_engine.find_similar_labs_batch(
+            db,
+            request.lab_ids,
+            limit=request.limit,
+            exclude_input=request.exclude_input
+        )
+        
+        if missing_ids or no_embedding_ids:
+            logger.info(
+                f"類似研究室一括取得: 存在しない研究室 {missing_ids}, "
+                f"埋め込み未生成の研究室 {no_embedding_ids}"
+            )
+        
+        logger.info(f"{len(results)} 件の研究室について類似研究室を一括取得しました")
+        return SimilarLabsBatchResponse(
+            results=results,
+            missing_ids=missing_ids,
+            no_embedding_ids=no_embedding_ids
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"類似研究室一括取得エラー: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="類似研究室の一括取得中にエラーが発生しました"
+        )
+
+
+async def fetch_labs_by_ids(db: AnySession, ids: List[int]) -> Tuple[List[ResearchLabModel], List[int]]:
+    """研究室を大学情報付きの1回のクエリで取得し、指定順に並べる（重複IDは1件にまとめる）
+    
+    戻り値は (研究室のリスト, 存在しなかったIDのリスト)
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    rows = await fetch_all(db, (
+        select(ResearchLabModel)
+        .options(joinedload(ResearchLabModel.university))
+        .where(ResearchLabModel.id.in_(unique_ids))
+    ))
+    by_id = {row[0].id: row[0] for row in rows}
+    
+    labs = [by_id[lab_id] for lab_id in unique_ids if lab_id in by_id]
+    missing_ids = [lab_id for lab_id in unique_ids if lab_id not in by_id]
+    return labs, missing_ids
+
+
+def _parse_ids(ids: str) -> List[int]:
+    """カンマ区切りの研究室IDを解析（不正な値・上限超過は400）"""
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="研究室IDはカンマ区切りの整数で指定してください"
+        )
+    
+    if not parsed:
+        raise HTTPException(status_code=400, detail="研究室IDを1件以上指定してください")
+    if len(parsed) > MAX_LAB_BATCH_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に取得できる研究室は{MAX_LAB_BATCH_IDS}件までです"
+        )
+    return parsed
+
+
+async def _get_labs_batch(db: AsyncSession, ids: List[int]) -> LabBatchResponse:
+    try:
+        labs, missing_ids = await fetch_labs_by_ids(db, ids)
+        
+        if missing_ids:
+            logger.info(f"研究室一括取得: 存在しない研究室 {missing_ids}")
+        
+        return LabBatchResponse(labs=labs, missing_ids=missing_ids)
+        
+    except Exception as e:
+        logger.error(f"研究室一括取得エラー: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="研究室の一括取得中にエラーが発生しました"
+        )
+
+
+@router.get("/batch", response_model=LabBatchResponse)
+async def get_labs_batch(
+    ids: str = Query(..., description=f"カンマ区切りの研究室ID（最大{MAX_LAB_BATCH_IDS}件、この順で返す）"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    研究室一括取得API
+    
+    複数の研究室の詳細を1回で取得します。存在しないIDは missing_ids で返します。
+    """
+    return await _get_labs_batch(db, _parse_ids(ids))
+
+
+@router.post("/batch", response_model=LabBatchResponse)
+async def post_labs_batch(
+    request: LabBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    研究室一括取得API（POST版）
+    
+    URLに収まらない件数や、保存リストからの取得に使います。
+    """
+    return await _get_labs_batch(db, request.ids)
+
+
+def university_field_counts_query(lab_id: int):
+    """研究室の所属大学の分野別研究室数（大学IDを先に調べずに1回で集計）"""
+    target = aliased(ResearchLabModel)
+    university_id = select(target.university_id).where(target.id == lab_id).scalar_subquery()
+    return (
+        select(ResearchLabModel.research_field, func.count(ResearchLabModel.id))
+        .where(ResearchLabModel.university_id == university_id)
+        .group_by(ResearchLabModel.research_field)
+    )
+
+
+async def build_lab_page(
+    lab_id: int,
+    similar_limit: int = 5,
+    session_factory: Callable = AsyncSessionLocal
+) -> Optional[LabPageResponse]:
+    """研究室詳細ページの内容を取得（研究室が存在しなければ None）
+    
+    研究室・類似研究室・大学の分野別統計はどれも lab_id だけで取得できるため、
+    それぞれ別セッションで並行して問い合わせる。
+    """
+    async def fetch_lab():
+        async with session_factory() as db:
+            labs, _ = await fetch_labs_by_ids(db, [lab_id])
+            return ResearchLab.model_validate(labs[0]) if labs else None
+    
+    async def fetch_similar():
+        try:
+            async with session_factory() as db:
+                # 存在しない・埋め込み未生成の研究室では類似検索（全件走査）を行わない
+                target = await fetch_all(db, _similar_target_query(lab_id))
+                if not target or not target[0].has_embedding:
+                    return []
+                rows = await search_engine.find_similar_labs(db, lab_id, similar_limit)
+                return [_to_similar_result(row) for row in rows]
+        except SQLAlchemyError as e:
+            # 類似研究室が取れなくても詳細ページは表示する
+            logger.warning(f"研究室ID {lab_id} の類似研究室取得に失敗しました: {e}")
+            return []
+    
+    async def fetch_field_counts():
+        async with session_factory() as db:
+            return {field: count for field, count in await fetch_all(db, university_field_counts_query(lab_id))}
+    
+    lab, similar_labs, labs_by_field = await asyncio.gather(fetch_lab(), fetch_similar(), fetch_field_counts())
+    if lab is None:
+        return None
+    
+    return LabPageResponse(
+        lab=lab,
+        similar_labs=similar_labs,
+        university_stats=UniversityLabStats(
+            total_labs=sum(labs_by_field.values()),
+            labs_by_field=labs_by_field
+        )
+    )
+
+
+def lab_page_etag(page: LabPageResponse) -> str:
+    """各部分の内容のハッシュを合成した ETag（どれか1つでも変われば変わる）"""
+    document = page.model_dump(mode="json")
+    combined = hashlib.sha1()
+    for part in ("lab", "similar_labs", "university_stats"):
+        raw = json.dumps(document[part], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        combined.update(hashlib.sha1(raw).digest())
+    return f'"{combined.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match（カンマ区切り・弱い比較）が ETag に一致するか"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+@router.get("/{lab_id}/page", response_model=LabPageResponse)
+async def get_lab_page(
+    lab_id: int,
+    similar_limit: int = Query(5, ge=1, le=20, description="類似研究室数"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    研究室詳細ページAPI
+    
+    研究室詳細・類似研究室・所属大学の分野別研究室数を1回で返します。
+    ETag を返すので、If-None-Match を付けて再取得すると変更がなければ 304 になります。
+    """
+    try:
+        page = await build_lab_page(lab_id, similar_limit)
+        
+        if page is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"研究室ID {lab_id} が見つかりません"
+            )
+        
+        etag = lab_page_etag(page)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        return Response(content=page.model_dump_json(), media_type="application/json", headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"研究室詳細ページ取得エラー: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="研究室詳細ページの取得中にエラーが発生しました"
+        )
+
+
 @router.get("/{lab_id}", response_model=ResearchLab)
 async def get_lab_detail(
     lab_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """研究室詳細取得API"""
     try:
-        lab = db.query(ResearchLabModel)\
-            .filter(ResearchLabModel.id == lab_id)\
-            .first()
+        lab = (await db.execute(
+            select(ResearchLabModel)
+            .options(joinedload(ResearchLabModel.university))
+            .where(ResearchLabModel.id == lab_id)
+        )).scalars().first()
         
         if not lab:
             raise HTTPException(
@@ -152,36 +375,57 @@ async def get_lab_detail(
         )
 
 
-@router.get("/", response_model=List[ResearchLab])
+@router.get("/", response_model=List[ResearchLab], response_class=ORJSONResponse)
 async def get_labs(
-    skip: int = Query(0, ge=0, description="スキップする件数"),
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     research_field: Optional[str] = Query(None, description="研究分野フィルター"),
     region: Optional[str] = Query(None, description="地域フィルター"),
     university_name: Optional[str] = Query(None, description="大学名フィルター"),
-    db: Session = Depends(get_db)
+    order: str = Query("id", pattern="^(id|research_field)$", description="並び順（id または research_field）"),
+    cursor: Optional[str] = Query(None, description="前のページのレスポンスヘッダー X-Next-Cursor の値"),
+    skip: int = Query(0, ge=0, description="スキップする件数（非推奨: cursor を使用してください）", deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """研究室一覧取得API"""
+    """
+    研究室一覧取得API
+    
+    次のページがある場合は継続トークンをレスポンスヘッダー X-Next-Cursor で返します。
+    同じ条件で cursor に指定すると続きを取得できます（何ページ目でも同じ速さで取得できます）。
+    """
     try:
-        query = db.query(ResearchLabModel)
+        filters = {
+            "research_field": research_field,
+            "region": region,
+            "university_name": university_name
+        }
         
-        # フィルター適用
-        if research_field:
-            query = query.filter(ResearchLabModel.research_field == research_field)
+        if cursor and skip:
+            raise HTTPException(
+                status_code=400,
+                detail="cursor と skip は同時に指定できません"
+            )
         
-        if region:
-            query = query.join(UniversityModel)\
-                .filter(UniversityModel.region == region)
+        try:
+            after = decode_cursor(cursor, order, filters) if cursor else None
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        if university_name:
-            query = query.join(UniversityModel)\
-                .filter(UniversityModel.name.ilike(f"%{university_name}%"))
+        # 次のページの有無を知るため1件多く取得（大学情報は同じ JOIN から読み込む）
+        query = list_labs_query(order, after, limit + 1, **filters)
+        if skip:
+            query = query.offset(skip)
+        labs = (await db.execute(query)).scalars().all()
         
-        # ページネーション
-        labs = query.offset(skip).limit(limit).all()
+        headers = {}
+        if len(labs) > limit:
+            labs = labs[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(order, sort_key(labs[-1], order), filters)
         
-        return labs
+        # 読み込み済みの行を dict にして orjson で直接返す（response_model による再検証は行わない）
+        return ORJSONResponse([lab_dict(lab) for lab in labs], headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"研究室一覧取得エラー: {e}")
         raise HTTPException(
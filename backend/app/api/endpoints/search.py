@@ -1,61 +1,125 @@
 # backend/app/api/endpoints/search.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, List, Optional, TypeVar
+import asyncio
 import logging
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
 from app.schemas import SearchRequest, SearchResponse, SearchSuggestion
 from app.core.semantic_search import search_engine
-from app.models import SearchLog
+from app.core.catalog_stats import catalog_stats
+from app.core.embedding_cache import normalize_query
+from app.core.single_flight import SingleFlight
+from app.core.popular_queries import popular_queries
+from app.core.search_log_buffer import search_log_buffer
+from app.core.search_stats import read_recent_summary, read_summary
+from app.core.suggestion_index import suggestion_index
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 同一条件の同時検索を1回の計算にまとめる
+search_flights = SingleFlight("search")
 
-@router.post("/", response_model=SearchResponse)
+# クライアント切断を確認する間隔（秒）
+DISCONNECT_POLL_INTERVAL = 0.1
+
+T = TypeVar("T")
+
+
+async def _cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """クライアントが切断したら待機をキャンセルする
+    
+    共有検索の待機者だけがキャンセルされ、他の待機者がいる限り検索自体は継続する。
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="クライアントが切断しました")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+def _search_flight_key(search_request: SearchRequest) -> tuple:
+    """同一検索とみなす条件（正規化クエリ・フィルター・件数・閾値・検索方式）"""
+    return (
+        normalize_query(search_request.query),
+        tuple(sorted(search_request.region_filter or [])),
+        tuple(sorted(search_request.field_filter or [])),
+        search_request.limit,
+        search_request.min_similarity,
+        search_request.mode,
+        search_request.lexical_weight
+    )
+
+
+async def _run_shared_search(search_request: SearchRequest):
+    """共有される検索処理
+    
+    リクエストごとのセッションは先に閉じられる可能性があるため、専用のセッションを使う。
+    """
+    async with AsyncSessionLocal() as flight_db:
+        return await search_engine.search_labs(
+            db=flight_db,
+            query=search_request.query,
+            limit=search_request.limit,
+            region_filter=search_request.region_filter,
+            field_filter=search_request.field_filter,
+            min_similarity=search_request.min_similarity,
+            mode=search_request.mode.value,
+            lexical_weight=search_request.lexical_weight
+        )
+
+
+@router.post("/", response_model=SearchResponse, response_class=ORJSONResponse)
 async def semantic_search(
     search_request: SearchRequest,
-    db: Session = Depends(get_db)
+    request: Request
 ):
     """
     セマンティック検索API
     
     中学生の興味・関心から関連する研究室を検索します。
+    結果はSQLの行から作った dict を orjson で直接返します（SearchResponse による再検証は行いません）。
     """
     try:
-        # セマンティック検索実行
-        results, search_time = await search_engine.search_labs(
-            db=db,
-            query=search_request.query,
-            limit=search_request.limit,
-            region_filter=search_request.region_filter,
-            field_filter=search_request.field_filter,
-            min_similarity=search_request.min_similarity
+        # セマンティック検索実行（同一条件の同時検索は結果を共有）
+        results, search_time = await _cancel_on_disconnect(
+            request,
+            search_flights.do(
+                _search_flight_key(search_request),
+                lambda: _run_shared_search(search_request)
+            )
         )
         
-        # 検索ログを記録
-        search_log = SearchLog(
-            query=search_request.query,
-            results_count=len(results),
-            search_time_ms=search_time
-        )
-        db.add(search_log)
-        db.commit()
+        # 検索ログを記録（バックグラウンドでまとめて書き込む）
+        search_log_buffer.record(search_request.query, len(results), search_time)
+        if results:
+            popular_queries.record(search_request.query)
         
-        # レスポンスを構築
-        response = SearchResponse(
-            query=search_request.query,
-            total_results=len(results),
-            search_time_ms=search_time,
-            results=results
-        )
+        # レスポンスを構築（Response を返すため response_model の検証・変換は行われない）
+        response = ORJSONResponse({
+            "query": search_request.query,
+            "total_results": len(results),
+            "search_time_ms": search_time,
+            "results": results
+        })
         
         logger.info(f"Search completed: '{search_request.query}' -> {len(results)} results")
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(
@@ -67,49 +131,20 @@ async def semantic_search(
 @router.get("/suggestions", response_model=List[SearchSuggestion])
 async def get_search_suggestions(
     q: str = Query(..., min_length=1, description="検索候補を取得するためのクエリ"),
-    limit: int = Query(10, ge=1, le=20, description="候補数"),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=20, description="候補数")
 ):
     """
     検索候補取得API
     
     入力途中の文字列から検索候補を提案します。
+    研究室名・研究分野・キーワード・大学名から、前方一致を優先して人気順に返します。
     """
     try:
-        suggestions = []
-        
-        # 研究分野からの候補
-        field_suggestions = [
-            "免疫学", "生物学", "医学", "薬学", "工学", "情報科学",
-            "化学", "物理学", "数学", "心理学", "社会学"
-        ]
-        
-        for field in field_suggestions:
-            if q.lower() in field.lower():
-                suggestions.append(SearchSuggestion(
-                    text=field,
-                    category="field"
-                ))
-        
-        # キーワードからの候補
-        keyword_suggestions = [
-            "がん治療", "感染症", "アレルギー", "ワクチン", "再生医療",
-            "人工知能", "ロボット", "宇宙", "環境問題", "エネルギー",
-            "食品安全", "新薬開発", "遺伝子治療"
+        return [
+            SearchSuggestion(text=suggestion.text, category=suggestion.category)
+            for suggestion in suggestion_index.suggest(q, limit)
         ]
         
-        for keyword in keyword_suggestions:
-            if q.lower() in keyword.lower():
-                suggestions.append(SearchSuggestion(
-                    text=keyword,
-                    category="keyword"
-                ))
-        
-        # 候補数を制限
-        suggestions = suggestions[:limit]
-        
-        return suggestions
-        
     except Exception as e:
         logger.error(f"Failed to get suggestions: {e}")
         raise HTTPException(
@@ -120,22 +155,16 @@ async def get_search_suggestions(
 
 @router.get("/popular", response_model=List[str])
 async def get_popular_searches(
-    limit: int = Query(10, ge=1, le=50, description="人気検索数"),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=50, description="人気検索数")
 ):
     """
     人気検索クエリ取得API
     
-    よく検索されているクエリを取得します。
+    よく検索されているクエリを、最近の検索ほど重く数えた人気順で取得します。
     """
     try:
-        # 検索ログから人気のクエリを取得
-        popular_queries = db.query(SearchLog.query)\
-            .filter(SearchLog.results_count > 0)\
-            .group_by(SearchLog.query)\
-            .order_by(SearchLog.query)\
-            .limit(limit)\
-            .all()
+        # 結果が1件以上あった検索のランキング（プロセス内のスケッチから取得）
+        top_queries = popular_queries.top(limit)
         
         # デフォルトの人気検索（検索ログが少ない場合）
         default_popular = [
@@ -152,8 +181,8 @@ async def get_popular_searches(
         ]
         
         # 検索ログがある場合はそれを、ない場合はデフォルトを返す
-        if popular_queries:
-            return [query[0] for query in popular_queries]
+        if top_queries:
+            return [query for query, _ in top_queries]
         else:
             return default_popular[:limit]
             
@@ -166,34 +195,27 @@ async def get_popular_searches(
 
 
 @router.get("/stats")
-async def get_search_stats(db: Session = Depends(get_db)):
+async def get_search_stats(db: AsyncSession = Depends(get_async_db)):
     """
     検索統計情報取得API
     
     検索の統計情報を取得します。
+    検索統計は時間別・日別の集計から求め、生の検索ログは読みません。
     """
     try:
-        from sqlalchemy import func
-        from app.models import University, ResearchLab
-        
-        # 基本統計
-        total_searches = db.query(func.count(SearchLog.id)).scalar()
-        avg_results = db.query(func.avg(SearchLog.results_count)).scalar()
-        avg_search_time = db.query(func.avg(SearchLog.search_time_ms)).scalar()
+        # 基本統計（全期間と直近24時間）
+        search_statistics = await read_summary(db)
+        recent_statistics = await read_recent_summary(db, hours=24)
         
-        # データベース統計
-        total_universities = db.query(func.count(University.id)).scalar()
-        total_labs = db.query(func.count(ResearchLab.id)).scalar()
+        # データベース統計（/api/universities/statistics と共通の集計）
+        catalog = await catalog_stats.get(db)
         
         stats = {
-            "search_statistics": {
-                "total_searches": total_searches or 0,
-                "average_results_per_search": round(avg_results or 0, 2),
-                "average_search_time_ms": round(avg_search_time or 0, 2)
-            },
+            "search_statistics": search_statistics,
+            "recent_search_statistics": recent_statistics,
             "database_statistics": {
-                "total_universities": total_universities or 0,
-                "total_research_labs": total_labs or 0
+                "total_universities": catalog.total_universities,
+                "total_research_labs": catalog.total_labs
             }
         }
         
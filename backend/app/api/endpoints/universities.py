@@ -1,11 +1,13 @@
 # backend/app/api/endpoints/universities.py
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional, Dict, Any
 import logging
 
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.core.catalog_stats import catalog_stats
 from app.schemas import University, StatisticsResponse
 from app.models import University as UniversityModel, ResearchLab as ResearchLabModel
 
@@ -97,47 +99,22 @@ async def get_research_fields(db: Session = Depends(get_db)):
 
 
 @router.get("/statistics", response_model=StatisticsResponse)
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_async_db)):
     """
     統計情報取得API
     
     大学・研究室の統計情報を取得します。
+    集計はデータが更新されるまでキャッシュしたものを返します。
     """
     try:
-        # 基本統計
-        total_universities = db.query(func.count(UniversityModel.id)).scalar()
-        total_labs = db.query(func.count(ResearchLabModel.id)).scalar()
-        
-        # 地域別研究室数
-        labs_by_region = dict(
-            db.query(
-                UniversityModel.region,
-                func.count(ResearchLabModel.id)
-            )\
-            .join(ResearchLabModel)\
-            .group_by(UniversityModel.region)\
-            .all()
-        )
-        
-        # 研究分野別研究室数
-        labs_by_field = dict(
-            db.query(
-                ResearchLabModel.research_field,
-                func.count(ResearchLabModel.id)
-            )\
-            .group_by(ResearchLabModel.research_field)\
-            .all()
-        )
-        
-        # 最新更新日時
-        latest_update = db.query(func.max(ResearchLabModel.updated_at)).scalar()
+        stats = await catalog_stats.get(db)
         
         return StatisticsResponse(
-            total_universities=total_universities or 0,
-            total_labs=total_labs or 0,
-            labs_by_region=labs_by_region,
-            labs_by_field=labs_by_field,
-            latest_update=latest_update
+            total_universities=stats.total_universities,
+            total_labs=stats.total_labs,
+            labs_by_region=stats.labs_by_region,
+            labs_by_field=stats.labs_by_field,
+            latest_update=stats.latest_update
         )
         
     except Exception as e:
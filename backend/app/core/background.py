@@ -0,0 +1,57 @@
+# backend/app/core/background.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTasks:
+    """アプリケーション稼働中に定期実行するメンテナンスジョブの管理"""
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+
+    def start(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[object]],
+        run_immediately: bool = False
+    ):
+        """interval 秒ごとに func を実行するタスクを開始（run_immediately なら初回を待たずに実行）"""
+        self._tasks.append(asyncio.create_task(
+            self._run(name, interval, func, run_immediately),
+            name=name
+        ))
+
+    async def _run(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[object]],
+        run_immediately: bool
+    ):
+        first = True
+        while True:
+            if not (first and run_immediately):
+                await asyncio.sleep(interval)
+            first = False
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 一時的な失敗で定期ジョブ自体を止めない
+                logger.error(f"Periodic task '{name}' failed: {e}")
+
+    async def stop(self):
+        """全タスクを停止"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+# アプリケーション共通の定期タスク
+periodic_tasks = PeriodicTasks()
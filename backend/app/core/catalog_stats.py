@@ -0,0 +1,134 @@
+# backend/app/core/catalog_stats.py
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.data_version import DataVersion, data_version
+from app.core.metrics import metrics
+from app.database import AnySession, fetch_all
+
+logger = logging.getLogger(__name__)
+
+# 地域別・分野別・全体の集計を研究室の1回の走査で求める
+#   no_region = 1 の行は分野別、no_field = 1 の行は地域別、両方 1 の行は全体
+_CATALOG_STATS_SQL = text("""
+    WITH lab_groups AS (
+        SELECT
+            u.region,
+            rl.research_field,
+            count(*) AS lab_count,
+            max(rl.updated_at) AS latest_update,
+            GROUPING(u.region) AS no_region,
+            GROUPING(rl.research_field) AS no_field
+        FROM research_labs rl
+        JOIN universities u ON u.id = rl.university_id
+        GROUP BY GROUPING SETS ((u.region), (rl.research_field), ())
+    )
+    SELECT lab_groups.*, (SELECT count(*) FROM universities) AS total_universities
+    FROM lab_groups
+""")
+
+
+@dataclass(frozen=True)
+class CatalogStats:
+    """研究室・大学の集計のスナップショット"""
+    total_universities: int
+    total_labs: int
+    labs_by_region: Dict[str, int]
+    labs_by_field: Dict[str, int]
+    latest_update: Optional[datetime]
+    version: int
+    computed_at: float
+
+
+def build_catalog_stats(rows, version: int) -> CatalogStats:
+    """集計クエリの行をスナップショットにまとめる"""
+    labs_by_region: Dict[str, int] = {}
+    labs_by_field: Dict[str, int] = {}
+    total_labs, latest_update, total_universities = 0, None, 0
+
+    for row in rows:
+        total_universities = row.total_universities
+        if row.no_region and row.no_field:
+            total_labs, latest_update = row.lab_count, row.latest_update
+        elif row.no_field:
+            labs_by_region[row.region] = row.lab_count
+        else:
+            labs_by_field[row.research_field] = row.lab_count
+
+    return CatalogStats(
+        total_universities=total_universities,
+        total_labs=total_labs,
+        labs_by_region=labs_by_region,
+        labs_by_field=labs_by_field,
+        latest_update=latest_update,
+        version=version,
+        computed_at=time.time()
+    )
+
+
+class CatalogStatsService:
+    """研究室・大学の集計サービス
+
+    全集計を1回のクエリで求めてメモリに保持し、データバージョンが進むまで使い回す。
+    集計中に届いたリクエストは同じ集計結果を待つ。
+    """
+
+    def __init__(self, data_version: DataVersion):
+        self.data_version = data_version
+        self._snapshot: Optional[CatalogStats] = None
+        self._lock = asyncio.Lock()
+
+        self.hits = metrics.counter("catalog_stats.hits")
+        self.refreshes = metrics.counter("catalog_stats.refreshes")
+        metrics.register_collector("catalog_stats", self.stats)
+
+    def _fresh(self) -> Optional[CatalogStats]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.data_version.current:
+            return snapshot
+        return None
+
+    async def get(self, db: AnySession) -> CatalogStats:
+        """現在のデータバージョンの集計（古ければ db で集計し直す）"""
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self.hits.inc()
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                self.hits.inc()
+                return snapshot
+
+            # 集計中にバージョンが進んだ場合は次回に集計し直す
+            version = self.data_version.current
+            started = time.perf_counter()
+            snapshot = build_catalog_stats(await fetch_all(db, _CATALOG_STATS_SQL), version)
+            self._snapshot = snapshot
+            self.refreshes.inc()
+
+            logger.info(
+                f"Catalog stats computed in {(time.perf_counter() - started) * 1000:.1f}ms "
+                f"(version {version})"
+            )
+            return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """スナップショットの状態"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "age_seconds": round(time.time() - snapshot.computed_at, 1) if snapshot else None,
+            "fresh": self._fresh() is not None
+        }
+
+
+# アプリケーション共通の集計サービス
+catalog_stats = CatalogStatsService(data_version)
@@ -0,0 +1,109 @@
+# backend/app/core/data_version.py
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.models import ResearchLab, University
+
+logger = logging.getLogger(__name__)
+
+# 研究室データの変化を検出するための集計（件数・最終更新日時・埋め込み済み件数）
+_FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT count(*) FROM research_labs) AS lab_count,
+        (SELECT max(updated_at) FROM research_labs) AS latest_update,
+        (SELECT count(embedding) FROM research_labs) AS embedded_count,
+        (SELECT count(*) FROM universities) AS university_count
+""")
+
+_CATALOG_MODELS = (ResearchLab, University)
+
+
+def catalog_fingerprint(db: Session) -> str:
+    """プロセス間で比較できる研究室データのフィンガープリント文字列"""
+    fingerprint = tuple(db.execute(_FINGERPRINT_SQL).one())
+    return hashlib.sha1(repr(fingerprint).encode("utf-8")).hexdigest()
+
+
+class DataVersion:
+    """研究室データのバージョン番号
+
+    research_labs の行や埋め込みが変わるたびに単調増加する。
+    このプロセスのORM経由の変更はコミット時に、他ワーカーやSQL直接の変更は
+    定期的なフィンガープリント比較で検出する。
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        return self._version
+
+    def subscribe(self, listener: Callable[[int], None]):
+        """バージョン更新時に呼ばれるコールバックを登録"""
+        self._listeners.append(listener)
+
+    def bump(self, reason: str = "") -> int:
+        """バージョンを1つ進める"""
+        with self._lock:
+            self._version += 1
+            version = self._version
+
+        logger.info(f"Data version bumped to {version} ({reason or 'unspecified'})")
+        for listener in self._listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                logger.error(f"Data version listener failed: {e}")
+        return version
+
+    def refresh_from_db(self, db: Session) -> bool:
+        """DB上のフィンガープリントを比較し、変化していればバージョンを進める"""
+        fingerprint = tuple(db.execute(_FINGERPRINT_SQL).one())
+        previous, self._fingerprint = self._fingerprint, fingerprint
+
+        if previous is not None and previous != fingerprint:
+            self.bump("catalog changed in database")
+            return True
+        return False
+
+    async def poll(self, session_factory: Callable[[], Session]) -> bool:
+        """フィンガープリント比較をスレッドプールで実行"""
+        def _refresh():
+            with session_factory() as db:
+                return self.refresh_from_db(db)
+
+        return await asyncio.to_thread(_refresh)
+
+
+data_version = DataVersion()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_changes(session: Session, flush_context):
+    """研究室・大学の追加/更新/削除をセッションに記録"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _CATALOG_MODELS):
+            session.info["catalog_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session):
+    """研究室データを変更したトランザクションのコミット時にバージョンを進める"""
+    if session.info.pop("catalog_changed", False):
+        data_version.bump("catalog committed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,149 @@
+# backend/app/core/db_benchmark.py
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from app.core.semantic_search import search_engine
+from app.database import AnySession, AsyncSessionLocal, SessionLocal, close_async_engine, fetch_all
+from app.models import ResearchLab
+
+logger = logging.getLogger(__name__)
+
+# イベントループの停止時間を測るための待機間隔（秒）
+_LAG_PROBE_INTERVAL = 0.01
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """昇順に並べた値の q パーセンタイル（最近傍順位法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+async def _workload(
+    db: AnySession,
+    lab_ids: List[int],
+    embeddings: List[List[float]],
+    lab_count: int,
+    rng: random.Random
+):
+    """検索・類似研究室・研究室詳細・一覧の各エンドポイント相当のクエリを1回ずつ実行"""
+    lab_id = rng.choice(lab_ids)
+    await fetch_all(db, select(ResearchLab)
+                    .options(joinedload(ResearchLab.university))
+                    .where(ResearchLab.id == lab_id))
+    await fetch_all(db, select(ResearchLab)
+                    .options(joinedload(ResearchLab.university))
+                    .offset(rng.randrange(max(1, lab_count - 50)))
+                    .limit(50))
+    await search_engine.find_similar_labs(db, lab_id, 5)
+    await search_engine._search_pgvector(db, rng.choice(embeddings), 20, None, None, 0.0)
+
+
+async def _probe_loop_lag(stop: asyncio.Event) -> float:
+    """イベントループが応答しなかった最大時間（ミリ秒）"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(_LAG_PROBE_INTERVAL)
+        worst = max(worst, time.perf_counter() - started - _LAG_PROBE_INTERVAL)
+    return worst * 1000
+
+
+async def run(
+    use_async: bool,
+    requests: int,
+    concurrency: int,
+    lab_ids: List[int],
+    embeddings: List[List[float]],
+    lab_count: int,
+    seed: int = 0
+) -> Dict[str, float]:
+    """requests 回のワークロードを最大 concurrency 並列で実行して計測"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        rng = random.Random(seed + i)
+        async with semaphore:
+            started = time.perf_counter()
+            if use_async:
+                async with AsyncSessionLocal() as db:
+                    await _workload(db, lab_ids, embeddings, lab_count, rng)
+            else:
+                # 現行方式: async ハンドラ内で同期セッションを直接使う
+                with SessionLocal() as db:
+                    await _workload(db, lab_ids, embeddings, lab_count, rng)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    return {
+        "mode": "async" if use_async else "sync",
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_loop_lag_ms": await probe
+    }
+
+
+async def benchmark(requests: int, concurrency: int, queries: int = 20, seed: int = 0) -> List[Dict[str, float]]:
+    """同期セッションと非同期セッションを同じワークロードで比較"""
+    with SessionLocal() as db:
+        lab_ids = [row[0] for row in db.execute(
+            select(ResearchLab.id).where(ResearchLab.embedding.isnot(None))
+        )]
+        embeddings = [list(map(float, row[0])) for row in db.execute(
+            select(ResearchLab.embedding).where(ResearchLab.embedding.isnot(None)).limit(queries)
+        )]
+        lab_count = db.execute(select(func.count(ResearchLab.id))).scalar()
+    if not lab_ids:
+        raise RuntimeError("埋め込み済みの研究室がありません")
+
+    try:
+        # 接続プールと近傍テーブルのキャッシュを温めてから計測する
+        for use_async in (False, True):
+            await run(use_async, concurrency, concurrency, lab_ids, embeddings, lab_count, seed)
+        return [
+            await run(use_async, requests, concurrency, lab_ids, embeddings, lab_count, seed)
+            for use_async in (False, True)
+        ]
+    finally:
+        await close_async_engine()
+
+
+def main():
+    """同期セッションと非同期セッションのスループットを比較"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=20, help="検索に使う研究室埋め込みの数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(benchmark(args.requests, args.concurrency, args.queries, args.seed))
+
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'loop lag ms':>12}")
+    for row in report:
+        print(
+            f"{row['mode']:<6} {row['throughput_rps']:>9.1f} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['max_loop_lag_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
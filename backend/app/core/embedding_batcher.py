@@ -0,0 +1,114 @@
+# backend/app/core/embedding_batcher.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from app.core.embedding_client import EmbeddingProviderError
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EmbedFunction = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class EmbeddingBatcher:
+    """同時に発生した埋め込みリクエストを1回のAPI呼び出しにまとめるマイクロバッチャー
+
+    最初のリクエストから max_wait_ms 経過するか、max_batch_size 件たまった時点で
+    まとめて送信し、結果を待機中の各コルーチンへ返す。
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFunction,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.batch_size = metrics.histogram("embedding_batch.size", _BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = metrics.histogram("embedding_batch.queue_wait_ms")
+        self.request_ms = metrics.histogram("embedding_batch.request_ms")
+
+    async def embed(self, text: str) -> List[float]:
+        """1件のテキストをバッチに加え、その埋め込みベクトルを待つ"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """待機中のリクエストを送信タスクに引き渡す"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        # 呼び出し元がキャンセル済みのものは送らない
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            self.queue_wait_ms.observe((now - enqueued_at) * 1000)
+
+        # 同一テキストは1回だけ送信する
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        self.batch_size.observe(len(unique_texts))
+
+        try:
+            vectors = await self.embed_fn(unique_texts)
+            if len(vectors) != len(unique_texts):
+                raise EmbeddingProviderError(
+                    f"Expected {len(unique_texts)} embeddings, got {len(vectors)}"
+                )
+        except Exception as e:
+            logger.error(f"Batched embedding request failed ({len(unique_texts)} texts): {e}")
+            self._fail(batch, e)
+            return
+        finally:
+            self.request_ms.observe((time.perf_counter() - now) * 1000)
+
+        try:
+            by_text = dict(zip(unique_texts, vectors))
+            for text, future, _ in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            # 待機中のリクエストを取り残さない
+            logger.error(f"Failed to distribute batched embeddings: {e}")
+            self._fail(batch, e)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future, float]], error: Exception):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        """送信中のバッチが終わるまで待つ"""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
@@ -0,0 +1,253 @@
+# backend/app/core/embedding_cache.py
+import asyncio
+import dbm
+import hashlib
+import logging
+import struct
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """クエリを正規化（NFKCで全角・半角を統一し、空白を1つにまとめる）"""
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.split())
+
+
+def make_cache_key(normalized_text: str, model: str) -> str:
+    """正規化済みテキストとモデル名からキャッシュキーを生成"""
+    return hashlib.sha256(f"{model}\n{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore(ABC):
+    """埋め込みキャッシュの永続層インターフェース"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[List[float]]:
+        """キーに対応する埋め込みベクトルを取得"""
+
+    @abstractmethod
+    async def put(self, key: str, text: str, model: str, embedding: List[float]):
+        """埋め込みベクトルを保存"""
+
+    async def touch(self, keys: Iterable[str]):
+        """一次キャッシュでヒットしたキーの最終利用日時を更新"""
+
+    async def prefetch(self, limit: int) -> List[Tuple[str, List[float]]]:
+        """最近使われたエントリを取得（起動時のウォームアップ用）"""
+        return []
+
+    async def evict(self, max_rows: int) -> int:
+        """保存件数を上限以下に削減し、削除件数を返す"""
+        return 0
+
+    async def close(self):
+        """リソースを解放"""
+
+
+class FileEmbeddingStore(EmbeddingStore):
+    """dbm ファイルに保存する永続層（単一プロセス向け）
+
+    値は「保存時刻(double) + float32配列」のバイト列として保存する。
+    """
+
+    _HEADER = struct.Struct("<d")
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = dbm.open(str(self.path), "c")
+        return self._db
+
+    def _get_sync(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            raw = self._open().get(key)
+        if raw is None:
+            return None
+
+        (stored_at,) = self._HEADER.unpack_from(raw)
+        if time.time() - stored_at > self.ttl_seconds:
+            return None
+        return np.frombuffer(raw, dtype=np.float32, offset=self._HEADER.size).tolist()
+
+    def _put_sync(self, key: str, embedding: List[float]):
+        raw = self._HEADER.pack(time.time()) + np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            self._open()[key] = raw
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def put(self, key: str, text: str, model: str, embedding: List[float]):
+        await asyncio.to_thread(self._put_sync, key, embedding)
+
+    async def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class EmbeddingCache:
+    """クエリ埋め込みのLRU + TTLキャッシュ
+
+    メモリ上のLRUを一次キャッシュとし、ミス時は永続層（任意）を参照する。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400.0,
+        store: Optional[EmbeddingStore] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._touched: Set[str] = set()
+        self.hits = Counter("embedding_cache.hits")
+        self.misses = Counter("embedding_cache.misses")
+        self.store_hits = Counter("embedding_cache.store_hits")
+        self.evictions = Counter("embedding_cache.evictions")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, embedding = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _set_local(self, key: str, embedding: List[float]):
+        self._entries[key] = (self._clock() + self.ttl_seconds, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions.inc()
+
+    def peek(self, key: str) -> Optional[List[float]]:
+        """一次キャッシュだけを参照（永続層は見ず、ヒット数も数えない）"""
+        return self._get_local(key)
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        """キャッシュから埋め込みベクトルを取得"""
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.hits.inc()
+            if self.store is not None:
+                self._touched.add(key)
+            return embedding
+
+        if self.store is not None:
+            try:
+                embedding = await self.store.get(key)
+            except Exception as e:
+                logger.warning(f"Embedding store lookup failed: {e}")
+                embedding = None
+
+            if embedding is not None:
+                self.store_hits.inc()
+                self._set_local(key, embedding)
+                return embedding
+
+        self.misses.inc()
+        return None
+
+    async def set(self, key: str, text: str, model: str, embedding: List[float]):
+        """埋め込みベクトルをキャッシュに保存"""
+        self._set_local(key, embedding)
+
+        if self.store is not None:
+            try:
+                await self.store.put(key, text, model, embedding)
+            except Exception as e:
+                logger.warning(f"Embedding store write failed: {e}")
+
+    def clear(self):
+        """一次キャッシュを空にする"""
+        self._entries.clear()
+
+    async def warm_up(self, limit: int) -> int:
+        """永続層から最近使われたエントリを一次キャッシュに読み込む"""
+        if self.store is None:
+            return 0
+
+        try:
+            entries = await self.store.prefetch(min(limit, self.max_entries))
+        except Exception as e:
+            logger.warning(f"Embedding cache warm-up skipped: {e}")
+            return 0
+
+        # 古い順に入れて、最近使われたものほどLRUの末尾に来るようにする
+        for key, embedding in reversed(entries):
+            self._set_local(key, embedding)
+        logger.info(f"Warmed up embedding cache with {len(entries)} entries")
+        return len(entries)
+
+    async def maintain(self, max_rows: int) -> int:
+        """一次キャッシュのヒットを永続層へ反映し、永続層を上限件数まで削減"""
+        if self.store is None:
+            return 0
+
+        touched, self._touched = self._touched, set()
+        await self.store.touch(touched)
+        return await self.store.evict(max_rows)
+
+    async def close(self):
+        """永続層を閉じる"""
+        if self.store is not None:
+            await self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの統計情報"""
+        hits = self.hits.value + self.store_hits.value
+        lookups = hits + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits.value,
+            "store_hits": self.store_hits.value,
+            "misses": self.misses.value,
+            "evictions": self.evictions.value,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def create_store(kind: str, file_path: str, ttl_seconds: float) -> Optional[EmbeddingStore]:
+    """設定値から永続層を生成"""
+    if kind == "none":
+        return None
+    if kind == "file":
+        return FileEmbeddingStore(file_path, ttl_seconds)
+    if kind == "database":
+        from app.database import SessionLocal
+        from app.core.query_embedding_store import DatabaseEmbeddingStore
+        return DatabaseEmbeddingStore(SessionLocal)
+    raise ValueError(f"Unknown embedding cache store: {kind}")
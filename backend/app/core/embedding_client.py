@@ -0,0 +1,121 @@
+# backend/app/core/embedding_client.py
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingProviderError(Exception):
+    """埋め込みプロバイダー呼び出し時のエラー"""
+
+
+class EmbeddingProvider(ABC):
+    """埋め込みベクトル生成プロバイダーのインターフェース
+
+    テストやベンチマークではこのクラスを実装したフェイクに差し替える。
+    """
+
+    @abstractmethod
+    async def embed(
+        self,
+        texts: List[str],
+        model: str,
+        timeout: Optional[float] = None
+    ) -> List[List[float]]:
+        """複数テキストの埋め込みベクトルを入力順で返す"""
+
+    async def aclose(self) -> None:
+        """保持している接続などのリソースを解放"""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI互換の /embeddings エンドポイントを非同期に呼び出すプロバイダー
+
+    httpx.AsyncClient を使い回して接続を再利用し、同時実行数はセマフォで制限する。
+    base_url を変更すればローカルのフェイクサーバーにも接続できる。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.openai.com/v1",
+        timeout: float = 10.0,
+        max_concurrency: int = 8,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """共有HTTPクライアントを取得（初回のみ生成）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    async def embed(
+        self,
+        texts: List[str],
+        model: str,
+        timeout: Optional[float] = None
+    ) -> List[List[float]]:
+        """埋め込みベクトルを取得"""
+        client = self._get_client()
+
+        try:
+            async with self._semaphore:
+                response = await client.post(
+                    "/embeddings",
+                    json={"model": model, "input": texts},
+                    timeout=timeout if timeout is not None else self.timeout
+                )
+            response.raise_for_status()
+        except httpx.TimeoutException as e:
+            raise EmbeddingProviderError(f"Embedding request timed out: {e}") from e
+        except httpx.HTTPError as e:
+            raise EmbeddingProviderError(f"Embedding request failed: {e}") from e
+
+        try:
+            data = response.json()["data"]
+            # レスポンスの順序は保証されないため index で並べ直す
+            return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+        except (ValueError, KeyError, TypeError) as e:
+            raise EmbeddingProviderError(f"Malformed embedding response: {e!r}") from e
+
+    async def aclose(self) -> None:
+        """HTTPクライアントを閉じる"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_default_provider() -> EmbeddingProvider:
+    """設定値からデフォルトのプロバイダーを生成"""
+    return OpenAIEmbeddingProvider(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_API_BASE,
+        timeout=settings.EMBEDDING_REQUEST_TIMEOUT,
+        max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+        max_connections=settings.EMBEDDING_MAX_CONNECTIONS
+    )
@@ -0,0 +1,283 @@
+# backend/app/core/lab_neighbors.py
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.vector_index import read_index_data
+from app.models import LabNeighbor
+
+logger = logging.getLogger(__name__)
+
+# 複数ワーカーが同時に再構築しないためのアドバイザリロックのキー
+_ADVISORY_LOCK_KEY = zlib.crc32(b"lab_neighbors")
+
+# 全ペア類似度のブロック1つに使うメモリ（類似度 float32 と argpartition の int64 で1要素12バイト）
+_BLOCK_MEMORY_BYTES = 64 * 1024 * 1024
+_BYTES_PER_SCORE = 4 + 8
+
+# 全体の再構築を Web ワーカーの外で実行するための作業ディレクトリ（app パッケージの親）
+_BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# 指定研究室の近傍（対象の埋め込みはサブクエリ1回だけで評価する）
+_NEIGHBORS_OF_SQL = text("""
+    SELECT id, 1 - distance AS similarity
+    FROM (
+        SELECT
+            rl.id,
+            rl.embedding <=> (
+                SELECT embedding
+                FROM research_labs
+                WHERE id = :lab_id
+            ) AS distance
+        FROM research_labs rl
+        WHERE rl.id != :lab_id
+        AND rl.embedding IS NOT NULL
+        ORDER BY distance
+        LIMIT :top_n
+    ) nearest
+    WHERE distance IS NOT NULL
+""")
+
+# 埋め込みの変更により近傍リストを作り直す必要がある研究室
+#   - 近傍リストが無い / 作成後に研究室が更新された / 削除で件数が欠けた
+_STALE_LABS_SQL = text("""
+    WITH built AS (
+        SELECT lab_id, max(updated_at) AS built_at, count(*) AS neighbor_count
+        FROM lab_neighbors
+        GROUP BY lab_id
+    ),
+    expected AS (
+        SELECT LEAST(:top_n, count(*) - 1) AS neighbor_count
+        FROM research_labs
+        WHERE embedding IS NOT NULL
+    )
+    SELECT rl.id
+    FROM research_labs rl
+    CROSS JOIN expected
+    LEFT JOIN built ON built.lab_id = rl.id
+    WHERE rl.embedding IS NOT NULL
+    AND (
+        built.lab_id IS NULL
+        OR rl.updated_at > built.built_at
+        OR built.neighbor_count < expected.neighbor_count
+    )
+""")
+
+# 1件の研究室の変更で近傍リストが変わりうる研究室
+#   - 変更した研究室を近傍に含む / 変更した研究室が現在の N 位より近い
+_AFFECTED_LABS_SQL = text("""
+    WITH floors AS (
+        SELECT lab_id, min(similarity) AS floor_similarity, count(*) AS neighbor_count
+        FROM lab_neighbors
+        GROUP BY lab_id
+    )
+    SELECT rl.id
+    FROM research_labs rl
+    JOIN floors ON floors.lab_id = rl.id
+    WHERE rl.id != :lab_id
+    AND rl.embedding IS NOT NULL
+    AND (
+        floors.neighbor_count < :top_n
+        OR 1 - (rl.embedding <=> (
+            SELECT embedding FROM research_labs WHERE id = :lab_id
+        )) > floors.floor_similarity
+    )
+    UNION
+    SELECT lab_id FROM lab_neighbors WHERE neighbor_id = :lab_id AND lab_id != :lab_id
+""")
+
+
+def block_rows(n: int, memory_bytes: int = _BLOCK_MEMORY_BYTES) -> int:
+    """n 行の全ペア類似度を memory_bytes 以内のブロックで計算するときの1ブロックの行数"""
+    return max(1, memory_bytes // (max(n, 1) * _BYTES_PER_SCORE))
+
+
+def compute_neighbors(
+    matrix: np.ndarray,
+    top_n: int,
+    block_size: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """正規化済み行列の全ペア類似度から各行の上位 top_n 行を求める
+
+    (n, n) の類似度行列を作らず、block_size 行（省略時はメモリ上限から決める）ずつ行列積を計算する。
+    戻り値は (n, k) の行番号と類似度（k = min(top_n, n - 1)）。
+    """
+    n = matrix.shape[0]
+    k = min(top_n, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64), np.zeros((n, 0), dtype=np.float32)
+
+    block_size = block_size or block_rows(n)
+    neighbor_rows = np.empty((n, k), dtype=np.int64)
+    neighbor_scores = np.empty((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        scores = matrix[start:stop] @ matrix.T
+        # 符号をその場で反転して小さい順に選ぶ（コピーを作らない）。自分自身は除外
+        np.negative(scores, out=scores)
+        scores[np.arange(stop - start), np.arange(start, stop)] = np.inf
+
+        top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(top_scores, axis=1, kind="stable")
+
+        neighbor_rows[start:stop] = np.take_along_axis(top, order, axis=1)
+        neighbor_scores[start:stop] = -np.take_along_axis(top_scores, order, axis=1)
+
+    return neighbor_rows, neighbor_scores
+
+
+def _neighbor_records(lab_id: int, neighbors: Sequence[Tuple[int, float]]) -> List[dict]:
+    return [
+        {"lab_id": lab_id, "rank": rank, "neighbor_id": neighbor_id, "similarity": float(similarity)}
+        for rank, (neighbor_id, similarity) in enumerate(neighbors, start=1)
+    ]
+
+
+def _lock(db: Session, wait: bool = True) -> bool:
+    """トランザクション終了まで有効なアドバイザリロック（wait=False なら取れない場合 False）"""
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        return True
+    return bool(db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"),
+        {"key": _ADVISORY_LOCK_KEY}
+    ).scalar())
+
+
+def rebuild_all(db: Session, top_n: int = 20, block_size: Optional[int] = None) -> int:
+    """全研究室の近傍リストをブロック行列積で再計算して置き換える
+
+    置き換えは1トランザクションで行うため、読み手はコミットまで旧リストを参照する。
+    """
+    started = time.perf_counter()
+    _lock(db)
+    data = read_index_data(db)
+    neighbor_rows, neighbor_scores = compute_neighbors(data.matrix, top_n, block_size)
+
+    records = []
+    for row, lab_id in enumerate(data.ids.tolist()):
+        records.extend(_neighbor_records(
+            lab_id,
+            zip(data.ids[neighbor_rows[row]].tolist(), neighbor_scores[row].tolist())
+        ))
+
+    db.execute(delete(LabNeighbor))
+    if records:
+        db.execute(insert(LabNeighbor), records)
+    db.commit()
+
+    logger.info(
+        f"Rebuilt lab_neighbors: {data.size} labs, {len(records)} rows in "
+        f"{(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return len(records)
+
+
+def _replace_neighbors(db: Session, lab_id: int, top_n: int):
+    neighbors = [tuple(row) for row in db.execute(_NEIGHBORS_OF_SQL, {"lab_id": lab_id, "top_n": top_n})]
+    db.execute(delete(LabNeighbor).where(LabNeighbor.lab_id == lab_id))
+    if neighbors:
+        db.execute(insert(LabNeighbor), _neighbor_records(lab_id, neighbors))
+
+
+def _apply_change(db: Session, lab_id: int, top_n: int) -> int:
+    """変更された研究室と、その影響を受ける研究室の近傍リストを再計算（コミットしない）"""
+    affected = [row[0] for row in db.execute(_AFFECTED_LABS_SQL, {"lab_id": lab_id, "top_n": top_n})]
+    for target_id in [lab_id, *affected]:
+        _replace_neighbors(db, target_id, top_n)
+    return len(affected) + 1
+
+
+def update_lab(db: Session, lab_id: int, top_n: int = 20) -> int:
+    """1件の研究室の埋め込み変更を近傍テーブルに反映"""
+    _lock(db)
+    updated = _apply_change(db, lab_id, top_n)
+    db.commit()
+
+    logger.info(f"Updated lab_neighbors for lab {lab_id} ({updated} lists recomputed)")
+    return updated
+
+
+def refresh_if_stale(
+    db: Session,
+    top_n: int = 20,
+    max_incremental: int = 50,
+    rebuild: bool = True
+) -> Optional[int]:
+    """古くなった近傍リストを更新（少数なら差分更新、多ければ全体を再構築）
+
+    他ワーカーが更新中の場合は何もしない。
+    rebuild=False の場合は全体の再構築をせず None を返す（rebuild_in_subprocess で行う）。
+    """
+    if not _lock(db, wait=False):
+        db.rollback()
+        return 0
+
+    stale = [row[0] for row in db.execute(_STALE_LABS_SQL, {"top_n": top_n})]
+    if not stale:
+        db.rollback()
+        return 0
+
+    if len(stale) > max_incremental:
+        if not rebuild:
+            db.rollback()
+            return None
+        rebuild_all(db, top_n)
+        return len(stale)
+
+    for lab_id in stale:
+        _apply_change(db, lab_id, top_n)
+    db.commit()
+
+    logger.info(f"Refreshed lab_neighbors for {len(stale)} changed labs")
+    return len(stale)
+
+
+async def rebuild_in_subprocess() -> bool:
+    """近傍リストの更新を別プロセスで実行（全体の再構築のメモリを Web ワーカーに残さない）"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "app.core.lab_neighbors", "--if-stale",
+        cwd=_BACKEND_DIR
+    )
+    returncode = await process.wait()
+    if returncode:
+        logger.error(f"lab_neighbors rebuild process exited with {returncode}")
+    return returncode == 0
+
+
+def main():
+    """全研究室の近傍リストを手動で再構築"""
+    from app.config import settings
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--if-stale",
+        action="store_true",
+        help="古くなった近傍リストがある場合だけ更新する（他のプロセスが更新中なら何もしない）"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        if args.if_stale:
+            labs = refresh_if_stale(db, settings.LAB_NEIGHBORS_TOP_N)
+            print(f"✅ Refreshed lab_neighbors ({labs} labs)")
+            return
+        rows = rebuild_all(db, settings.LAB_NEIGHBORS_TOP_N)
+    print(f"✅ Rebuilt lab_neighbors ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/app/core/lab_pagination.py
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import contains_eager
+
+from app.models import ResearchLab, University
+
+# 並び順ごとのキー列（最後の id で同じ値の行の順序を一意にする）
+SORT_COLUMNS = {
+    "id": (ResearchLab.id,),
+    "research_field": (ResearchLab.research_field, ResearchLab.id)
+}
+
+
+class InvalidCursor(ValueError):
+    """継続トークンが壊れている、または別の条件で発行されたもの"""
+
+
+def _filters_digest(filters: Dict[str, Any]) -> str:
+    raw = json.dumps(filters, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def encode_cursor(order: str, key: Sequence[Any], filters: Dict[str, Any]) -> str:
+    """最後に返した行のキーを継続トークンにする（URLに埋め込める base64）"""
+    payload = {"o": order, "k": list(key), "f": _filters_digest(filters)}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, order: str, filters: Dict[str, Any]) -> List[Any]:
+    """継続トークンからキーを取り出す（並び順・フィルターが発行時と違えば InvalidCursor）"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        key = payload["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("継続トークンが不正です") from e
+
+    if payload.get("o") != order or payload.get("f") != _filters_digest(filters):
+        raise InvalidCursor("継続トークンが現在の並び順・フィルターと一致しません")
+    if not isinstance(key, list) or len(key) != len(SORT_COLUMNS[order]):
+        raise InvalidCursor("継続トークンが不正です")
+    return key
+
+
+def list_labs_query(
+    order: str = "id",
+    after: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+    research_field: Optional[str] = None,
+    region: Optional[str] = None,
+    university_name: Optional[str] = None
+) -> Select:
+    """研究室一覧のクエリ（大学は同じ JOIN から読み込み、after より後ろを limit 件）
+
+    OFFSET を使わず、並び順のキー列のインデックスで after の位置から読み始めるため、
+    何ページ目でも読み込む行数は limit 件で変わらない。
+    """
+    columns = SORT_COLUMNS[order]
+    query = (
+        select(ResearchLab)
+        .join(University, ResearchLab.university_id == University.id)
+        .options(contains_eager(ResearchLab.university))
+    )
+
+    if research_field:
+        query = query.where(ResearchLab.research_field == research_field)
+    if region:
+        query = query.where(University.region == region)
+    if university_name:
+        query = query.where(University.name.ilike(f"%{university_name}%"))
+
+    if after is not None:
+        query = query.where(tuple_(*columns) > tuple_(*after))
+
+    return query.order_by(*columns).limit(limit)
+
+
+def sort_key(lab: ResearchLab, order: str) -> List[Any]:
+    """行の並び順のキー（継続トークンに入れる値）"""
+    return [getattr(lab, column.key) for column in SORT_COLUMNS[order]]
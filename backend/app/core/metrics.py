@@ -0,0 +1,124 @@
+# backend/app/core/metrics.py
+import bisect
+import threading
+from typing import Callable, Dict, Any, Optional, Sequence
+
+
+class Counter:
+    """単調増加カウンター"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """カウンターを加算"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """固定バケットのヒストグラム（パーセンタイルはバケット上限で近似）"""
+
+    DEFAULT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, name: str, buckets: Optional[Sequence[float]] = None, description: str = ""):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._counts = [0] * (len(self.buckets) + 1)  # 最後は上限超過分
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """値を記録"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q (0-1) パーセンタイルが含まれるバケットの上限を返す（最大バケット超過時は None）"""
+        if self._count == 0:
+            return None
+        rank = q * self._count
+        cumulative = 0
+        for upper, count in zip(self.buckets, self._counts):
+            cumulative += count
+            if cumulative >= rank:
+                return upper
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """現在の集計値"""
+        return {
+            "count": self._count,
+            "sum": round(self._sum, 3),
+            "mean": round(self._sum / self._count, 3) if self._count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": {
+                **{str(upper): count for upper, count in zip(self.buckets, self._counts)},
+                "+Inf": self._counts[-1]
+            }
+        }
+
+
+class MetricsRegistry:
+    """プロセス内メトリクスの登録先
+
+    /metrics エンドポイントから snapshot() の内容を返す。
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """カウンターを取得（未登録なら作成）"""
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name, description)
+            return self._counters[name]
+
+    def histogram(
+        self,
+        name: str,
+        buckets: Optional[Sequence[float]] = None,
+        description: str = ""
+    ) -> Histogram:
+        """ヒストグラムを取得（未登録なら作成）"""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, buckets, description)
+            return self._histograms[name]
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]):
+        """スナップショット取得時に呼ばれる集計関数を登録"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """全メトリクスの現在値を取得"""
+        data: Dict[str, Any] = {
+            "counters": {name: c.value for name, c in self._counters.items()},
+            "histograms": {name: h.snapshot() for name, h in self._histograms.items()}
+        }
+        for name, collector in self._collectors.items():
+            data[name] = collector()
+        return data
+
+
+# アプリケーション共通のレジストリ
+metrics = MetricsRegistry()
@@ -0,0 +1,101 @@
+# backend/app/core/pagination_benchmark.py
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import event, func, select
+
+from app.core.db_benchmark import percentile
+from app.core.lab_pagination import list_labs_query, sort_key
+from app.database import AsyncSessionLocal, close_async_engine, get_async_engine
+from app.models import ResearchLab
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryCounter:
+    """実行されたSQL文の数（遅延ロードによる N+1 の検出用）"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def _time_page(query, repeat: int, counter: _QueryCounter) -> Dict[str, float]:
+    latencies: List[float] = []
+    statements = 0
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            before = counter.count
+            started = time.perf_counter()
+            labs = (await db.execute(query)).scalars().all()
+            # レスポンス生成時と同じく大学情報まで参照する
+            for lab in labs:
+                lab.university.name
+            latencies.append((time.perf_counter() - started) * 1000)
+            statements = counter.count - before
+    return {"p50_ms": percentile(latencies, 50), "queries": statements}
+
+
+async def benchmark(depths: Sequence[float], limit: int, order: str, repeat: int) -> List[Dict[str, float]]:
+    """全件の depths（0〜1）の位置のページを OFFSET とキーセットで取得して比較"""
+    counter = _QueryCounter()
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", counter)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            total = (await db.execute(select(func.count(ResearchLab.id)))).scalar()
+        if not total:
+            raise RuntimeError("研究室データがありません")
+
+        report = []
+        for depth in depths:
+            offset = min(int(total * depth), max(total - limit, 0))
+            after = None
+            if offset:
+                # OFFSET と同じ位置から読み始める継続トークンのキー（計測外）
+                async with AsyncSessionLocal() as db:
+                    previous = (await db.execute(
+                        list_labs_query(order, None, 1).offset(offset - 1)
+                    )).scalars().first()
+                    after = sort_key(previous, order)
+
+            offset_result = await _time_page(list_labs_query(order, None, limit).offset(offset), repeat, counter)
+            keyset_result = await _time_page(list_labs_query(order, after, limit), repeat, counter)
+            report.append({
+                "offset": offset,
+                "offset_p50_ms": offset_result["p50_ms"],
+                "keyset_p50_ms": keyset_result["p50_ms"],
+                "queries_per_page": keyset_result["queries"]
+            })
+        return report
+    finally:
+        await close_async_engine()
+
+
+def main():
+    """研究室一覧の OFFSET ページングとキーセットページングの深さごとの速度を比較"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--depths", type=float, nargs="+", default=[0.0, 0.1, 0.25, 0.5, 0.75, 0.99])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--order", choices=["id", "research_field"], default="id")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(benchmark(args.depths, args.limit, args.order, args.repeat))
+
+    print(f"{'offset':>8} {'OFFSET p50 ms':>14} {'keyset p50 ms':>14} {'queries/page':>13}")
+    for row in report:
+        print(
+            f"{row['offset']:>8} {row['offset_p50_ms']:>14.2f} "
+            f"{row['keyset_p50_ms']:>14.2f} {row['queries_per_page']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/app/core/pool_metrics.py
+import logging
+import time
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 接続取得待ち時間のバケット（ミリ秒、プール枯渇時は pool_timeout まで伸びる）
+_CHECKOUT_WAIT_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 30000)
+
+
+class PoolInstrumentation:
+    """接続プールのイベントを metrics（db_pool.<name>.*）に記録
+
+    ワーカー数 × 同期・非同期エンジンの (pool_size + max_overflow) の合計が DB の max_connections に収まるかを、
+    取得待ち時間・同時使用数の最大値・オーバーフロー発生回数から判断するために使う。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        prefix = f"db_pool.{name}"
+        self.checkout_wait_ms = metrics.histogram(f"{prefix}.checkout_wait_ms", _CHECKOUT_WAIT_BUCKETS)
+        self.checkout_timeouts = metrics.counter(f"{prefix}.checkout_timeouts")
+        self.overflow_connections = metrics.counter(f"{prefix}.overflow_connections")
+        self.pre_ping_failures = metrics.counter(f"{prefix}.pre_ping_failures")
+        self.invalidations = metrics.counter(f"{prefix}.invalidations")
+        self.peak_in_use = 0
+        self._engine: Optional[Engine] = None
+
+    def pool_class(self, base: Type[Pool] = QueuePool) -> Type[Pool]:
+        """接続の取得（空き待ち・新規接続を含む）にかかった時間を記録するプールクラス"""
+        instrumentation = self
+
+        class TimedPool(base):
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    instrumentation.checkout_timeouts.inc()
+                    raise
+                finally:
+                    instrumentation.checkout_wait_ms.observe((time.perf_counter() - started) * 1000)
+
+        TimedPool.__name__ = f"Timed{base.__name__}"
+        return TimedPool
+
+    def attach(self, engine: Engine):
+        """エンジンにイベントを登録し、プールの状態を metrics に出力（非同期エンジンは sync_engine を渡す）"""
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "handle_error", self._on_error)
+        metrics.register_collector(f"db_pool.{self.name}", self.stats)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        pool = self._engine.pool
+        if isinstance(pool, QueuePool) and pool.overflow() > 0:
+            self.overflow_connections.inc()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        pool = self._engine.pool
+        if isinstance(pool, QueuePool):
+            self.peak_in_use = max(self.peak_in_use, pool.checkedout())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations.inc()
+
+    def _on_error(self, context):
+        if context.is_pre_ping:
+            self.pre_ping_failures.inc()
+            logger.warning(f"Connection pre-ping failed on pool '{self.name}': {context.original_exception!r}")
+
+    def stats(self) -> Dict[str, Any]:
+        """プールの現在の状態"""
+        if self._engine is None:
+            return {"attached": False}
+        pool = self._engine.pool
+        if not isinstance(pool, QueuePool):
+            return {"pool": type(pool).__name__}
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "peak_in_use": self.peak_in_use,
+            "timeout": pool.timeout()
+        }
@@ -0,0 +1,235 @@
+# backend/app/core/popular_queries.py
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.embedding_cache import normalize_query
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 減衰済みスコア（updated_at からの経過時間で半減期ごとに 1/2）
+_DECAYED_SCORE = "score * power(0.5, extract(epoch FROM now() - updated_at) / :half_life)"
+
+# 各ワーカーの未反映の検索回数を、既存スコアを減衰させてから加算
+_UPSERT_SQL = text("""
+    INSERT INTO popular_queries (query, score, updated_at)
+    SELECT delta.query, delta.count, now()
+    FROM unnest(CAST(:queries AS text[]), CAST(:counts AS double precision[])) AS delta(query, count)
+    ON CONFLICT (query) DO UPDATE SET
+        score = popular_queries.score
+            * power(0.5, extract(epoch FROM now() - popular_queries.updated_at) / :half_life)
+            + EXCLUDED.score,
+        updated_at = now()
+""")
+
+_TOP_SQL = text(f"""
+    SELECT query, {_DECAYED_SCORE} AS score
+    FROM popular_queries
+    ORDER BY score DESC
+    LIMIT :limit
+""")
+
+# スコアが下位の行を削除してテーブルの大きさを一定に保つ
+_PRUNE_SQL = text(f"""
+    DELETE FROM popular_queries
+    WHERE query IN (
+        SELECT query FROM popular_queries
+        ORDER BY {_DECAYED_SCORE} DESC
+        OFFSET :max_rows
+    )
+""")
+
+
+class DecayedSpaceSaving:
+    """時間減衰付きの Space-Saving（heavy hitters）スケッチ
+
+    最大 capacity 件のカウンタだけを保持し、満杯時は最小のカウンタを新しい項目に引き継ぐ。
+    推定値は真の値以上で、過大評価は項目ごとの error 以下に収まる。
+    減衰は forward decay: 加算時の重みを基準時刻からの経過時間に応じて大きくし、
+    読み出し時に現在時刻の値へ換算する（全カウンタを毎回減衰させない）。
+    """
+
+    # 重みが 2^32 倍を超えたら基準時刻を進めて桁あふれを防ぐ
+    _RENORMALIZE_EXPONENT = 32.0
+
+    def __init__(self, capacity: int, half_life: float, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.clock = clock
+        self._landmark = clock()
+        self._weights: Dict[str, float] = {}
+        self._errors: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def _exponent(self, now: float) -> float:
+        return (now - self._landmark) / self.half_life
+
+    def _renormalize(self, now: float):
+        factor = 2.0 ** -self._exponent(now)
+        for item in self._weights:
+            self._weights[item] *= factor
+            self._errors[item] *= factor
+        self._landmark = now
+
+    def add(self, item: str, count: float = 1.0) -> Optional[str]:
+        """項目を count 回分加算（追い出した項目があれば返す）"""
+        now = self.clock()
+        if self._exponent(now) > self._RENORMALIZE_EXPONENT:
+            self._renormalize(now)
+        weight = count * 2.0 ** self._exponent(now)
+
+        if item in self._weights:
+            self._weights[item] += weight
+            return None
+
+        if len(self._weights) < self.capacity:
+            self._weights[item] = weight
+            self._errors[item] = 0.0
+            return None
+
+        # 追加は新規クエリで満杯の時だけなので、最小値は線形探索で求める
+        evicted = min(self._weights, key=self._weights.__getitem__)
+        floor = self._weights.pop(evicted)
+        del self._errors[evicted]
+        self._weights[item] = floor + weight
+        self._errors[item] = floor
+        return evicted
+
+    def estimate(self, item: str) -> Tuple[float, float]:
+        """現在時刻での (推定値, 過大評価の上限)"""
+        scale = 2.0 ** -self._exponent(self.clock())
+        return self._weights.get(item, 0.0) * scale, self._errors.get(item, 0.0) * scale
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        """推定値の上位k件（降順）"""
+        scale = 2.0 ** -self._exponent(self.clock())
+        return [
+            (item, weight * scale)
+            for item, weight in heapq.nlargest(k, self._weights.items(), key=itemgetter(1))
+        ]
+
+    def load(self, items: Iterable[Tuple[str, float]]):
+        """現在時刻での推定値を与えて中身を置き換える（上位 capacity 件のみ保持）"""
+        self._landmark = self.clock()
+        top = heapq.nlargest(self.capacity, items, key=itemgetter(1))
+        self._weights = {item: float(score) for item, score in top}
+        self._errors = {item: 0.0 for item in self._weights}
+
+
+class PopularQueries:
+    """時間減衰付きの人気検索クエリランキング
+
+    検索のたびにプロセス内のスケッチを更新し、一覧はスケッチから O(K) で返す。
+    定期的に未反映の検索回数を popular_queries テーブルへ加算し、
+    全ワーカー分を合算した上位をスケッチに読み戻す（再起動時もここから復元する）。
+    未反映分はテーブルと同じ max_rows 件までしか保持しない。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 500,
+        half_life: float = 604800.0,
+        max_rows: int = 5000,
+        clock: Callable[[], float] = time.time
+    ):
+        self.half_life = half_life
+        self.max_rows = max_rows
+        self.sketch = DecayedSpaceSaving(capacity, half_life, clock)
+        self._unsynced: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.evictions = metrics.counter("popular_queries.evictions")
+        self.unsynced_dropped = metrics.counter("popular_queries.unsynced_dropped")
+
+    def record(self, query: str):
+        """検索されたクエリを記録"""
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            evicted = self.sketch.add(key)
+            if evicted is not None:
+                # 未反映分は次の sync でテーブルに加算するため残す（同期ごとに空になる）
+                self.evictions.inc()
+            if key not in self._unsynced and len(self._unsynced) >= self.max_rows:
+                # 同期が失敗し続けても際限なく増えないよう、未反映の回数が最少のクエリを捨てる
+                dropped = min(self._unsynced, key=self._unsynced.__getitem__)
+                del self._unsynced[dropped]
+                self.unsynced_dropped.inc()
+            self._unsynced[key] = self._unsynced.get(key, 0) + 1
+
+    def top(self, limit: int) -> List[Tuple[str, float]]:
+        """人気クエリの上位 (クエリ, 減衰済みスコア)"""
+        with self._lock:
+            return self.sketch.top(limit)
+
+    def sync(self, db: Session) -> int:
+        """未反映の検索回数をテーブルに加算し、全ワーカー分の上位を読み戻す"""
+        with self._lock:
+            deltas = dict(self._unsynced)
+
+        params = {"half_life": self.half_life}
+        if deltas:
+            db.execute(_UPSERT_SQL, {
+                **params,
+                "queries": list(deltas),
+                "counts": [float(count) for count in deltas.values()]
+            })
+            db.execute(_PRUNE_SQL, {**params, "max_rows": self.max_rows})
+            db.commit()
+
+        rows = db.execute(_TOP_SQL, {**params, "limit": self.sketch.capacity}).fetchall()
+
+        with self._lock:
+            for query, count in deltas.items():
+                remaining = self._unsynced.get(query, 0) - count
+                if remaining > 0:
+                    self._unsynced[query] = remaining
+                else:
+                    self._unsynced.pop(query, None)
+
+            self.sketch.load((row.query, float(row.score)) for row in rows)
+            # 同期中に記録された分はまだテーブルに無いため、読み戻した値に加える
+            for query, count in self._unsynced.items():
+                self.sketch.add(query, count)
+
+        return len(deltas)
+
+    async def sync_async(self, session_factory: Callable[[], Session]) -> int:
+        """sync をスレッドプールで実行"""
+        def _sync():
+            with session_factory() as db:
+                return self.sync(db)
+
+        return await asyncio.to_thread(_sync)
+
+    def stats(self):
+        """スケッチの状態"""
+        with self._lock:
+            return {
+                "tracked_queries": len(self.sketch),
+                "capacity": self.sketch.capacity,
+                "unsynced_queries": len(self._unsynced),
+                "unsynced_dropped": self.unsynced_dropped.value
+            }
+
+
+# アプリケーション共通の人気クエリランキング
+popular_queries = PopularQueries(
+    capacity=settings.POPULAR_QUERIES_CAPACITY,
+    half_life=settings.POPULAR_QUERIES_HALF_LIFE_SECONDS,
+    max_rows=settings.POPULAR_QUERIES_MAX_ROWS
+)
+
+metrics.register_collector("popular_queries", popular_queries.stats)
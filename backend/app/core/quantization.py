@@ -0,0 +1,203 @@
+# backend/app/core/quantization.py
+import argparse
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# スコア計算時に float32 へ展開する行数（一時メモリを抑える）
+_BLOCK_ROWS = 8192
+
+# 0-255 の各値の立っているビット数
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedMatrix(ABC):
+    """正規化済み埋め込み行列の圧縮表現
+
+    圧縮コード上で近似スコアを計算し、候補の絞り込みに使う。
+    最終順位は元の float32 ベクトルで再計算（リランク）する。
+    """
+
+    mode: str = ""
+
+    def __init__(self, codes: np.ndarray):
+        self.codes = codes
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes)
+
+    @abstractmethod
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """正規化済みクエリに対する近似スコア（大きいほど類似）"""
+
+    def _blocked_dot(self, query: np.ndarray) -> np.ndarray:
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], _BLOCK_ROWS):
+            block = self.codes[start:start + _BLOCK_ROWS].astype(np.float32)
+            out[start:start + _BLOCK_ROWS] = block @ query
+        return out
+
+
+class Float16Matrix(QuantizedMatrix):
+    """半精度（halfvec 相当、1/2 サイズ）"""
+
+    mode = "float16"
+
+    def __init__(self, matrix: np.ndarray):
+        super().__init__(np.asarray(matrix, dtype=np.float16))
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        return self._blocked_dot(query)
+
+
+class Int8Matrix(QuantizedMatrix):
+    """次元ごとのスケールによるスカラー量子化（1/4 サイズ）"""
+
+    mode = "int8"
+
+    def __init__(self, matrix: np.ndarray):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        scale = np.abs(matrix).max(axis=0) / 127.0 if matrix.size else np.ones(matrix.shape[1])
+        scale[scale == 0] = 1.0
+        self.scale = scale.astype(np.float32)
+        super().__init__(np.round(matrix / self.scale).astype(np.int8))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.scale.nbytes)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        # スケールはクエリ側に掛けておけば行ごとの逆量子化が不要
+        return self._blocked_dot(query * self.scale)
+
+
+class BinaryMatrix(QuantizedMatrix):
+    """符号ビット（1/32 サイズ）、ハミング距離で近似"""
+
+    mode = "binary"
+
+    def __init__(self, matrix: np.ndarray):
+        super().__init__(np.packbits(np.asarray(matrix) > 0, axis=1))
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        query_bits = np.packbits(query > 0)
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], _BLOCK_ROWS):
+            xor = np.bitwise_xor(self.codes[start:start + _BLOCK_ROWS], query_bits)
+            out[start:start + _BLOCK_ROWS] = -_POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+        return out
+
+
+_QUANTIZERS = {
+    quantized.mode: quantized
+    for quantized in (Float16Matrix, Int8Matrix, BinaryMatrix)
+}
+
+QUANTIZATION_MODES = ("none", *_QUANTIZERS)
+
+
+def quantize(matrix: np.ndarray, mode: str) -> Optional[QuantizedMatrix]:
+    """設定値の方式で行列を圧縮（'none' は None）"""
+    if not mode or mode == "none":
+        return None
+    if mode not in _QUANTIZERS:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    return _QUANTIZERS[mode](matrix)
+
+
+def evaluate(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    rerank_factor: int = 4,
+    modes: Optional[List[str]] = None
+) -> List[Dict[str, float]]:
+    """量子化方式ごとのメモリ量・recall@k・検索時間を計測
+
+    matrix, queries は行ごとに正規化済みであること。
+    recall@k は float32 全件検索の上位k件と、圧縮コード+リランクの上位k件の一致率。
+    scan_bytes は候補の絞り込みで走査する量（圧縮コード+スケール）。
+    resident_bytes はインデックスが保持する量で、リランク用の float32 行列も含むため
+    どの方式でも 'none' より大きくなる。float32 行列の分を節約できるのは
+    VECTOR_SNAPSHOT_DIR でスナップショットをメモリマップし、ワーカー間で共有する場合だけ。
+    """
+    from app.core.data_version import DataVersion
+    from app.core.vector_index import VectorIndex, build_index_data
+
+    n = matrix.shape[0]
+    data = build_index_data(list(range(n)), matrix, ["-"] * n, ["-"] * n)
+    exact_index = VectorIndex(DataVersion())
+    exact_index.swap(data)
+    truth = [
+        {lab_id for lab_id, _ in exact_index.search(query, k)}
+        for query in queries
+    ]
+
+    report = []
+    for mode in modes or QUANTIZATION_MODES:
+        index = VectorIndex(DataVersion(), quantization=mode, rerank_factor=rerank_factor)
+        index.swap(data)
+
+        started = time.perf_counter()
+        found = [{lab_id for lab_id, _ in index.search(query, k)} for query in queries]
+        elapsed_ms = (time.perf_counter() - started) * 1000 / max(len(queries), 1)
+
+        recall = np.mean([len(a & b) / k for a, b in zip(found, truth)]) if queries.size else 0.0
+        codes = index.data.codes
+        code_bytes = codes.nbytes if codes is not None else data.matrix.nbytes
+        resident_bytes = data.matrix.nbytes + (codes.nbytes if codes is not None else 0)
+        report.append({
+            "mode": mode,
+            "scan_bytes": int(code_bytes),
+            "resident_bytes": int(resident_bytes),
+            "bytes_per_lab": round(code_bytes / max(n, 1), 1),
+            "recall_at_k": round(float(recall), 4),
+            "query_ms": round(elapsed_ms, 3)
+        })
+    return report
+
+
+def main():
+    """合成データ（またはスナップショット）で量子化方式を比較"""
+    parser = argparse.ArgumentParser(description="埋め込み量子化のメモリ量・recall@k比較")
+    parser.add_argument("--labs", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=1.0, help="クエリに加える摂動の大きさ")
+    parser.add_argument("--snapshot-dir", default="", help="実データのスナップショットを使う場合に指定")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.snapshot_dir:
+        from app.core.vector_snapshot import SnapshotStore
+        matrix = np.array(SnapshotStore(args.snapshot_dir).open().matrix)
+    else:
+        matrix = rng.normal(size=(args.labs, args.dimension)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    # 研究室ベクトルに摂動を加えたものをクエリとする（近傍に正解がある状況を再現）
+    picks = matrix[rng.choice(matrix.shape[0], size=args.queries)]
+    noise = rng.normal(size=picks.shape).astype(np.float32)
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    queries = picks + args.noise * noise
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(
+        f"{'mode':<8} {'scan MB':>9} {'resident MB':>12} {'B/lab':>8} "
+        f"{'recall@' + str(args.k):>10} {'ms/query':>9}"
+    )
+    for row in evaluate(matrix, queries, args.k, args.rerank_factor):
+        print(
+            f"{row['mode']:<8} {row['scan_bytes'] / 1e6:>9.2f} {row['resident_bytes'] / 1e6:>12.2f} "
+            f"{row['bytes_per_lab']:>8.1f} {row['recall_at_k']:>10.4f} {row['query_ms']:>9.3f}"
+        )
+    print("resident MB にはリランク用の float32 行列を含む（メモリマップしたスナップショットならワーカー間で共有）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/app/core/query_embedding_store.py
+import asyncio
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.embedding_cache import EmbeddingStore
+from app.models import QueryEmbedding
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseEmbeddingStore(EmbeddingStore):
+    """query_embeddings テーブルを使う永続層
+
+    全ワーカー・デプロイをまたいでクエリ埋め込みを共有する。
+    DBアクセスは同期セッションのため、スレッドプールで実行してイベントループを塞がない。
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def _get_sync(self, key: str) -> Optional[List[float]]:
+        with self.session_factory() as db:
+            # 取得と同時に最終利用日時・ヒット数を更新（1往復）
+            row = db.execute(
+                update(QueryEmbedding)
+                .where(QueryEmbedding.query_hash == key)
+                .values(
+                    last_used_at=func.now(),
+                    hit_count=QueryEmbedding.hit_count + 1
+                )
+                .returning(QueryEmbedding.embedding)
+            ).first()
+            db.commit()
+        return None if row is None else list(map(float, row[0]))
+
+    def _put_sync(self, key: str, text: str, model: str, embedding: List[float]):
+        with self.session_factory() as db:
+            stmt = insert(QueryEmbedding).values(
+                query_hash=key,
+                model=model,
+                query_text=text,
+                embedding=embedding,
+                hit_count=0
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[QueryEmbedding.query_hash],
+                set_={"last_used_at": func.now()}
+            ))
+            db.commit()
+
+    def _touch_sync(self, keys: List[str]):
+        with self.session_factory() as db:
+            db.execute(
+                update(QueryEmbedding)
+                .where(QueryEmbedding.query_hash.in_(keys))
+                .values(last_used_at=func.now())
+            )
+            db.commit()
+
+    def _prefetch_sync(self, limit: int) -> List[Tuple[str, List[float]]]:
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(QueryEmbedding.query_hash, QueryEmbedding.embedding)
+                .order_by(QueryEmbedding.last_used_at.desc())
+                .limit(limit)
+            ).all()
+        return [(row[0], list(map(float, row[1]))) for row in rows]
+
+    def _evict_sync(self, max_rows: int) -> int:
+        with self.session_factory() as db:
+            stale = (
+                select(QueryEmbedding.query_hash)
+                .order_by(QueryEmbedding.last_used_at.desc())
+                .offset(max_rows)
+                .scalar_subquery()
+            )
+            result = db.execute(
+                delete(QueryEmbedding).where(QueryEmbedding.query_hash.in_(stale))
+            )
+            db.commit()
+        return result.rowcount or 0
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def put(self, key: str, text: str, model: str, embedding: List[float]):
+        await asyncio.to_thread(self._put_sync, key, text, model, embedding)
+
+    async def touch(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            await asyncio.to_thread(self._touch_sync, keys)
+
+    async def prefetch(self, limit: int) -> List[Tuple[str, List[float]]]:
+        return await asyncio.to_thread(self._prefetch_sync, limit)
+
+    async def evict(self, max_rows: int) -> int:
+        """最終利用日時が古い順に max_rows を超えた分を削除"""
+        deleted = await asyncio.to_thread(self._evict_sync, max_rows)
+        if deleted:
+            logger.info(f"Evicted {deleted} query embeddings")
+        return deleted
@@ -0,0 +1,25 @@
+# backend/app/core/rank_fusion.py
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+# RRF の定数（Cormack et al. の推奨値）
+DEFAULT_RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    weights: Sequence[float],
+    k: int = DEFAULT_RRF_K
+) -> List[Tuple[Hashable, float]]:
+    """複数の順位リストを重み付き RRF で1つに統合
+
+    score(d) = Σ w_i / (k + rank_i(d))、rank は1始まり。
+    同点の場合は先に出現した（上位リストで上位の）ものを優先する。
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
@@ -0,0 +1,101 @@
+# backend/app/core/result_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.data_version import DataVersion
+from app.core.metrics import Counter
+
+
+def embedding_fingerprint(embedding: Sequence[float]) -> str:
+    """埋め込みベクトルのフィンガープリント（float32表現のハッシュ）"""
+    raw = np.asarray(embedding, dtype=np.float32).tobytes()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def make_result_key(
+    fingerprint: str,
+    region_filter: Optional[List[str]],
+    field_filter: Optional[List[str]],
+    limit: int,
+    min_similarity: float,
+    mode: str = "vector",
+    lexical_weight: float = 0.0
+) -> Tuple[Hashable, ...]:
+    """検索結果キャッシュのキー（フィルターは順序を無視する）"""
+    return (
+        fingerprint,
+        tuple(sorted(region_filter or [])),
+        tuple(sorted(field_filter or [])),
+        limit,
+        min_similarity,
+        mode,
+        lexical_weight if mode == "hybrid" else 0.0
+    )
+
+
+class SearchResultCache:
+    """検索結果のLRUキャッシュ
+
+    各エントリは保存時のデータバージョンを持ち、バージョンが進んだら無効になる。
+    """
+
+    def __init__(self, data_version: DataVersion, max_entries: int = 1024):
+        self.data_version = data_version
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = Counter("search_result_cache.hits")
+        self.misses = Counter("search_result_cache.misses")
+        self.invalidations = Counter("search_result_cache.invalidations")
+        data_version.subscribe(lambda _version: self.clear())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """キャッシュされた結果を取得（古いバージョンの結果は破棄）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != self.data_version.current:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses.inc()
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits.inc()
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """結果を現在のデータバージョンで保存"""
+        with self._lock:
+            self._entries[key] = (self.data_version.current, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """全エントリを破棄"""
+        with self._lock:
+            if self._entries:
+                self.invalidations.inc()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの統計情報"""
+        lookups = self.hits.value + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "data_version": self.data_version.current,
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "invalidations": self.invalidations.value,
+            "hit_ratio": round(self.hits.value / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,181 @@
+# backend/app/core/search_log_buffer.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.search_log_partitions import is_missing_partition_error, search_log_partitions
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import SearchLog
+
+logger = logging.getLogger(__name__)
+
+WriteFunction = Callable[[List[Dict]], Awaitable[None]]
+
+_BATCH_SIZE_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _ensure_partitions():
+    with SessionLocal() as db:
+        search_log_partitions.ensure(db)
+        db.commit()
+
+
+async def insert_search_logs(records: List[Dict]):
+    """検索ログを1回の複数行 INSERT で書き込む
+
+    パーティションの作成が遅れて範囲外の行があった場合は、その場で作成して1回だけ再試行する。
+    """
+    for attempt in range(2):
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(SearchLog).values(records))
+                await db.commit()
+            return
+        except DBAPIError as e:
+            if attempt or not is_missing_partition_error(e):
+                raise
+            logger.warning("search_logs partition missing, creating it before retrying")
+            await asyncio.to_thread(_ensure_partitions)
+
+
+class SearchLogBuffer:
+    """検索ログの write-behind バッファ
+
+    record() はDBを待たずに戻り、max_batch_size 件たまるか最初の1件から
+    flush_interval 秒経過した時点でまとめて書き込む。
+    DBが遅く未書き込みが max_pending 件を超えた分は破棄して数える。
+    """
+
+    def __init__(
+        self,
+        write_fn: WriteFunction = insert_search_logs,
+        max_batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000
+    ):
+        self.write_fn = write_fn
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._batch: List[Dict] = []  # 書き込み中（成功するまで保持）
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = metrics.counter("search_log.written")
+        self.dropped = metrics.counter("search_log.dropped")
+        self.failed_batches = metrics.counter("search_log.failed_batches")
+        self.batch_size = metrics.histogram("search_log.batch_size", _BATCH_SIZE_BUCKETS)
+        self.write_ms = metrics.histogram("search_log.write_ms")
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._batch)
+
+    def oldest_pending(self) -> Optional[datetime]:
+        """未書き込みの検索ログのうち最も古い記録時刻（無ければ None）
+
+        書き込みループはキューから順に取り出すため、書き込み中のバッチの先頭が最も古い。
+        """
+        if self._batch:
+            return self._batch[0]["timestamp"]
+        return None
+
+    def start(self):
+        """書き込みループを開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="search_log_writer")
+
+    def record(self, query: str, results_count: int, search_time_ms: float) -> bool:
+        """検索ログを追加（バッファが満杯なら破棄して False）
+
+        書き込みが遅れても検索時刻がずれないよう、時刻はここで記録する。
+        """
+        try:
+            self._queue.put_nowait({
+                "query": query,
+                "results_count": results_count,
+                "search_time_ms": search_time_ms,
+                "timestamp": datetime.now(timezone.utc)
+            })
+            return True
+        except asyncio.QueueFull:
+            self.dropped.inc()
+            return False
+
+    def _take_ready(self):
+        """待たずに取り出せる分をバッチに追加"""
+        while len(self._batch) < self.max_batch_size:
+            try:
+                self._batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _fill_batch(self):
+        """1件目を待ち、件数か時間のしきい値に達するまでバッチに追加"""
+        self._batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+
+        while len(self._batch) < self.max_batch_size:
+            self._take_ready()
+            remaining = deadline - loop.time()
+            if len(self._batch) >= self.max_batch_size or remaining <= 0:
+                return
+            try:
+                self._batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                return
+
+    async def _write_batch(self):
+        batch = self._batch
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.write_fn(batch)
+        except asyncio.CancelledError:
+            # バッチは保持したまま、停止時の書き出しで再試行する
+            raise
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} search logs: {e}")
+            self.failed_batches.inc()
+            self.dropped.inc(len(batch))
+        else:
+            self.written.inc(len(batch))
+            self.batch_size.observe(len(batch))
+        finally:
+            self.write_ms.observe((time.perf_counter() - started) * 1000)
+
+        self._batch = []
+
+    async def _run(self):
+        while True:
+            await self._fill_batch()
+            await self._write_batch()
+
+    async def close(self):
+        """書き込みループを止め、残っているログをすべて書き込む"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        while self._batch or not self._queue.empty():
+            self._take_ready()
+            await self._write_batch()
+
+
+# アプリケーション共通の検索ログバッファ
+search_log_buffer = SearchLogBuffer(
+    insert_search_logs,
+    max_batch_size=settings.SEARCH_LOG_BATCH_SIZE,
+    flush_interval=settings.SEARCH_LOG_FLUSH_SECONDS,
+    max_pending=settings.SEARCH_LOG_MAX_PENDING
+)
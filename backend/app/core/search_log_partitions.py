@@ -0,0 +1,237 @@
+# backend/app/core/search_log_partitions.py
+import argparse
+import logging
+import re
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateSequence, CreateTable
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.models import SearchLog
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME = re.compile(r"^search_logs_(\d{4})(\d{2})$")
+
+_IS_PARTITIONED_SQL = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass('search_logs')
+    )
+""")
+
+_PARTITIONS_SQL = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass('search_logs')
+""")
+
+# 親テーブルの排他ロックを長く待って検索ログの書き込みを止めないようにする
+_LOCK_TIMEOUT_SQL = text("SET LOCAL lock_timeout = '5s'")
+
+# パーティションの作成・削除を全ワーカーで1つずつ実行するためのロック（トランザクション終了まで保持）
+_DDL_LOCK_KEY = zlib.crc32(b"search_log_partitions")
+_DDL_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:key)")
+
+# パーティション化前の search_logs の移行（移行中は旧テーブルをこの名前に変更しておく）
+_LEGACY_TABLE = "search_logs_unpartitioned"
+
+_TABLE_EXISTS_SQL = text("SELECT to_regclass('search_logs') IS NOT NULL")
+
+_LEGACY_INDEXES_SQL = text("""
+    SELECT indexname FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = :table
+""")
+
+_LEGACY_OLDEST_SQL = text(f"SELECT min(timestamp) FROM {_LEGACY_TABLE}")
+
+_COPY_LEGACY_SQL = text(f"""
+    INSERT INTO search_logs (id, query, results_count, search_time_ms, timestamp)
+    SELECT id, query, results_count, search_time_ms, timestamp
+    FROM {_LEGACY_TABLE}
+    WHERE timestamp IS NOT NULL
+""")
+
+# 旧テーブルの SERIAL と同じシーケンスを使い続ける（無かった場合も採番が重複しないようにする）
+_RESET_SEQUENCE_SQL = text(
+    "SELECT setval('search_logs_id_seq', (SELECT COALESCE(max(id), 0) + 1 FROM search_logs), false)"
+)
+
+# 範囲に合うパーティションが無い行を INSERT したときのエラー
+_NO_PARTITION_MESSAGE = "no partition of relation"
+
+
+def month_start(moment: datetime, tz: ZoneInfo) -> datetime:
+    """moment が属する月（tz の日付）の開始時刻"""
+    local = moment.astimezone(tz)
+    return datetime(local.year, local.month, 1, tzinfo=tz)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    """月初の時刻から months か月後の月初"""
+    index = start.year * 12 + start.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=start.tzinfo)
+
+
+def partition_name(start: datetime) -> str:
+    return f"search_logs_{start:%Y%m}"
+
+
+def partition_bounds(name: str, tz: ZoneInfo) -> Optional[Tuple[datetime, datetime]]:
+    """パーティション名から範囲 [開始, 終了) を求める（命名規則に合わなければ None）"""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=tz)
+    return start, add_months(start, 1)
+
+
+class SearchLogPartitions:
+    """search_logs の月別レンジパーティションの作成と削除
+
+    当月から months_ahead か月先までのパーティションを事前に作成し、
+    保持期間を過ぎたパーティションは行を削除せずテーブルごと DROP する。
+    インデックスは親テーブルに定義してあるため、新しいパーティションにも自動で作られる。
+    DDL を実行するため、テーブル所有者の接続で実行すること。
+    パーティション化前から存在する search_logs は migrate（このモジュールの CLI）で移行する。
+    ensure・drop_before はコミットしない（呼び出し側のトランザクションでコミットする）。
+    """
+
+    def __init__(
+        self,
+        timezone_name: str = "Asia/Tokyo",
+        months_ahead: int = 2,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    ):
+        self.tz = ZoneInfo(timezone_name)
+        self.months_ahead = months_ahead
+        self.clock = clock
+
+        self.created = metrics.counter("search_log.partitions_created")
+        self.dropped = metrics.counter("search_log.partitions_dropped")
+
+    def is_partitioned(self, db: Session) -> bool:
+        return bool(db.execute(_IS_PARTITIONED_SQL).scalar())
+
+    def partitions(self, db: Session) -> List[Tuple[str, datetime, datetime]]:
+        """月別パーティションの (名前, 開始, 終了)（開始時刻順）"""
+        partitions = []
+        for (name,) in db.execute(_PARTITIONS_SQL):
+            bounds = partition_bounds(name, self.tz)
+            if bounds is not None:
+                partitions.append((name, *bounds))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def _lock(self, db: Session):
+        """DDL 用のロックを取得（他のワーカーの作成・削除が終わるまで待つ）"""
+        db.execute(_LOCK_TIMEOUT_SQL)
+        db.execute(_DDL_LOCK_SQL, {"key": _DDL_LOCK_KEY})
+
+    def ensure(self, db: Session, since: Optional[datetime] = None) -> List[str]:
+        """当月（since があればその月）から months_ahead か月先までの不足しているパーティションを作成"""
+        # ロック取得後に一覧を読み、待っている間に他のワーカーが作成した分は作らない
+        self._lock(db)
+        existing = {name for name, _, _ in self.partitions(db)}
+        current = month_start(self.clock(), self.tz)
+        start = current if since is None else min(month_start(since, self.tz), current)
+        last = add_months(current, self.months_ahead)
+        created = []
+
+        while start <= last:
+            name = partition_name(start)
+            end = add_months(start, 1)
+            if name not in existing:
+                # 名前と範囲はこのモジュールで組み立てた値だけを埋め込む
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF search_logs "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                created.append(name)
+            start = end
+
+        if created:
+            self.created.inc(len(created))
+            logger.info(f"Created search_logs partitions: {', '.join(created)}")
+        return created
+
+    def drop_before(self, db: Session, cutoff: datetime) -> List[str]:
+        """範囲がすべて cutoff より前のパーティションを削除"""
+        expired = [name for name, _, end in self.partitions(db) if end <= cutoff]
+        if not expired:
+            return []
+
+        self._lock(db)
+        for name in expired:
+            db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+        self.dropped.inc(len(expired))
+        logger.info(f"Dropped search_logs partitions: {', '.join(expired)}")
+        return expired
+
+
+    def migrate(self, db: Session) -> Optional[int]:
+        """パーティション化されていない既存の search_logs を月別パーティションのテーブルに移行
+
+        旧テーブルを改名して親テーブルとパーティションを作り直し、行をコピーしてから旧テーブルを削除する。
+        コピーが終わるまで旧テーブルへの書き込みは待たされる。コミットしない。
+        移行した行数を返す（移行が不要なら None）。
+        """
+        self._lock(db)
+        if self.is_partitioned(db) or not db.execute(_TABLE_EXISTS_SQL).scalar():
+            return None
+
+        db.execute(text("LOCK TABLE search_logs IN ACCESS EXCLUSIVE MODE"))
+        db.execute(text(f"ALTER TABLE search_logs RENAME TO {_LEGACY_TABLE}"))
+        # 旧テーブルの削除でシーケンスが消えないようにする
+        db.execute(text("ALTER SEQUENCE IF EXISTS search_logs_id_seq OWNED BY NONE"))
+        # 主キー・インデックス名が新しい親テーブルと重ならないように改名
+        legacy_indexes = db.execute(_LEGACY_INDEXES_SQL, {"table": _LEGACY_TABLE}).fetchall()
+        for (index,) in legacy_indexes:
+            db.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index[:50]}_unpartitioned"'))
+
+        table = SearchLog.__table__
+        db.execute(CreateSequence(table.c.id.default, if_not_exists=True))
+        db.execute(CreateTable(table))
+        self.ensure(db, since=db.execute(_LEGACY_OLDEST_SQL).scalar())
+
+        copied = db.execute(_COPY_LEGACY_SQL).rowcount
+        db.execute(_RESET_SEQUENCE_SQL)
+        db.execute(text(f"DROP TABLE {_LEGACY_TABLE}"))
+        logger.info(f"Migrated {copied} search logs to the partitioned search_logs table")
+        return copied
+
+
+def is_missing_partition_error(error: Exception) -> bool:
+    """INSERT した行の範囲のパーティションが無いことによるエラーか"""
+    return _NO_PARTITION_MESSAGE in str(error)
+
+
+# アプリケーション共通の検索ログパーティション管理
+search_log_partitions = SearchLogPartitions(
+    timezone_name=settings.SEARCH_STATS_TIMEZONE,
+    months_ahead=settings.SEARCH_LOG_PARTITION_MONTHS_AHEAD
+)
+
+
+def main():
+    """パーティション化されていない既存の search_logs を月別パーティションのテーブルに移行"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.parse_args()
+
+    with SessionLocal() as db:
+        copied = search_log_partitions.migrate(db)
+        db.commit()
+
+    print("search_logs is already partitioned" if copied is None else f"Migrated {copied} search logs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+# backend/app/core/search_stats.py
+import asyncio
+import json
+import logging
+import math
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.search_log_buffer import search_log_buffer
+from app.core.search_log_partitions import SearchLogPartitions, search_log_partitions
+from app.database import AnySession, fetch_all
+
+logger = logging.getLogger(__name__)
+
+# 複数ワーカーが同時に集計しないためのアドバイザリロックのキー
+_ADVISORY_LOCK_KEY = zlib.crc32(b"search_stats_rollup")
+
+# 分位点の相対誤差（1%）
+LATENCY_SKETCH_ACCURACY = 0.01
+
+# これより小さい検索時間（ミリ秒）は同じバケットに数える
+LATENCY_SKETCH_MIN_VALUE = 0.01
+
+_HOUR = timedelta(hours=1)
+
+# 確定後に遅れて書き込まれた検索ログを探す範囲（確定済みの最後の時間帯から遡る）
+_LATE_LOOKBACK = timedelta(days=1)
+
+# 時間帯の区切りはセッションの TimeZone 設定によらず UTC で求める
+_HOUR_BUCKET = "date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"
+
+_ROLLUP_COLUMNS = """
+    bucket_start, search_count, results_sum, latency_count, latency_sum,
+    latency_min, latency_max, latency_sketch::text AS latency_sketch
+"""
+
+# 確定済みの最後の時間帯（以降を生ログから集計する）
+_WATERMARK_SQL = text("SELECT max(bucket_start) FROM search_stats_hourly WHERE finalized")
+
+_FIRST_LOG_HOUR_SQL = text(
+    "SELECT date_trunc('hour', min(timestamp) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' FROM search_logs"
+)
+
+_HOURLY_TOTALS_SQL = text(f"""
+    SELECT
+        {_HOUR_BUCKET} AS bucket_start,
+        count(*) AS search_count,
+        coalesce(sum(results_count), 0) AS results_sum,
+        count(search_time_ms) AS latency_count,
+        coalesce(sum(search_time_ms), 0) AS latency_sum,
+        min(search_time_ms) AS latency_min,
+        max(search_time_ms) AS latency_max
+    FROM search_logs
+    WHERE timestamp >= :start AND timestamp < :end
+    GROUP BY 1
+""")
+
+# スケッチのバケットごとの件数はDB側で数え、生の検索時間は転送しない
+_HOURLY_SKETCH_SQL = text(f"""
+    SELECT
+        {_HOUR_BUCKET} AS bucket_start,
+        CEIL(LN(GREATEST(search_time_ms, :min_value)) / :log_gamma)::int AS key,
+        count(*) AS count
+    FROM search_logs
+    WHERE timestamp >= :start AND timestamp < :end
+    AND search_time_ms IS NOT NULL
+    GROUP BY 1, 2
+""")
+
+# 確定済みの時間帯のうち、確定時より生ログが増えた（バッファから遅れて書き込まれた）もの
+_LATE_HOURS_SQL = text(f"""
+    SELECT logs.bucket_start, logs.search_count - hourly.search_count AS late_count
+    FROM (
+        SELECT {_HOUR_BUCKET} AS bucket_start, count(*) AS search_count
+        FROM search_logs
+        WHERE timestamp >= :start AND timestamp < :end
+        GROUP BY 1
+    ) logs
+    JOIN search_stats_hourly hourly ON hourly.bucket_start = logs.bucket_start
+    WHERE hourly.finalized AND logs.search_count > hourly.search_count
+""")
+
+_HOURLY_RANGE_SQL = text(f"""
+    SELECT {_ROLLUP_COLUMNS}
+    FROM search_stats_hourly
+    WHERE bucket_start >= :start AND bucket_start < :end
+""")
+
+_DAILY_ALL_SQL = text(f"SELECT {_ROLLUP_COLUMNS} FROM search_stats_daily")
+
+_UPSERT_SET = """
+    search_count = EXCLUDED.search_count,
+    results_sum = EXCLUDED.results_sum,
+    latency_count = EXCLUDED.latency_count,
+    latency_sum = EXCLUDED.latency_sum,
+    latency_min = EXCLUDED.latency_min,
+    latency_max = EXCLUDED.latency_max,
+    latency_sketch = EXCLUDED.latency_sketch,
+    updated_at = now()
+"""
+
+_UPSERT_HOURLY_SQL = text(f"""
+    INSERT INTO search_stats_hourly (
+        bucket_start, search_count, results_sum, latency_count, latency_sum,
+        latency_min, latency_max, latency_sketch, finalized, updated_at
+    )
+    VALUES (
+        :bucket_start, :search_count, :results_sum, :latency_count, :latency_sum,
+        :latency_min, :latency_max, CAST(:latency_sketch AS jsonb), :finalized, now()
+    )
+    ON CONFLICT (bucket_start) DO UPDATE SET
+        {_UPSERT_SET},
+        finalized = EXCLUDED.finalized
+""")
+
+_UPSERT_DAILY_SQL = text(f"""
+    INSERT INTO search_stats_daily (
+        bucket_start, search_count, results_sum, latency_count, latency_sum,
+        latency_min, latency_max, latency_sketch, updated_at
+    )
+    VALUES (
+        :bucket_start, :search_count, :results_sum, :latency_count, :latency_sum,
+        :latency_min, :latency_max, CAST(:latency_sketch AS jsonb), now()
+    )
+    ON CONFLICT (bucket_start) DO UPDATE SET
+        {_UPSERT_SET}
+""")
+
+# パーティション化されていない search_logs の場合の削除
+_PRUNE_SQL = text("DELETE FROM search_logs WHERE timestamp < :cutoff")
+
+
+class LatencySketch:
+    """マージ可能な対数バケットの分位点スケッチ（DDSketch 方式）
+
+    値 x をバケット ceil(log_γ x) に数え、分位点を相対誤差 accuracy 以内で返す。
+    バケットごとの件数を足すだけでマージできるため、時間別の集計から
+    日別・全期間の分位点を生ログなしで求められる。
+    """
+
+    def __init__(self, accuracy: float = LATENCY_SKETCH_ACCURACY, counts: Optional[Dict[int, int]] = None):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts: Dict[int, int] = dict(counts or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def key(self, value: float) -> int:
+        return math.ceil(math.log(max(value, LATENCY_SKETCH_MIN_VALUE)) / self.log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        key = self.key(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+
+    def merge(self, other: "LatencySketch"):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 分位点（空なら None）"""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        cumulative = 0
+        for key in sorted(self.counts):
+            cumulative += self.counts[key]
+            if cumulative > rank:
+                break
+        # バケット (γ^(key-1), γ^key] の代表値
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({str(key): count for key, count in sorted(self.counts.items())})
+
+    @classmethod
+    def from_json(cls, data: str) -> "LatencySketch":
+        return cls(counts={int(key): int(count) for key, count in json.loads(data or "{}").items()})
+
+
+def merge_rollups(rows: Iterable) -> Dict:
+    """集計行をマージ（件数・合計は加算、最小・最大は比較、スケッチはバケットごとに加算）"""
+    merged = {
+        "search_count": 0,
+        "results_sum": 0,
+        "latency_count": 0,
+        "latency_sum": 0.0,
+        "latency_min": None,
+        "latency_max": None,
+        "latency_sketch": LatencySketch()
+    }
+    for row in rows:
+        merged["search_count"] += row.search_count
+        merged["results_sum"] += row.results_sum
+        merged["latency_count"] += row.latency_count
+        merged["latency_sum"] += row.latency_sum
+        if row.latency_min is not None and (merged["latency_min"] is None or row.latency_min < merged["latency_min"]):
+            merged["latency_min"] = row.latency_min
+        if row.latency_max is not None and (merged["latency_max"] is None or row.latency_max > merged["latency_max"]):
+            merged["latency_max"] = row.latency_max
+        merged["latency_sketch"].merge(LatencySketch.from_json(row.latency_sketch))
+    return merged
+
+
+def summarize(rollup: Dict) -> Dict:
+    """マージ済みの集計を統計APIの形式に変換"""
+    searches = rollup["search_count"]
+    timed = rollup["latency_count"]
+    sketch = rollup["latency_sketch"]
+
+    def _quantile(q: float) -> float:
+        return round(sketch.quantile(q) or 0, 2)
+
+    return {
+        "total_searches": searches,
+        "average_results_per_search": round(rollup["results_sum"] / searches, 2) if searches else 0,
+        "average_search_time_ms": round(rollup["latency_sum"] / timed, 2) if timed else 0,
+        "p50_search_time_ms": _quantile(0.5),
+        "p95_search_time_ms": _quantile(0.95),
+        "p99_search_time_ms": _quantile(0.99)
+    }
+
+
+def day_start(bucket_start: datetime, tz: ZoneInfo) -> datetime:
+    """時間帯が属する日（tz の日付）の開始時刻"""
+    local = bucket_start.astimezone(tz)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _record(bucket_start: datetime, rollup: Dict) -> Dict:
+    return {
+        "bucket_start": bucket_start,
+        "search_count": rollup["search_count"],
+        "results_sum": rollup["results_sum"],
+        "latency_count": rollup["latency_count"],
+        "latency_sum": rollup["latency_sum"],
+        "latency_min": rollup["latency_min"],
+        "latency_max": rollup["latency_max"],
+        "latency_sketch": rollup["latency_sketch"].to_json()
+    }
+
+
+class SearchStatsRollup:
+    """検索ログの時間別・日別集計
+
+    未確定の時間帯を生ログから集計し直して search_stats_hourly に書き、
+    その時間帯を含む日の時間別集計をマージして search_stats_daily に書く。
+    時間帯の終了から finalize_delay 秒経った集計は確定とし、以降は生ログを読まない。
+    ただし write-behind バッファに未書き込みのログが残っている時間帯は確定しない
+    （他のワーカーのバッファから確定後に届いたログは、直近の確定済み時間帯を集計し直して数える）。
+    確定済みの時間帯の生ログは保持期間を過ぎたら削除する。
+    """
+
+    def __init__(
+        self,
+        finalize_delay: float = 300.0,
+        timezone_name: str = "Asia/Tokyo",
+        retention_days: int = 30,
+        partitions: Optional[SearchLogPartitions] = None,
+        pending_since: Callable[[], Optional[datetime]] = lambda: None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    ):
+        self.finalize_delay = timedelta(seconds=finalize_delay)
+        self.tz = ZoneInfo(timezone_name)
+        self.retention = timedelta(days=retention_days)
+        self.partitions = partitions or SearchLogPartitions(timezone_name, clock=clock)
+        self.pending_since = pending_since
+        self.clock = clock
+
+        self.hours_rolled_up = metrics.counter("search_stats.hours_rolled_up")
+        self.logs_pruned = metrics.counter("search_stats.logs_pruned")
+        self.late_logs = metrics.counter("search_stats.late_logs")
+        self.rollup_ms = metrics.histogram("search_stats.rollup_ms")
+        self._unpartitioned_warned = False
+
+    def _hourly_records(self, db: Session, start: datetime, end: datetime, finalize_before: datetime) -> List[Dict]:
+        params = {"start": start, "end": end}
+        sketches: Dict[datetime, LatencySketch] = defaultdict(LatencySketch)
+        sketch_params = {
+            **params,
+            "min_value": LATENCY_SKETCH_MIN_VALUE,
+            "log_gamma": LatencySketch().log_gamma
+        }
+        for row in db.execute(_HOURLY_SKETCH_SQL, sketch_params):
+            sketches[row.bucket_start].counts[row.key] = row.count
+
+        records = []
+        for row in db.execute(_HOURLY_TOTALS_SQL, params):
+            record = _record(row.bucket_start, {
+                "search_count": row.search_count,
+                "results_sum": row.results_sum,
+                "latency_count": row.latency_count,
+                "latency_sum": float(row.latency_sum),
+                "latency_min": row.latency_min,
+                "latency_max": row.latency_max,
+                "latency_sketch": sketches[row.bucket_start]
+            })
+            record["finalized"] = row.bucket_start + _HOUR <= finalize_before
+            records.append(record)
+        return records
+
+    def _finalize_before(self, now: datetime, oldest_pending: Optional[datetime]) -> datetime:
+        """この時刻までに終わる時間帯を確定する（未書き込みのログがあればその時刻まで）"""
+        finalize_before = now - self.finalize_delay
+        if oldest_pending is not None:
+            finalize_before = min(finalize_before, oldest_pending)
+        return finalize_before
+
+    def _late_records(self, db: Session, watermark: datetime) -> List[Dict]:
+        """確定後に生ログが増えた時間帯を集計し直す（遅れて届いた件数は late_logs に数える）"""
+        end = watermark + _HOUR
+        records = []
+        for row in db.execute(_LATE_HOURS_SQL, {"start": end - _LATE_LOOKBACK, "end": end}).fetchall():
+            self.late_logs.inc(row.late_count)
+            logger.warning(f"{row.late_count} search logs arrived after {row.bucket_start} was finalized")
+            records.extend(self._hourly_records(db, row.bucket_start, row.bucket_start + _HOUR, end))
+        return records
+
+    def _daily_records(self, db: Session, hours: Iterable[datetime]) -> List[Dict]:
+        days = sorted({day_start(hour, self.tz) for hour in hours})
+        if not days:
+            return []
+        rows = db.execute(_HOURLY_RANGE_SQL, {
+            "start": days[0],
+            "end": days[-1] + timedelta(days=1)
+        }).fetchall()
+
+        by_day = defaultdict(list)
+        for row in rows:
+            by_day[day_start(row.bucket_start, self.tz)].append(row)
+        return [_record(day, merge_rollups(by_day[day])) for day in days if by_day[day]]
+
+    def rollup(self, db: Session, oldest_pending: Optional[datetime] = None) -> int:
+        """未確定の時間帯と、それを含む日の集計を更新し、生ログを削除（他ワーカーが実行中なら何もしない）
+
+        oldest_pending はこのワーカーのバッファに残っている最も古い検索ログの時刻。
+        """
+        started = time.perf_counter()
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": _ADVISORY_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            db.rollback()
+            return 0
+
+        watermark = db.execute(_WATERMARK_SQL).scalar()
+        start = watermark + _HOUR if watermark is not None else db.execute(_FIRST_LOG_HOUR_SQL).scalar()
+
+        now = self.clock()
+        hourly = self._late_records(db, watermark) if watermark is not None else []
+        if start is not None:
+            hourly.extend(self._hourly_records(db, start, now, self._finalize_before(now, oldest_pending)))
+        if hourly:
+            db.execute(_UPSERT_HOURLY_SQL, hourly)
+            daily = self._daily_records(db, [record["bucket_start"] for record in hourly])
+            if daily:
+                db.execute(_UPSERT_DAILY_SQL, daily)
+
+        # パーティションの作成・削除もロックを取得したワーカーだけが同じトランザクションで行う
+        self.prune(db)
+        db.commit()
+
+        self.hours_rolled_up.inc(len(hourly))
+        self.rollup_ms.observe((time.perf_counter() - started) * 1000)
+        return len(hourly)
+
+    def prune_cutoff(self, db: Session) -> Optional[datetime]:
+        """生ログを削除してよい時刻（保持期間を過ぎ、かつ集計が確定した時間帯の終わりまで）"""
+        watermark = db.execute(_WATERMARK_SQL).scalar()
+        if watermark is None:
+            return None
+        return min(self.clock() - self.retention, watermark + _HOUR)
+
+    def prune(self, db: Session) -> int:
+        """保持期間を過ぎた確定済みの生ログを削除（rollup のロック内で呼ばれ、コミットは呼び出し側）
+
+        search_logs が月別パーティションの場合は不足分のパーティションを作成し、
+        範囲がすべて削除対象のパーティションを DROP する（削除数はパーティション数）。
+        """
+        partitioned = self.partitions.is_partitioned(db)
+        if partitioned:
+            self.partitions.ensure(db)
+        elif not self._unpartitioned_warned:
+            self._unpartitioned_warned = True
+            logger.warning(
+                "search_logs is not partitioned; expired logs are deleted row by row. "
+                "Run `python -m app.core.search_log_partitions` to migrate it."
+            )
+
+        cutoff = self.prune_cutoff(db)
+        if cutoff is None:
+            return 0
+        if partitioned:
+            return len(self.partitions.drop_before(db, cutoff))
+
+        deleted = db.execute(_PRUNE_SQL, {"cutoff": cutoff}).rowcount
+        if deleted:
+            self.logs_pruned.inc(deleted)
+            logger.info(f"Pruned {deleted} search logs older than {self.retention.days} days")
+        return deleted
+
+    async def run(self, session_factory: Callable[[], Session]) -> int:
+        """集計と生ログの削除をスレッドプールで実行"""
+        # バッファはイベントループ上で読む
+        oldest_pending = self.pending_since()
+
+        def _run():
+            with session_factory() as db:
+                return self.rollup(db, oldest_pending)
+
+        return await asyncio.to_thread(_run)
+
+
+async def read_summary(db: AnySession) -> Dict:
+    """日別集計から全期間の検索統計を求める（生ログは読まない）"""
+    return summarize(merge_rollups(await fetch_all(db, _DAILY_ALL_SQL)))
+
+
+async def read_recent_summary(db: AnySession, hours: int = 24) -> Dict:
+    """時間別集計から直近 hours 時間の検索統計を求める"""
+    now = datetime.now(timezone.utc)
+    rows = await fetch_all(db, _HOURLY_RANGE_SQL, {
+        "start": now.replace(minute=0, second=0, microsecond=0) - _HOUR * (hours - 1),
+        "end": now + _HOUR
+    })
+    return summarize(merge_rollups(rows))
+
+
+# アプリケーション共通の検索統計集計
+search_stats_rollup = SearchStatsRollup(
+    finalize_delay=settings.SEARCH_STATS_FINALIZE_DELAY_SECONDS,
+    timezone_name=settings.SEARCH_STATS_TIMEZONE,
+    retention_days=settings.SEARCH_LOG_RETENTION_DAYS,
+    partitions=search_log_partitions,
+    pending_since=search_log_buffer.oldest_pending
+)
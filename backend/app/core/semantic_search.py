@@ -1,46 +1,392 @@
 # backend/app/core/semantic_search.py
-import openai
+import asyncio
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 import logging
 import time
+import zlib
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.config import settings
+from app.core import lab_neighbors
+from app.core.embedding_client import EmbeddingProvider, EmbeddingProviderError, create_default_provider
+from app.core.embedding_batcher import EmbeddingBatcher
+from app.core.embedding_cache import EmbeddingCache, create_store, make_cache_key, normalize_query
+from app.core.metrics import metrics
+from app.core.data_version import data_version
+from app.core.rank_fusion import reciprocal_rank_fusion
+from app.core.result_cache import SearchResultCache, embedding_fingerprint, make_result_key
+from app.core.serialization import search_result_dict
+from app.core.vector_index import VectorIndex
+from app.core.vector_snapshot import SnapshotStore
+from app.database import AnySession, SessionLocal, execute, fetch_all
 from app.models import ResearchLab, University
 from app.schemas import ResearchLabSearchResult
 
 logger = logging.getLogger(__name__)
 
-# OpenAI クライアント初期化
-openai.api_key = settings.OPENAI_API_KEY
+def shorten_embedding(embedding: Sequence[float], dimension: int) -> List[float]:
+    """先頭 dimension 次元を切り出して再正規化（text-embedding-3 の dimensions 指定と同等）"""
+    short = np.asarray(embedding[:dimension], dtype=np.float32)
+    norm = np.linalg.norm(short)
+    if norm > 0:
+        short = short / norm
+    return short.tolist()
+
+
+# インメモリインデックスで選んだ研究室IDを、スコア順を保ったまま詳細情報に展開する
+_HYDRATE_SQL = text("""
+    SELECT 
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        hit.score as similarity_score
+    FROM unnest(CAST(:ids AS integer[]), CAST(:scores AS double precision[]))
+        WITH ORDINALITY AS hit(id, score, rank)
+    JOIN research_labs rl ON rl.id = hit.id
+    JOIN universities u ON rl.university_id = u.id
+    ORDER BY hit.rank
+""")
+
+# ハイブリッド検索で各方式から取得する候補数（limit の倍数）
+_HYBRID_CANDIDATE_FACTOR = 2
+
+# 語句検索でヒットとみなす単語類似度（pg_trgm の word_similarity）の下限
+_MIN_WORD_SIMILARITY = 0.3
+
+# 語句一致検索（pg_trgm の GIN インデックス idx_research_labs_lexical_trgm と同じ式を <% で絞り込む）
+_LEXICAL_SQL = """
+    SELECT 
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        word_similarity(
+            :query,
+            rl.name || ' ' || rl.research_theme || ' ' || rl.research_content || ' ' || COALESCE(rl.keywords, '')
+        ) as similarity_score
+    FROM research_labs rl
+    JOIN universities u ON rl.university_id = u.id
+    WHERE :query <% (rl.name || ' ' || rl.research_theme || ' ' || rl.research_content || ' ' || COALESCE(rl.keywords, ''))
+"""
+
+# <% の閾値（トランザクション内だけ変更する）
+_WORD_SIMILARITY_THRESHOLD_SQL = text(
+    f"SET LOCAL pg_trgm.word_similarity_threshold = {_MIN_WORD_SIMILARITY}"
+)
+
+# 事前計算した類似研究室（lab_neighbors の主キーで1回の索引検索）
+_NEIGHBOR_LOOKUP_SQL = text("""
+    SELECT 
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        n.similarity as similarity_score
+    FROM lab_neighbors n
+    JOIN research_labs rl ON rl.id = n.neighbor_id
+    JOIN universities u ON rl.university_id = u.id
+    WHERE n.lab_id = :target_id
+    ORDER BY n.rank
+    LIMIT :limit
+""")
+
+# 指定研究室と類似する研究室（pgvector版、対象の埋め込みは1回だけ評価する）
+_SIMILAR_LABS_SQL = text("""
+    SELECT 
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        1 - nearest.distance as similarity_score
+    FROM (
+        SELECT
+            id,
+            university_id,
+            embedding <=> (
+                SELECT embedding 
+                FROM research_labs 
+                WHERE id = :target_id
+            ) AS distance
+        FROM research_labs
+        WHERE id != :target_id 
+        AND embedding IS NOT NULL
+        ORDER BY distance
+        LIMIT :limit
+    ) nearest
+    JOIN research_labs rl ON rl.id = nearest.id
+    JOIN universities u ON rl.university_id = u.id
+    ORDER BY nearest.distance
+""")
+
+# 一括取得する研究室の存在と埋め込みの有無
+_BATCH_TARGETS_SQL = text("""
+    SELECT id, embedding IS NOT NULL AS has_embedding
+    FROM research_labs
+    WHERE id = ANY(CAST(:target_ids AS integer[]))
+""")
+
+# 複数研究室の近傍を近傍テーブルから1回で取得
+_NEIGHBOR_BATCH_SQL = text("""
+    SELECT 
+        n.lab_id as target_id,
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        n.similarity as similarity_score
+    FROM lab_neighbors n
+    JOIN research_labs rl ON rl.id = n.neighbor_id
+    JOIN universities u ON rl.university_id = u.id
+    WHERE n.lab_id = ANY(CAST(:target_ids AS integer[]))
+    AND n.rank <= :max_rank
+    AND n.neighbor_id != ALL(CAST(:exclude_ids AS integer[]))
+    ORDER BY n.lab_id, n.rank
+""")
+
+# 複数研究室の近傍を LATERAL で1回のクエリで計算（pgvector版）
+_SIMILAR_BATCH_SQL = text("""
+    SELECT 
+        t.id as target_id,
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        1 - nearest.distance as similarity_score
+    FROM research_labs t
+    CROSS JOIN LATERAL (
+        SELECT
+            c.id,
+            c.embedding <=> t.embedding AS distance
+        FROM research_labs c
+        WHERE c.id != t.id
+        AND c.embedding IS NOT NULL
+        AND c.id != ALL(CAST(:exclude_ids AS integer[]))
+        ORDER BY distance
+        LIMIT :limit
+    ) nearest
+    JOIN research_labs rl ON rl.id = nearest.id
+    JOIN universities u ON rl.university_id = u.id
+    WHERE t.id = ANY(CAST(:target_ids AS integer[]))
+    AND t.embedding IS NOT NULL
+    ORDER BY t.id, nearest.distance
+""")
+
+# (対象研究室ID, 研究室ID, 類似度) の組を検索結果行に展開（順序は維持）
+_HYDRATE_PAIRS_SQL = text("""
+    SELECT 
+        hit.target_id,
+        rl.id,
+        rl.name,
+        rl.professor_name,
+        rl.department,
+        rl.research_theme,
+        rl.research_content,
+        rl.research_field,
+        rl.speciality,
+        rl.keywords,
+        rl.lab_url,
+        u.name as university_name,
+        u.prefecture,
+        u.region,
+        hit.score as similarity_score
+    FROM unnest(
+        CAST(:target_ids AS integer[]),
+        CAST(:ids AS integer[]),
+        CAST(:scores AS double precision[])
+    ) WITH ORDINALITY AS hit(target_id, id, score, rank)
+    JOIN research_labs rl ON rl.id = hit.id
+    JOIN universities u ON rl.university_id = u.id
+    ORDER BY hit.rank
+""")
+
+
+# 短縮埋め込みの補完を全ワーカーで1つだけ実行するためのロック
+_BACKFILL_LOCK_KEY = zlib.crc32(b"short_embedding_backfill")
+
+# updated_at も更新し、他ワーカーのフィンガープリント比較で変更を検出できるようにする
+# pgvector の hnsw.ef_search の上限
+_HNSW_EF_SEARCH_MAX = 1000
+
+_BACKFILL_SHORT_SQL = text("""
+    UPDATE research_labs
+    SET embedding_short = :embedding_short, updated_at = CURRENT_TIMESTAMP
+    WHERE id = :id
+""")
 
 
 class SemanticSearchEngine:
     """セマンティック検索エンジン"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        provider: Optional[EmbeddingProvider] = None,
+        cache: Optional[EmbeddingCache] = None
+    ):
         self.model = settings.OPENAI_MODEL
         self.dimension = settings.EMBEDDING_DIMENSION
+        self.short_dimension = settings.EMBEDDING_SHORT_DIMENSION
+        self.provider = provider or create_default_provider()
+        self.cache = cache or EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            store=create_store(
+                settings.EMBEDDING_CACHE_STORE,
+                settings.EMBEDDING_CACHE_FILE_PATH,
+                settings.EMBEDDING_CACHE_TTL_SECONDS
+            )
+        )
+        # 同時リクエストを1回のAPI呼び出しにまとめる（プロバイダー差し替えにも追従）
+        self.batcher = EmbeddingBatcher(
+            lambda texts: self.provider.embed(texts, self.model),
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+        ) if settings.EMBEDDING_BATCH_ENABLED else None
+        # 同一条件の検索結果キャッシュ（研究室データ更新で無効化）
+        self.result_cache = SearchResultCache(
+            data_version,
+            max_entries=settings.SEARCH_RESULT_CACHE_MAX_ENTRIES
+        )
+        # VECTOR_SEARCH_BACKEND=memory の場合はプロセス内インデックスで検索する
+        self.vector_index = VectorIndex(
+            data_version,
+            snapshots=SnapshotStore(settings.VECTOR_SNAPSHOT_DIR) if settings.VECTOR_SNAPSHOT_DIR else None,
+            quantization=settings.VECTOR_QUANTIZATION,
+            rerank_factor=settings.VECTOR_RERANK_FACTOR
+        ) if settings.VECTOR_SEARCH_BACKEND == "memory" else None
+        self.session_factory = SessionLocal
+        self.lexical_fallbacks = metrics.counter("search.lexical_fallbacks")
+        self._index_refresh: Optional[asyncio.Task] = None
+    
+    def set_provider(self, provider: EmbeddingProvider):
+        """埋め込みプロバイダーを差し替え（テスト・ベンチマーク用）"""
+        self.provider = provider
+    
+    async def load_vector_index(self):
+        """インメモリインデックスを構築（pgvectorバックエンドでは何もしない）"""
+        if self.vector_index is not None:
+            await self.vector_index.refresh(self.session_factory, force=True)
+    
+    async def _ensure_vector_index(self) -> VectorIndex:
+        """未構築なら構築を待ち、古い場合は現在の中身で応答しつつ裏で再構築する"""
+        index = self.vector_index
+        if not index.loaded:
+            await index.refresh(self.session_factory)
+        elif index.stale and (self._index_refresh is None or self._index_refresh.done()):
+            self._index_refresh = asyncio.create_task(index.refresh(self.session_factory))
+        return index
     
-    async def get_embedding(self, text: str) -> List[float]:
-        """テキストの埋め込みベクトルを取得"""
+    async def refresh_lab_neighbors(self) -> int:
+        """変更された研究室の近傍リストをスレッドプールで更新
+        
+        全体の再構築が必要な場合は、メモリを大きく使うため別プロセスで実行する。
+        """
+        if not settings.LAB_NEIGHBORS_ENABLED:
+            return 0
+        
+        def _refresh():
+            with self.session_factory() as db:
+                return lab_neighbors.refresh_if_stale(db, settings.LAB_NEIGHBORS_TOP_N, rebuild=False)
+        
+        refreshed = await asyncio.to_thread(_refresh)
+        if refreshed is None:
+            await lab_neighbors.rebuild_in_subprocess()
+            return 0
+        return refreshed
+    
+    async def close(self):
+        """プロバイダーの接続とキャッシュの永続層を解放"""
+        if self._index_refresh is not None:
+            self._index_refresh.cancel()
+        if self.batcher is not None:
+            await self.batcher.close()
+        await self.provider.aclose()
+        await self.cache.close()
+    
+    async def get_embedding(self, text: str, use_cache: bool = True) -> List[float]:
+        """テキストの埋め込みベクトルを取得
+        
+        use_cache=True の場合は正規化済みテキストとモデル名をキーにキャッシュを参照する。
+        研究室本文のように再利用されないテキストでは False を指定する。
+        """
         try:
-            # テキストの前処理
-            text = text.strip().replace('\n', ' ')
+            # テキストの前処理（NFKC正規化・空白の統一）
+            text = normalize_query(text)
             if not text:
                 raise ValueError("Empty text provided")
             
-            # OpenAI API呼び出し
-            response = openai.Embedding.create(
-                model=self.model,
-                input=text
-            )
+            cache_key = make_cache_key(text, self.model)
+            if use_cache:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            embedding = response['data'][0]['embedding']
+            # 埋め込みAPI呼び出し（イベントループをブロックしない）
+            if self.batcher is not None:
+                embedding = await self.batcher.embed(text)
+            else:
+                embedding = (await self.provider.embed([text], self.model))[0]
             logger.debug(f"Generated embedding for text: {text[:50]}...")
             
+            if use_cache:
+                await self.cache.set(cache_key, text, self.model, embedding)
+            
             return embedding
             
         except Exception as e:
@@ -49,98 +395,451 @@ class SemanticSearchEngine:
     
     async def search_labs(
         self,
-        db: Session,
+        db: AnySession,
         query: str,
         limit: int = 20,
         region_filter: Optional[List[str]] = None,
         field_filter: Optional[List[str]] = None,
-        min_similarity: float = 0.5
-    ) -> Tuple[List[ResearchLabSearchResult], float]:
-        """研究室のセマンティック検索"""
+        min_similarity: float = 0.5,
+        mode: str = "vector",
+        lexical_weight: float = 0.3
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """研究室のセマンティック検索
+        
+        結果は ResearchLabSearchResult と同じ形の dict のリスト（レスポンスでそのまま直列化する）。
+        mode='hybrid' では語句一致検索をベクトル検索と並行して実行し、RRFで統合する。
+        mode='lexical' では埋め込みAPIを使わず語句一致のみで検索する。
+        """
         start_time = time.time()
+        lexical_task: Optional[asyncio.Future] = None
         
         try:
-            # クエリの埋め込みベクトルを生成
-            query_embedding = await self.get_embedding(query)
-            
-            # ベクトル検索SQLの構築
-            sql_query = """
-                SELECT 
-                    rl.id,
-                    rl.name,
-                    rl.professor_name,
-                    rl.department,
-                    rl.research_theme,
-                    rl.research_content,
-                    rl.research_field,
-                    rl.speciality,
-                    rl.keywords,
-                    rl.lab_url,
-                    u.name as university_name,
-                    u.prefecture,
-                    u.region,
-                    1 - (rl.embedding <=> :query_embedding) as similarity_score
-                FROM research_labs rl
-                JOIN universities u ON rl.university_id = u.id
-                WHERE rl.embedding IS NOT NULL
-            """
-            
-            # フィルター条件の追加
-            params = {"query_embedding": str(query_embedding)}
-            
-            if region_filter:
-                sql_query += " AND u.region = ANY(:region_filter)"
-                params["region_filter"] = region_filter
-            
-            if field_filter:
-                sql_query += " AND rl.research_field = ANY(:field_filter)"
-                params["field_filter"] = field_filter
-            
-            # 類似度の閾値
-            sql_query += " AND (1 - (rl.embedding <=> :query_embedding)) >= :min_similarity"
-            params["min_similarity"] = min_similarity
-            
-            # 類似度順でソート・制限
-            sql_query += """
-                ORDER BY rl.embedding <=> :query_embedding
-                LIMIT :limit
-            """
-            params["limit"] = limit
-            
-            # クエリ実行
-            result = db.execute(text(sql_query), params)
-            rows = result.fetchall()
-            
-            # 結果をPydanticモデルに変換
-            search_results = []
-            for row in rows:
-                lab_result = ResearchLabSearchResult(
-                    id=row.id,
-                    name=row.name,
-                    professor_name=row.professor_name,
-                    department=row.department,
-                    research_theme=row.research_theme,
-                    research_content=row.research_content,
-                    research_field=row.research_field,
-                    speciality=row.speciality,
-                    keywords=row.keywords,
-                    lab_url=row.lab_url,
-                    university_name=row.university_name,
-                    prefecture=row.prefecture,
-                    region=row.region,
-                    similarity_score=float(row.similarity_score)
-                )
-                search_results.append(lab_result)
+            if mode == "lexical":
+                rows = await self._search_lexical_isolated(query, limit, region_filter, field_filter)
+                return self._finish(rows, start_time, "Lexical search")
+            
+            # hybrid では埋め込みの生成を待たずに語句検索を始める。
+            # 埋め込みが一次キャッシュにある場合は、結果キャッシュを確認してから始める
+            # （タスクをキャンセルしてもスレッドの語句検索は止まらないため）
+            query_embedding: Optional[List[float]] = None
+            if mode == "hybrid":
+                query_embedding = self.cache.peek(make_cache_key(normalize_query(query), self.model))
+                if query_embedding is None:
+                    lexical_task = asyncio.ensure_future(self._search_lexical_isolated(
+                        query, limit * _HYBRID_CANDIDATE_FACTOR, region_filter, field_filter
+                    ))
+            
+            # クエリの埋め込みベクトルを生成（遅延・障害時は語句検索の結果を返す）
+            if query_embedding is None:
+                try:
+                    query_embedding = await self._get_query_embedding(query)
+                except (asyncio.TimeoutError, EmbeddingProviderError) as e:
+                    if not settings.LEXICAL_FALLBACK_ENABLED:
+                        raise
+                    logger.warning(f"Embedding unavailable, falling back to lexical search: {e!r}")
+                    self.lexical_fallbacks.inc()
+                    if lexical_task is None:
+                        lexical_task = asyncio.ensure_future(self._search_lexical_isolated(
+                            query, limit, region_filter, field_filter
+                        ))
+                    rows = (await lexical_task)[:limit]
+                    return self._finish(rows, start_time, "Lexical fallback search")
             
-            search_time = (time.time() - start_time) * 1000  # ミリ秒
+            # 同一埋め込み・同一条件の結果がキャッシュにあれば再利用
+            result_key = make_result_key(
+                embedding_fingerprint(query_embedding),
+                region_filter,
+                field_filter,
+                limit,
+                min_similarity,
+                mode,
+                lexical_weight
+            )
+            cached_results = self.result_cache.get(result_key)
+            if cached_results is not None:
+                search_time = (time.time() - start_time) * 1000
+                logger.info(f"Search served from cache: {len(cached_results)} results in {search_time:.2f}ms")
+                return cached_results, search_time
             
-            logger.info(f"Search completed: {len(search_results)} results in {search_time:.2f}ms")
+            if mode == "hybrid" and lexical_task is None:
+                lexical_task = asyncio.ensure_future(self._search_lexical_isolated(
+                    query, limit * _HYBRID_CANDIDATE_FACTOR, region_filter, field_filter
+                ))
             
+            # ベクトル検索（設定に応じてpgvectorまたはインメモリインデックス）
+            vector_limit = limit * _HYBRID_CANDIDATE_FACTOR if lexical_task is not None else limit
+            if self.vector_index is not None:
+                rows = await self._search_memory_index(
+                    db, query_embedding, vector_limit, region_filter, field_filter, min_similarity
+                )
+            else:
+                rows = await self._search_pgvector(
+                    db, query_embedding, vector_limit, region_filter, field_filter, min_similarity
+                )
+            
+            if lexical_task is not None:
+                rows = self._fuse(rows, await lexical_task, lexical_weight, limit)
+            
+            search_results, search_time = self._finish(rows, start_time, "Search")
+            self.result_cache.set(result_key, search_results)
             return search_results, search_time
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
             raise
+        finally:
+            if lexical_task is not None and not lexical_task.done():
+                lexical_task.cancel()
+    
+    async def _get_query_embedding(self, query: str) -> List[float]:
+        """検索クエリの埋め込み（フォールバック有効時は待ち時間に上限を設ける）"""
+        if not settings.LEXICAL_FALLBACK_ENABLED:
+            return await self.get_embedding(query)
+        
+        # タイムアウトしても生成は続け、完了すればキャッシュに載せて次回以降に使う
+        task = asyncio.ensure_future(self.get_embedding(query))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.wait_for(asyncio.shield(task), settings.EMBEDDING_FALLBACK_TIMEOUT)
+    
+    @staticmethod
+    def _to_result(row) -> ResearchLabSearchResult:
+        """検索結果行をPydanticモデルに変換"""
+        return ResearchLabSearchResult(
+            id=row.id,
+            name=row.name,
+            professor_name=row.professor_name,
+            department=row.department,
+            research_theme=row.research_theme,
+            research_content=row.research_content,
+            research_field=row.research_field,
+            speciality=row.speciality,
+            keywords=row.keywords,
+            lab_url=row.lab_url,
+            university_name=row.university_name,
+            prefecture=row.prefecture,
+            region=row.region,
+            similarity_score=float(row.similarity_score)
+        )
+    
+    def _finish(self, rows, start_time: float, label: str) -> Tuple[List[Dict[str, Any]], float]:
+        """結果行をdictに変換し、検索時間を記録（SQLの列がスキーマと同じなので検証は省く）"""
+        search_results = [search_result_dict(row) for row in rows]
+        
+        search_time = (time.time() - start_time) * 1000  # ミリ秒
+        
+        logger.info(f"{label} completed: {len(search_results)} results in {search_time:.2f}ms")
+        
+        return search_results, search_time
+    
+    def _fuse(self, vector_rows, lexical_rows, lexical_weight: float, limit: int):
+        """ベクトル検索と語句検索の順位をRRFで統合
+        
+        表示する類似度は、ベクトル側にある研究室ではコサイン類似度を使う。
+        """
+        rows_by_id = {row.id: row for row in lexical_rows}
+        rows_by_id.update({row.id: row for row in vector_rows})
+        
+        fused = reciprocal_rank_fusion(
+            [[row.id for row in vector_rows], [row.id for row in lexical_rows]],
+            [1.0 - lexical_weight, lexical_weight],
+            k=settings.RRF_K
+        )
+        return [rows_by_id[lab_id] for lab_id, _ in fused[:limit]]
+    
+    def _search_lexical(
+        self,
+        db: Session,
+        query: str,
+        limit: int,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]]
+    ):
+        """語句一致検索（pg_trgm の単語類似度。日本語も分かち書きせずに部分一致させる）"""
+        query = normalize_query(query)
+        if not query:
+            return []
+        
+        params = {
+            "query": query,
+            "limit": limit
+        }
+        sql_query = _LEXICAL_SQL
+        
+        if region_filter:
+            sql_query += " AND u.region = ANY(:region_filter)"
+            params["region_filter"] = region_filter
+        
+        if field_filter:
+            sql_query += " AND rl.research_field = ANY(:field_filter)"
+            params["field_filter"] = field_filter
+        
+        sql_query += """
+            ORDER BY similarity_score DESC, rl.id
+            LIMIT :limit
+        """
+        
+        db.execute(_WORD_SIMILARITY_THRESHOLD_SQL)
+        result = db.execute(text(sql_query), params)
+        return result.fetchall()
+    
+    async def _search_lexical_isolated(
+        self,
+        query: str,
+        limit: int,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]]
+    ):
+        """語句一致検索を専用セッションでスレッドプール実行（ベクトル検索と並行させるため）"""
+        def _run():
+            with self.session_factory() as lexical_db:
+                return self._search_lexical(lexical_db, query, limit, region_filter, field_filter)
+        
+        return await asyncio.to_thread(_run)
+    
+    async def _search_pgvector(
+        self,
+        db: AnySession,
+        query_embedding: List[float],
+        limit: int,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]],
+        min_similarity: float
+    ):
+        """pgvector によるベクトル検索（DB側で全件スキャン/インデックス検索）"""
+        if settings.COARSE_TO_FINE_SEARCH:
+            return await self._search_coarse_to_fine(
+                db, query_embedding, limit, region_filter, field_filter, min_similarity
+            )
+        
+        # ベクトル検索SQLの構築
+        sql_query = """
+            SELECT 
+                rl.id,
+                rl.name,
+                rl.professor_name,
+                rl.department,
+                rl.research_theme,
+                rl.research_content,
+                rl.research_field,
+                rl.speciality,
+                rl.keywords,
+                rl.lab_url,
+                u.name as university_name,
+                u.prefecture,
+                u.region,
+                1 - (rl.embedding <=> :query_embedding) as similarity_score
+            FROM research_labs rl
+            JOIN universities u ON rl.university_id = u.id
+            WHERE rl.embedding IS NOT NULL
+        """
+        
+        # フィルター条件の追加
+        params = {"query_embedding": str(query_embedding)}
+        
+        if region_filter:
+            sql_query += " AND u.region = ANY(:region_filter)"
+            params["region_filter"] = region_filter
+        
+        if field_filter:
+            sql_query += " AND rl.research_field = ANY(:field_filter)"
+            params["field_filter"] = field_filter
+        
+        # 類似度の閾値
+        sql_query += " AND (1 - (rl.embedding <=> :query_embedding)) >= :min_similarity"
+        params["min_similarity"] = min_similarity
+        
+        # 類似度順でソート・制限
+        sql_query += """
+            ORDER BY rl.embedding <=> :query_embedding
+            LIMIT :limit
+        """
+        params["limit"] = limit
+        
+        # クエリ実行
+        return await fetch_all(db, text(sql_query), params)
+    
+    async def _search_coarse_to_fine(
+        self,
+        db: AnySession,
+        query_embedding: List[float],
+        limit: int,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]],
+        min_similarity: float
+    ):
+        """短縮埋め込みで候補を絞り込み、元の埋め込みで再スコアして上位を返す"""
+        candidate_limit = limit * settings.COARSE_CANDIDATE_FACTOR
+        params = {
+            "query_embedding": str(query_embedding),
+            "query_short": str(shorten_embedding(query_embedding, self.short_dimension)),
+            "candidate_limit": candidate_limit,
+            "min_similarity": min_similarity,
+            "limit": limit
+        }
+        
+        # 粗検索: 短縮埋め込みのHNSWインデックスで候補を取得
+        candidate_query = """
+            SELECT rl.id, rl.embedding
+            FROM research_labs rl
+            JOIN universities u ON rl.university_id = u.id
+            WHERE rl.embedding_short IS NOT NULL
+        """
+        if region_filter:
+            candidate_query += " AND u.region = ANY(:region_filter)"
+            params["region_filter"] = region_filter
+        if field_filter:
+            candidate_query += " AND rl.research_field = ANY(:field_filter)"
+            params["field_filter"] = field_filter
+        candidate_query += """
+            ORDER BY rl.embedding_short <=> :query_short
+            LIMIT :candidate_limit
+        """
+        
+        # 精密検索: 候補だけを元の埋め込みで再スコア
+        sql_query = f"""
+            WITH candidates AS ({candidate_query})
+            SELECT 
+                rl.id,
+                rl.name,
+                rl.professor_name,
+                rl.department,
+                rl.research_theme,
+                rl.research_content,
+                rl.research_field,
+                rl.speciality,
+                rl.keywords,
+                rl.lab_url,
+                u.name as university_name,
+                u.prefecture,
+                u.region,
+                1 - (c.embedding <=> :query_embedding) as similarity_score
+            FROM candidates c
+            JOIN research_labs rl ON rl.id = c.id
+            JOIN universities u ON rl.university_id = u.id
+            WHERE (1 - (c.embedding <=> :query_embedding)) >= :min_similarity
+            ORDER BY c.embedding <=> :query_embedding
+            LIMIT :limit
+        """
+        
+        # HNSW の探索幅は既定（40）のままだと候補数に届かないため、このトランザクション内だけ広げる
+        ef_search = min(candidate_limit, _HNSW_EF_SEARCH_MAX)
+        await execute(db, text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        return await fetch_all(db, text(sql_query), params)
+    
+    async def _search_memory_index(
+        self,
+        db: AnySession,
+        query_embedding: List[float],
+        limit: int,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]],
+        min_similarity: float
+    ):
+        """インメモリインデックスで上位k件を選び、その行だけDBから取得"""
+        index = await self._ensure_vector_index()
+        hits = index.search(
+            query_embedding,
+            limit,
+            region_filter=region_filter,
+            field_filter=field_filter,
+            min_similarity=min_similarity
+        )
+        return await self._hydrate(db, hits)
+    
+    async def _hydrate(self, db: AnySession, hits: List[Tuple[int, float]]):
+        """(研究室ID, 類似度) のリストを検索結果行に展開（順序は維持）"""
+        if not hits:
+            return []
+        ids, scores = zip(*hits)
+        return await fetch_all(db, _HYDRATE_SQL, {"ids": list(ids), "scores": list(scores)})
+    
+    async def find_similar_labs(self, db: AnySession, lab_id: int, limit: int = 5):
+        """指定研究室と類似する研究室の行を類似度順に取得"""
+        if settings.LAB_NEIGHBORS_ENABLED and limit <= settings.LAB_NEIGHBORS_TOP_N:
+            rows = await fetch_all(db, _NEIGHBOR_LOOKUP_SQL, {"target_id": lab_id, "limit": limit})
+            # 近傍テーブル未作成・未反映の研究室は都度計算する
+            if rows:
+                return rows
+        
+        if self.vector_index is not None:
+            index = await self._ensure_vector_index()
+            hits = index.similar(lab_id, limit)
+            # 直近に追加されインデックス未反映の研究室はpgvectorで検索する
+            if hits is not None:
+                return await self._hydrate(db, hits)
+        
+        return await fetch_all(db, _SIMILAR_LABS_SQL, {
+            "target_id": lab_id,
+            "limit": limit
+        })
+    
+    async def find_similar_labs_batch(
+        self,
+        db: AnySession,
+        lab_ids: Sequence[int],
+        limit: int = 5,
+        exclude_input: bool = False
+    ) -> Tuple[Dict[int, List[ResearchLabSearchResult]], List[int], List[int]]:
+        """複数研究室の類似研究室をまとめて取得
+        
+        近傍テーブル → インメモリインデックス（1回の行列積）→ pgvector（LATERAL 1クエリ）の順に、
+        前段で得られなかった研究室だけを次段で計算する。
+        戻り値は (対象研究室ID → 類似研究室, 存在しないID, 埋め込み未生成のID)。
+        """
+        lab_ids = list(dict.fromkeys(lab_ids))
+        status = {row.id: row.has_embedding for row in await fetch_all(
+            db, _BATCH_TARGETS_SQL, {"target_ids": lab_ids}
+        )}
+        missing_ids = [lab_id for lab_id in lab_ids if lab_id not in status]
+        no_embedding_ids = [lab_id for lab_id in lab_ids if status.get(lab_id) is False]
+        targets = [lab_id for lab_id in lab_ids if status.get(lab_id)]
+        exclude_ids = lab_ids if exclude_input else []
+        
+        results: Dict[int, List[ResearchLabSearchResult]] = {lab_id: [] for lab_id in targets}
+        pending = targets
+        
+        def collect(rows):
+            found = set()
+            for row in rows:
+                found.add(row.target_id)
+                if len(results[row.target_id]) < limit:
+                    results[row.target_id].append(self._to_result(row))
+            return [lab_id for lab_id in pending if lab_id not in found]
+        
+        max_rank = limit + len(exclude_ids)
+        if pending and settings.LAB_NEIGHBORS_ENABLED and max_rank <= settings.LAB_NEIGHBORS_TOP_N:
+            pending = collect(await fetch_all(db, _NEIGHBOR_BATCH_SQL, {
+                "target_ids": pending,
+                "max_rank": max_rank,
+                "exclude_ids": exclude_ids
+            }))
+        
+        if pending and self.vector_index is not None:
+            index = await self._ensure_vector_index()
+            hits = index.similar_many(pending, limit, exclude_ids=exclude_ids)
+            pairs = [
+                (target_id, lab_id, score)
+                for target_id, neighbors in hits.items()
+                for lab_id, score in neighbors
+            ]
+            if pairs:
+                target_column, id_column, score_column = zip(*pairs)
+                collect(await fetch_all(db, _HYDRATE_PAIRS_SQL, {
+                    "target_ids": list(target_column),
+                    "ids": list(id_column),
+                    "scores": list(score_column)
+                }))
+            # 直近に追加されインデックス未反映の研究室はpgvectorで検索する
+            pending = [lab_id for lab_id in pending if lab_id not in hits]
+        
+        if pending:
+            collect(await fetch_all(db, _SIMILAR_BATCH_SQL, {
+                "target_ids": pending,
+                "exclude_ids": exclude_ids,
+                "limit": limit
+            }))
+        
+        return results, missing_ids, no_embedding_ids
     
     async def generate_research_content_embedding(self, lab: ResearchLab) -> List[float]:
         """研究室の内容から埋め込みベクトルを生成"""
@@ -157,7 +856,63 @@ class SemanticSearchEngine:
         # None値を除去して結合
         combined_text = " ".join([part for part in content_parts if part])
         
-        return await self.get_embedding(combined_text)
+        return await self.get_embedding(combined_text, use_cache=False)
+    
+    def set_lab_embedding(self, lab: ResearchLab, embedding: Sequence[float]):
+        """研究室に埋め込みと粗検索用の短縮埋め込みを設定"""
+        lab.embedding = embedding
+        lab.embedding_short = shorten_embedding(embedding, self.short_dimension)
+    
+    def backfill_short_embeddings(self, db: Session, batch_size: int = 500) -> int:
+        """短縮埋め込みが未生成の研究室を、既存の埋め込みから補完（API呼び出しなし）
+        
+        バッチごとにアドバイザリロックを取り、他のワーカーが補完中なら処理を任せて終了する。
+        """
+        updated = 0
+        while True:
+            locked = db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": _BACKFILL_LOCK_KEY}
+            ).scalar()
+            if not locked:
+                db.rollback()
+                break
+            
+            rows = db.query(ResearchLab.id, ResearchLab.embedding)\
+                .filter(ResearchLab.embedding.isnot(None))\
+                .filter(ResearchLab.embedding_short.is_(None))\
+                .limit(batch_size)\
+                .all()
+            if not rows:
+                db.rollback()
+                break
+            
+            db.execute(
+                _BACKFILL_SHORT_SQL,
+                [
+                    {
+                        "id": row.id,
+                        "embedding_short": str(shorten_embedding(row.embedding, self.short_dimension))
+                    }
+                    for row in rows
+                ]
+            )
+            db.commit()
+            updated += len(rows)
+        
+        if updated:
+            logger.info(f"Backfilled short embeddings for {updated} labs")
+            # SQL直接の更新はORMのフックでは検出されないため、このプロセスのキャッシュを明示的に無効化
+            data_version.bump("short embeddings backfilled")
+        return updated
+    
+    async def run_short_embedding_backfill(self) -> int:
+        """短縮埋め込みの補完をスレッドプールで実行"""
+        def _backfill():
+            with self.session_factory() as db:
+                return self.backfill_short_embeddings(db)
+        
+        return await asyncio.to_thread(_backfill)
     
     async def update_lab_embedding(self, db: Session, lab_id: int):
         """研究室の埋め込みベクトルを更新"""
@@ -169,9 +924,17 @@ class SemanticSearchEngine:
         embedding = await self.generate_research_content_embedding(lab)
         
         # データベースを更新
-        lab.embedding = embedding
+        self.set_lab_embedding(lab, embedding)
         db.commit()
         
+        # 類似研究室テーブルに差分を反映（ロック待ちと行列計算でイベントループを塞がないよう専用セッションで実行）
+        if settings.LAB_NEIGHBORS_ENABLED:
+            def _update_neighbors():
+                with self.session_factory() as neighbors_db:
+                    return lab_neighbors.update_lab(neighbors_db, lab_id, settings.LAB_NEIGHBORS_TOP_N)
+            
+            await asyncio.to_thread(_update_neighbors)
+        
         logger.info(f"Updated embedding for lab: {lab.name}")
     
     async def batch_update_embeddings(self, db: Session, batch_size: int = 10):
@@ -186,7 +949,7 @@ class SemanticSearchEngine:
             for lab in batch:
                 try:
                     embedding = await self.generate_research_content_embedding(lab)
-                    lab.embedding = embedding
+                    self.set_lab_embedding(lab, embedding)
                     logger.info(f"Generated embedding for: {lab.name}")
                 except Exception as e:
                     logger.error(f"Failed to generate embedding for {lab.name}: {e}")
@@ -196,10 +959,14 @@ class SemanticSearchEngine:
             
             # API制限対策（少し待機）
             if i + batch_size < len(labs):
-                time.sleep(1)
+                await asyncio.sleep(1)
         
         logger.info("Batch embedding update completed")
 
 
 # セマンティック検索エンジンのインスタンス
-search_engine = SemanticSearchEngine()
\ No newline at end of file
+search_engine = SemanticSearchEngine()
+metrics.register_collector("embedding_cache", search_engine.cache.stats)
+metrics.register_collector("search_result_cache", search_engine.result_cache.stats)
+if search_engine.vector_index is not None:
+    metrics.register_collector("vector_index", search_engine.vector_index.stats)
\ No newline at end of file
@@ -0,0 +1,56 @@
+# backend/app/core/serialization.py
+from typing import Any, Dict
+
+from app.models import ResearchLab, University
+
+
+def search_result_dict(row) -> Dict[str, Any]:
+    """検索結果行を ResearchLabSearchResult と同じ形の dict にする（Pydantic の検証を通さない）"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "professor_name": row.professor_name,
+        "department": row.department,
+        "research_theme": row.research_theme,
+        "research_content": row.research_content,
+        "research_field": row.research_field,
+        "speciality": row.speciality,
+        "keywords": row.keywords,
+        "lab_url": row.lab_url,
+        "university_name": row.university_name,
+        "prefecture": row.prefecture,
+        "region": row.region,
+        "similarity_score": float(row.similarity_score)
+    }
+
+
+def university_dict(university: University) -> Dict[str, Any]:
+    """大学を schemas.University と同じ形の dict にする"""
+    return {
+        "name": university.name,
+        "type": university.type,
+        "prefecture": university.prefecture,
+        "region": university.region,
+        "id": university.id,
+        "created_at": university.created_at
+    }
+
+
+def lab_dict(lab: ResearchLab) -> Dict[str, Any]:
+    """研究室（大学情報を読み込み済み）を schemas.ResearchLab と同じ形の dict にする"""
+    return {
+        "name": lab.name,
+        "professor_name": lab.professor_name,
+        "department": lab.department,
+        "research_theme": lab.research_theme,
+        "research_content": lab.research_content,
+        "research_field": lab.research_field,
+        "speciality": lab.speciality,
+        "keywords": lab.keywords,
+        "lab_url": lab.lab_url,
+        "id": lab.id,
+        "university_id": lab.university_id,
+        "university": university_dict(lab.university),
+        "created_at": lab.created_at,
+        "updated_at": lab.updated_at
+    }
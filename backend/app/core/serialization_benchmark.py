@@ -0,0 +1,107 @@
+# backend/app/core/serialization_benchmark.py
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Sequence
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.db_benchmark import percentile
+from app.core.semantic_search import SemanticSearchEngine
+from app.core.serialization import search_result_dict
+from app.schemas import SearchResponse
+
+_SEARCH_RESPONSE_FIELD = create_response_field(name="response", type_=SearchResponse, mode="serialization")
+
+
+def sample_rows(count: int, content_length: int) -> List[SimpleNamespace]:
+    """検索SQLの結果行と同じ列を持つ行（research_content は content_length 文字）"""
+    content = ("がん細胞に対する免疫応答を強化する新しい治療法の開発を行っています。" * (content_length // 30 + 1))[:content_length]
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"免疫制御学研究室{i}",
+            professor_name="山田花子",
+            department="医学部医学科",
+            research_theme="がん免疫療法の新規治療法開発",
+            research_content=content,
+            research_field="免疫学",
+            speciality="がん免疫、T細胞免疫療法",
+            keywords="がん免疫,T細胞,免疫療法,腫瘍免疫",
+            lab_url=f"https://example.com/labs/{i}",
+            university_name="京都大学",
+            prefecture="京都府",
+            region="関西",
+            similarity_score=0.9 - i * 0.001
+        )
+        for i in range(count)
+    ]
+
+
+async def pydantic_path(rows) -> bytes:
+    """従来の経路: 行ごとの Pydantic モデル → response_model での検証・変換 → JSONResponse"""
+    results = [SemanticSearchEngine._to_result(row) for row in rows]
+    response = SearchResponse(query="免疫", total_results=len(results), search_time_ms=12.3, results=results)
+    content = await serialize_response(field=_SEARCH_RESPONSE_FIELD, response_content=response)
+    return JSONResponse(content).body
+
+
+async def fast_path(rows) -> bytes:
+    """高速経路: 行 → dict → ORJSONResponse（検証なし）"""
+    results = [search_result_dict(row) for row in rows]
+    return ORJSONResponse({
+        "query": "免疫",
+        "total_results": len(results),
+        "search_time_ms": 12.3,
+        "results": results
+    }).body
+
+
+async def _time(path: Callable, rows, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await path(rows)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return percentile(latencies, 50)
+
+
+async def benchmark(sizes: Sequence[int], content_length: int, repeat: int) -> List[Dict[str, float]]:
+    """結果件数ごとに、検索レスポンス1件の生成時間の中央値を比較"""
+    report = []
+    for size in sizes:
+        rows = sample_rows(size, content_length)
+        pydantic_ms = await _time(pydantic_path, rows, repeat)
+        fast_ms = await _time(fast_path, rows, repeat)
+        report.append({
+            "results": size,
+            "pydantic_p50_ms": pydantic_ms,
+            "fast_p50_ms": fast_ms,
+            "speedup": pydantic_ms / fast_ms if fast_ms else 0.0
+        })
+    return report
+
+
+def main():
+    """検索レスポンスの直列化（Pydantic + response_model とdict + orjson）の速度を比較"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--content-length", type=int, default=2000, help="research_content の文字数")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args.sizes, args.content_length, args.repeat))
+
+    print(f"{'results':>8} {'pydantic p50 ms':>16} {'orjson p50 ms':>14} {'speedup':>8}")
+    for row in report:
+        print(
+            f"{row['results']:>8} {row['pydantic_p50_ms']:>16.3f} "
+            f"{row['fast_p50_ms']:>14.3f} {row['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# backend/app/core/single_flight.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """実行中の共有処理と待機者数"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """同じキーの処理が同時に実行中なら、その結果を共有する
+
+    最初の呼び出し（リーダー）だけが処理を実行し、後続の呼び出しは同じタスクを待つ。
+    待機者は個別にキャンセルでき、全員がキャンセルした場合のみ処理自体を中止する。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = metrics.counter(f"single_flight.{name}.leaders")
+        self.shared = metrics.counter(f"single_flight.{name}.shared")
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """key の処理を実行（実行中なら結果を共有）して結果を返す"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders.inc()
+        else:
+            self.shared.inc()
+
+        call.waiters += 1
+        try:
+            # shield により、1人の待機者のキャンセルが共有タスクに波及しない
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # 最後の待機者が離脱したので処理を中止し、新しい呼び出しは作り直させる
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
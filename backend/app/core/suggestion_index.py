@@ -0,0 +1,309 @@
+# backend/app/core/suggestion_index.py
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.data_version import DataVersion, data_version
+from app.core.embedding_cache import normalize_query
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_ALL_LABS_SQL = text("""
+    SELECT id, university_id, name, research_field, keywords, updated_at
+    FROM research_labs
+""")
+
+_LABS_SINCE_SQL = text("""
+    SELECT id, university_id, name, research_field, keywords, updated_at
+    FROM research_labs
+    WHERE updated_at >= :since
+""")
+
+_LAB_IDS_SQL = text("SELECT id FROM research_labs")
+
+_UNIVERSITIES_SQL = text("SELECT id, name FROM universities")
+
+# 更新日時の境界付近でコミットが遅れた変更を取りこぼさないよう、少し前から読み直す
+_CHANGE_OVERLAP = timedelta(minutes=5)
+
+_KEYWORD_SEPARATORS = re.compile(r"[,、，;；/]")
+
+# 人気クエリに含まれる候補を探す際の最大の部分文字列長
+_MAX_TERM_LENGTH = 32
+
+# 人気クエリのスコアがこの割合（最大スコア比）以上動いたときだけ作り直す
+_POPULARITY_TOLERANCE = 0.02
+
+# DBが空でも候補を返せるよう、常に含める研究分野とキーワード
+_DEFAULT_ENTRIES = [
+    *((field, "field") for field in (
+        "免疫学", "生物学", "医学", "薬学", "工学", "情報科学",
+        "化学", "物理学", "数学", "心理学", "社会学"
+    )),
+    *((keyword, "keyword") for keyword in (
+        "がん治療", "感染症", "アレルギー", "ワクチン", "再生医療",
+        "人工知能", "ロボット", "宇宙", "環境問題", "エネルギー",
+        "食品安全", "新薬開発", "遺伝子治療"
+    ))
+]
+
+LabTerms = Tuple[int, Tuple[Tuple[str, str], ...]]
+
+
+def suggestion_key(value: str) -> str:
+    """照合用の正規化（NFKC・空白の統一・英字の小文字化）"""
+    return normalize_query(value).lower()
+
+
+def split_keywords(keywords: Optional[str]) -> List[str]:
+    """カンマ区切りのキーワードを分割"""
+    if not keywords:
+        return []
+    return [keyword.strip() for keyword in _KEYWORD_SEPARATORS.split(keywords) if keyword.strip()]
+
+
+def lab_terms(row) -> LabTerms:
+    """研究室1件から得られる候補 (大学ID, ((文字列, カテゴリ), ...))"""
+    terms = [(row.name, "lab"), (row.research_field, "field")]
+    terms.extend((keyword, "keyword") for keyword in split_keywords(row.keywords))
+    return row.university_id, tuple((term, category) for term, category in terms if term)
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    text: str
+    category: str
+    weight: float
+
+
+class SuggestionSnapshot:
+    """検索候補の読み取り専用インデックス
+
+    前方一致はトライの各ノードに重み順の上位 top_k 件を持たせて O(入力長) で返し、
+    語中の一致は文字 n-gram（1文字と2文字）の転置リストで候補を絞ってから確かめる。
+    転置リストも重み順なので、必要な件数が見つかった時点で打ち切れる。
+    """
+
+    def __init__(self, entries: Iterable[Suggestion], top_k: int = 20):
+        best: Dict[str, Suggestion] = {}
+        for entry in entries:
+            key = suggestion_key(entry.text)
+            if key and (key not in best or entry.weight > best[key].weight):
+                best[key] = entry
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1].weight, item[0]))
+        self.keys = [key for key, _ in ranked]
+        self.entries = [entry for _, entry in ranked]
+        self.top_k = top_k
+        self._trie: Dict = {}
+        self._grams: Dict[str, List[int]] = {}
+
+        for entry_id, key in enumerate(self.keys):
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+                top = node.setdefault(None, [])
+                if len(top) < top_k:
+                    top.append(entry_id)
+            for gram in set(self._ngrams(key)):
+                self._grams.setdefault(gram, []).append(entry_id)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _ngrams(key: str) -> List[str]:
+        if len(key) == 1:
+            return [key]
+        return [*key, *(key[i:i + 2] for i in range(len(key) - 1))]
+
+    def _query_grams(self, key: str) -> List[str]:
+        if len(key) == 1:
+            return [key]
+        return [key[i:i + 2] for i in range(len(key) - 1)]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        """前方一致を先に、足りない分を語中の一致で、それぞれ重み順に返す"""
+        key = suggestion_key(query)
+        if not key:
+            return []
+
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+        found = list(node[None][:limit]) if node else []
+
+        if len(found) < limit:
+            postings = [self._grams.get(gram, ()) for gram in self._query_grams(key)]
+            seen = set(found)
+            for entry_id in min(postings, key=len):
+                if entry_id not in seen and key in self.keys[entry_id]:
+                    found.append(entry_id)
+                    if len(found) >= limit:
+                        break
+
+        return [self.entries[entry_id] for entry_id in found]
+
+
+class SuggestionIndex:
+    """研究室・大学のデータから作る検索候補インデックス
+
+    研究室名・研究分野・キーワード・大学名を候補とし、付いている研究室数と、
+    その語を含む人気クエリのスコアで重み付けする。
+    データバージョンが進んだら前回以降に更新された研究室だけを読み直し、
+    候補の集計を差分で更新してからインデックスを差し替える。
+    """
+
+    def __init__(self, data_version: DataVersion, top_k: int = 20):
+        self.data_version = data_version
+        self.top_k = top_k
+        self._snapshot = SuggestionSnapshot([], top_k)
+        self._labs: Dict[int, LabTerms] = {}
+        self._universities: Dict[int, str] = {}
+        self._since: Optional[datetime] = None
+        self._version: Optional[int] = None
+        self._popular: Tuple[Tuple[str, float], ...] = ()
+        self._popular_signature: Tuple[Tuple[str, int], ...] = ()
+        self._lock = threading.Lock()
+
+        self.lookups = metrics.counter("suggestion_index.lookups")
+        self.build_ms = metrics.histogram("suggestion_index.build_ms")
+        metrics.register_collector("suggestion_index", self.stats)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        self.lookups.inc()
+        return self._snapshot.suggest(query, limit)
+
+    def _load_changes(self, db: Session) -> int:
+        """前回以降に更新された研究室を読み込み、削除された研究室を除く"""
+        if self._since is None:
+            rows = db.execute(_ALL_LABS_SQL).fetchall()
+            self._labs = {}
+        else:
+            rows = db.execute(_LABS_SINCE_SQL, {"since": self._since - _CHANGE_OVERLAP}).fetchall()
+            current_ids = {row[0] for row in db.execute(_LAB_IDS_SQL)}
+            for lab_id in self._labs.keys() - current_ids:
+                del self._labs[lab_id]
+
+        for row in rows:
+            self._labs[row.id] = lab_terms(row)
+            if row.updated_at is not None and (self._since is None or row.updated_at > self._since):
+                self._since = row.updated_at
+
+        self._universities = {row.id: row.name for row in db.execute(_UNIVERSITIES_SQL)}
+        return len(rows)
+
+    def _catalog_counts(self) -> Dict[Tuple[str, str], int]:
+        counts: Dict[Tuple[str, str], int] = {entry: 0 for entry in _DEFAULT_ENTRIES}
+        counts.update({(name, "university"): 0 for name in self._universities.values()})
+        for university_id, terms in self._labs.values():
+            university = self._universities.get(university_id)
+            if university:
+                counts[(university, "university")] += 1
+            for term in set(terms):
+                counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def _popularity(self, keys: Iterable[str]) -> Dict[str, float]:
+        """候補ごとに、その語を含む人気クエリのスコアを合計"""
+        keys = set(keys)
+        popularity: Dict[str, float] = {}
+        for query, score in self._popular:
+            query_key = suggestion_key(query)
+            contained = {
+                query_key[start:end]
+                for start in range(len(query_key))
+                for end in range(start + 1, min(len(query_key), start + _MAX_TERM_LENGTH) + 1)
+            } & keys
+            for key in contained:
+                popularity[key] = popularity.get(key, 0.0) + score
+        return popularity
+
+    def _build(self) -> SuggestionSnapshot:
+        counts = self._catalog_counts()
+        popularity = self._popularity(suggestion_key(text) for text, _ in counts)
+        return SuggestionSnapshot(
+            (
+                Suggestion(
+                    text=text,
+                    category=category,
+                    weight=math.log1p(count) + math.log1p(popularity.get(suggestion_key(text), 0.0))
+                )
+                for (text, category), count in counts.items()
+            ),
+            self.top_k
+        )
+
+    @staticmethod
+    def _popular_signature_of(popular: Sequence[Tuple[str, float]]) -> Tuple[Tuple[str, int], ...]:
+        """人気クエリの顔ぶれと、最大スコア比を量子化した値
+        
+        減衰スコアは時刻とともに全体が同じ割合で小さくなるため、比で比べれば
+        新しい検索がない限り変わらない。
+        """
+        top = max((score for _, score in popular), default=0.0)
+        if top <= 0:
+            return tuple((query, 0) for query, _ in popular)
+        return tuple(sorted((query, round(score / top / _POPULARITY_TOLERANCE)) for query, score in popular))
+
+    def refresh(self, db: Session, popular: Sequence[Tuple[str, float]] = ()) -> bool:
+        """データか人気クエリ（順位・スコア比）が変わっていればインデックスを作り直す"""
+        with self._lock:
+            version = self.data_version.current
+            popular = tuple(popular)
+            signature = self._popular_signature_of(popular)
+            if version == self._version and signature == self._popular_signature:
+                return False
+
+            started = time.perf_counter()
+            changed = 0
+            if version != self._version:
+                changed = self._load_changes(db)
+                self._version = version
+            self._popular = popular
+            self._popular_signature = signature
+            self._snapshot = self._build()
+
+            elapsed = (time.perf_counter() - started) * 1000
+            self.build_ms.observe(elapsed)
+            logger.info(
+                f"Suggestion index rebuilt: {len(self._snapshot)} entries, "
+                f"{changed} labs reloaded in {elapsed:.1f}ms (version {version})"
+            )
+            return True
+
+    async def refresh_async(
+        self,
+        session_factory: Callable[[], Session],
+        popular: Sequence[Tuple[str, float]] = ()
+    ) -> bool:
+        """refresh をスレッドプールで実行"""
+        def _refresh():
+            with session_factory() as db:
+                return self.refresh(db, popular)
+
+        return await asyncio.to_thread(_refresh)
+
+    def stats(self):
+        """インデックスの状態"""
+        return {
+            "entries": len(self._snapshot),
+            "labs": len(self._labs),
+            "data_version": self._version
+        }
+
+
+# アプリケーション共通の検索候補インデックス
+suggestion_index = SuggestionIndex(data_version)
@@ -0,0 +1,347 @@
+# backend/app/core/vector_index.py
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.data_version import DataVersion
+from app.core.quantization import QuantizedMatrix, quantize
+from app.models import ResearchLab, University
+
+if TYPE_CHECKING:
+    from app.core.vector_snapshot import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    """文字列の列を整数コード配列と語彙に変換"""
+    vocabulary = sorted(set(values))
+    lookup = {value: code for code, value in enumerate(vocabulary)}
+    codes = np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+    return codes, vocabulary
+
+
+@dataclass(frozen=True)
+class IndexData:
+    """インデックスの中身（差し替え時は丸ごと入れ替える不変オブジェクト）"""
+    ids: np.ndarray            # (n,) int64、昇順
+    matrix: np.ndarray         # (n, d) float32、各行はL2正規化済み
+    region_codes: np.ndarray   # (n,) int32
+    regions: List[str]
+    field_codes: np.ndarray    # (n,) int32
+    fields: List[str]
+    version: int
+    source: str = "database"
+    codes: Optional["QuantizedMatrix"] = None  # 量子化した圧縮コード（候補絞り込み用）
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.shape[0])
+
+    def row_of(self, lab_id: int) -> Optional[int]:
+        """研究室IDの行番号（ids が昇順なので二分探索）"""
+        row = int(np.searchsorted(self.ids, lab_id))
+        return row if row < self.ids.shape[0] and self.ids[row] == lab_id else None
+
+
+def build_index_data(
+    ids: Sequence[int],
+    embeddings: np.ndarray,
+    regions: Sequence[str],
+    fields: Sequence[str],
+    version: int = 0
+) -> IndexData:
+    """埋め込み行列とフィルター列からインデックスを構築（ids は昇順、embeddings は変更しない）"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(ids), -1)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    # 正規化は新しい配列に書き出す（呼び出し側の配列を書き換えない）
+    matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+    region_codes, region_vocab = _encode(list(regions))
+    field_codes, field_vocab = _encode(list(fields))
+
+    return IndexData(
+        ids=np.asarray(ids, dtype=np.int64),
+        matrix=matrix,
+        region_codes=region_codes,
+        regions=region_vocab,
+        field_codes=field_codes,
+        fields=field_vocab,
+        version=version
+    )
+
+
+def read_index_data(db: Session) -> IndexData:
+    """research_labs から埋め込みとフィルター列を読み込んで構築"""
+    rows = db.execute(
+        select(
+            ResearchLab.id,
+            ResearchLab.embedding,
+            University.region,
+            ResearchLab.research_field
+        )
+        .join(University, ResearchLab.university_id == University.id)
+        .where(ResearchLab.embedding.isnot(None))
+        .order_by(ResearchLab.id)
+    ).all()
+
+    if rows:
+        embeddings = np.vstack([np.asarray(row[1], dtype=np.float32) for row in rows])
+    else:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    return build_index_data(
+        ids=[row[0] for row in rows],
+        embeddings=embeddings,
+        regions=[row[2] for row in rows],
+        fields=[row[3] for row in rows]
+    )
+
+
+def _codes_mask(codes: np.ndarray, vocabulary: List[str], wanted: Iterable[str]) -> np.ndarray:
+    wanted = set(wanted)
+    wanted_codes = [code for code, value in enumerate(vocabulary) if value in wanted]
+    return np.isin(codes, wanted_codes)
+
+
+class VectorIndex:
+    """研究室埋め込みのインメモリ・ベクトルインデックス
+
+    全研究室の埋め込みを連続した float32 行列として保持し、
+    行列積 + argpartition で上位k件を求める。フィルターはブールマスクで適用する。
+    snapshots を指定した場合は、共有スナップショットをメモリマップして読み込む。
+    quantization を指定した場合は圧縮コードで候補を rerank_factor 倍選び、
+    元の float32 ベクトルで再計算して上位k件を決める。
+    """
+
+    def __init__(
+        self,
+        data_version: DataVersion,
+        snapshots: Optional["SnapshotStore"] = None,
+        quantization: str = "none",
+        rerank_factor: int = 4
+    ):
+        self.data_version = data_version
+        self.snapshots = snapshots
+        self.quantization = quantization
+        self.rerank_factor = max(rerank_factor, 1)
+        self._data: Optional[IndexData] = None
+        self._stale = True
+        self._reload_lock = asyncio.Lock()
+        data_version.subscribe(self._mark_stale)
+
+    def _mark_stale(self, _version: int):
+        self._stale = True
+
+    @property
+    def data(self) -> Optional[IndexData]:
+        return self._data
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    def swap(self, data: IndexData):
+        """インデックスの中身をアトミックに差し替え（必要なら先に量子化）"""
+        if data.codes is None or data.codes.mode != self.quantization:
+            data = replace(data, codes=quantize(data.matrix, self.quantization))
+        self._data = data
+        self._stale = data.version != self.data_version.current
+
+    def load_from_db(self, db: Session) -> IndexData:
+        """research_labs（またはスナップショット）から読み込んで差し替える"""
+        version = self.data_version.current
+        started = time.perf_counter()
+
+        if self.snapshots is not None:
+            data = self.snapshots.load_or_export(db)
+        else:
+            data = read_index_data(db)
+        data = replace(data, version=version)
+        self.swap(data)
+
+        logger.info(
+            f"Vector index loaded: {data.size} labs from {data.source} in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms (version {version})"
+        )
+        return data
+
+    async def refresh(self, session_factory: Callable[[], Session], force: bool = False):
+        """古くなっていればスレッドプールで再構築（同時実行は1つだけ）"""
+        if not (force or self._stale or self._data is None):
+            return
+
+        async with self._reload_lock:
+            if not (force or self._stale or self._data is None):
+                return
+
+            def _load():
+                with session_factory() as db:
+                    self.load_from_db(db)
+
+            await asyncio.to_thread(_load)
+
+    def _filter_mask(
+        self,
+        data: IndexData,
+        region_filter: Optional[List[str]],
+        field_filter: Optional[List[str]],
+        exclude_ids: Optional[Iterable[int]]
+    ) -> Optional[np.ndarray]:
+        mask = None
+        if region_filter:
+            mask = _codes_mask(data.region_codes, data.regions, region_filter)
+        if field_filter:
+            field_mask = _codes_mask(data.field_codes, data.fields, field_filter)
+            mask = field_mask if mask is None else mask & field_mask
+        if exclude_ids:
+            keep = ~np.isin(data.ids, list(exclude_ids))
+            mask = keep if mask is None else mask & keep
+        return mask
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """スコア上位k件の行番号（降順）"""
+        if k >= scores.shape[0]:
+            return np.argsort(-scores, kind="stable")
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        region_filter: Optional[List[str]] = None,
+        field_filter: Optional[List[str]] = None,
+        min_similarity: float = -1.0,
+        exclude_ids: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """コサイン類似度の上位k件を (研究室ID, 類似度) のリストで返す"""
+        data = self._data
+        if data is None or data.size == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        query = query / norm
+
+        mask = self._filter_mask(data, region_filter, field_filter, exclude_ids)
+
+        if data.codes is not None:
+            rows, scores = self._search_quantized(data, query, k, mask)
+        else:
+            all_scores = data.matrix @ query
+            if mask is not None:
+                all_scores = np.where(mask, all_scores, -np.inf)
+            rows = self._top_k(all_scores, k)
+            scores = all_scores[rows]
+
+        return [
+            (int(data.ids[row]), float(score))
+            for row, score in zip(rows, scores)
+            if np.isfinite(score) and score >= min_similarity
+        ]
+
+    def _search_quantized(
+        self,
+        data: IndexData,
+        query: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """圧縮コードで候補を絞り、候補だけ元のベクトルで再計算"""
+        approx = data.codes.scores(query)
+        if mask is not None:
+            approx = np.where(mask, approx, -np.inf)
+
+        candidates = self._top_k(approx, k * self.rerank_factor)
+        candidates = candidates[np.isfinite(approx[candidates])]
+
+        # 行番号順に参照すると、メモリマップ上の読み出しが連続に近くなる
+        candidates = np.sort(candidates)
+        exact = data.matrix[candidates] @ query
+        order = np.argsort(-exact, kind="stable")[:k]
+        return candidates[order], exact[order]
+
+    def vector_of(self, lab_id: int) -> Optional[np.ndarray]:
+        """インデックス内の研究室ベクトル（正規化済み）"""
+        data = self._data
+        if data is None:
+            return None
+        row = data.row_of(lab_id)
+        return None if row is None else data.matrix[row]
+
+    def similar(self, lab_id: int, k: int) -> Optional[List[Tuple[int, float]]]:
+        """指定研究室に類似する研究室（インデックスに無い場合は None）"""
+        vector = self.vector_of(lab_id)
+        if vector is None:
+            return None
+        return self.search(vector, k, exclude_ids=[lab_id])
+
+    def similar_many(
+        self,
+        lab_ids: Sequence[int],
+        k: int,
+        exclude_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """複数研究室の類似研究室を1回の行列積で求める（インデックスに無い研究室は結果に含めない）"""
+        data = self._data
+        if data is None or data.size == 0 or k <= 0:
+            return {}
+
+        targets = [(lab_id, data.row_of(lab_id)) for lab_id in lab_ids]
+        targets = [(lab_id, row) for lab_id, row in targets if row is not None]
+        if not targets:
+            return {}
+
+        target_rows = np.array([row for _, row in targets], dtype=np.int64)
+        scores = data.matrix[target_rows] @ data.matrix.T
+        # 自分自身と除外対象は選ばない
+        scores[np.arange(len(targets)), target_rows] = -np.inf
+        mask = self._filter_mask(data, None, None, exclude_ids)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+
+        results = {}
+        for i, (lab_id, _) in enumerate(targets):
+            rows = self._top_k(scores[i], k)
+            results[lab_id] = [
+                (int(data.ids[row]), float(scores[i, row]))
+                for row in rows
+                if np.isfinite(scores[i, row])
+            ]
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """インデックスの統計情報"""
+        data = self._data
+        if data is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "labs": data.size,
+            "dimension": int(data.matrix.shape[1]) if data.size else 0,
+            "matrix_bytes": int(data.matrix.nbytes),
+            "quantization": self.quantization,
+            "code_bytes": data.codes.nbytes if data.codes is not None else 0,
+            "version": data.version,
+            "source": data.source,
+            "stale": self._stale
+        }
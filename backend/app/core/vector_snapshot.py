@@ -0,0 +1,192 @@
+# backend/app/core/vector_snapshot.py
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.data_version import catalog_fingerprint
+from app.core.vector_index import IndexData, read_index_data
+
+try:
+    import fcntl
+except ImportError:  # Windowsではロックなし（単一ワーカー前提）
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+_ARRAYS = ("ids", "matrix", "region_codes", "field_codes")
+_CURRENT_FILE = "CURRENT"
+_LOCK_FILE = ".lock"
+_META_FILE = "meta.json"
+
+
+class SnapshotStore:
+    """研究室埋め込みのディスク上スナップショット
+
+    ディレクトリ構成:
+        <directory>/CURRENT            最新スナップショット名（os.replace で原子的に更新）
+        <directory>/snap-<ns>-<fp>/    ids.npy, matrix.npy, region_codes.npy,
+                                       field_codes.npy, meta.json
+
+    各ワーカーは np.load(mmap_mode="r") で開くため、行列はページキャッシュ経由で
+    全プロセスに共有され、ワーカー数に比例してメモリが増えない。
+    """
+
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """エクスポートをワーカー間で排他（最初の1つだけが書き出す）"""
+        with open(self._path(_LOCK_FILE), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def current_name(self) -> Optional[str]:
+        """最新スナップショット名（無ければ None）"""
+        try:
+            with open(self._path(_CURRENT_FILE), encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if name and os.path.isdir(self._path(name)) else None
+
+    def read_meta(self, name: str) -> Dict[str, Any]:
+        with open(self._path(name, _META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _current_fingerprint(self) -> Optional[str]:
+        name = self.current_name()
+        if name is None:
+            return None
+        try:
+            meta = self.read_meta(name)
+        except (OSError, ValueError):
+            return None
+        if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            return None
+        return meta.get("fingerprint")
+
+    def export(self, data: IndexData, fingerprint: str) -> str:
+        """インデックスの中身を新しいスナップショットとして書き出し、CURRENT を切り替える"""
+        name = f"snap-{time.time_ns():020d}-{fingerprint[:12]}"
+        tmp_dir = self._path(f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+
+        try:
+            for array_name in _ARRAYS:
+                np.save(
+                    os.path.join(tmp_dir, f"{array_name}.npy"),
+                    np.ascontiguousarray(getattr(data, array_name))
+                )
+
+            meta = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "fingerprint": fingerprint,
+                "count": data.size,
+                "dimension": int(data.matrix.shape[1]) if data.matrix.ndim == 2 else 0,
+                "regions": data.regions,
+                "fields": data.fields,
+                "created_at": time.time()
+            }
+            with open(os.path.join(tmp_dir, _META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            final_dir = self._path(name)
+            if os.path.exists(final_dir):
+                shutil.rmtree(final_dir)
+            os.rename(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # 読み手は CURRENT を見るので、ディレクトリが揃ってから原子的に切り替える
+        current_tmp = self._path(f"{_CURRENT_FILE}.{uuid.uuid4().hex}")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(current_tmp, self._path(_CURRENT_FILE))
+
+        logger.info(f"Exported vector snapshot {name} ({data.size} labs)")
+        self._prune(keep_name=name)
+        return name
+
+    def open(self, name: Optional[str] = None) -> IndexData:
+        """スナップショットをメモリマップで開く"""
+        name = name or self.current_name()
+        if name is None:
+            raise FileNotFoundError(f"No vector snapshot in {self.directory}")
+
+        meta = self.read_meta(name)
+        arrays = {
+            array_name: np.load(self._path(name, f"{array_name}.npy"), mmap_mode="r")
+            for array_name in _ARRAYS
+        }
+        return IndexData(
+            ids=arrays["ids"],
+            matrix=arrays["matrix"],
+            region_codes=arrays["region_codes"],
+            regions=list(meta["regions"]),
+            field_codes=arrays["field_codes"],
+            fields=list(meta["fields"]),
+            version=0,
+            source=f"snapshot:{name}"
+        )
+
+    def load_or_export(self, db: Session) -> IndexData:
+        """DBのフィンガープリントと一致するスナップショットを開く（無ければ書き出す）"""
+        fingerprint = catalog_fingerprint(db)
+
+        if self._current_fingerprint() != fingerprint:
+            with self._exclusive():
+                # ロック待ちの間に他ワーカーが書き出していれば再利用する
+                if self._current_fingerprint() != fingerprint:
+                    self.export(read_index_data(db), fingerprint)
+
+        return self.open()
+
+    def list_snapshots(self) -> List[str]:
+        return sorted(
+            entry for entry in os.listdir(self.directory)
+            if entry.startswith("snap-") and os.path.isdir(self._path(entry))
+        )
+
+    def _prune(self, keep_name: str):
+        """古いスナップショットを削除（開いているワーカーのマップはそのまま有効）"""
+        snapshots = [name for name in self.list_snapshots() if name != keep_name]
+        for name in snapshots[:max(len(snapshots) - (self.keep - 1), 0)]:
+            shutil.rmtree(self._path(name), ignore_errors=True)
+
+
+def main():
+    """スナップショットを手動で書き出す（デプロイ時の事前生成用）"""
+    from app.config import settings
+    from app.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    store = SnapshotStore(settings.VECTOR_SNAPSHOT_DIR or "data/vector_snapshots")
+    with SessionLocal() as db:
+        name = store.export(read_index_data(db), catalog_fingerprint(db))
+    print(f"✅ Exported {name}")
+
+
+if __name__ == "__main__":
+    main()
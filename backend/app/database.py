@@ -1,21 +1,45 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional, Union
 # backend/app/database.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 import logging
 
 from app.config import settings
+from app.core.pool_metrics import PoolInstrumentation
 
 logger = logging.getLogger(__name__)
 
+
+def _pool_options(pool_size: int, max_overflow: int) -> dict:
+    """接続プール設定（プロセスごと・エンジンごとに確保される）
+
+    各ワーカーは同期・非同期の2つのエンジンを持つため、1ワーカーの最大接続数は
+    (DB_POOL_SIZE + DB_MAX_OVERFLOW) + (DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW)。
+    """
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DATABASE_ECHO,  # SQL文をログ出力（DEBUG とは独立に設定）
+    }
+
+
+# 接続プールの計測（/metrics の db_pool.sync / db_pool.async）
+sync_pool_metrics = PoolInstrumentation("sync")
+async_pool_metrics = PoolInstrumentation("async")
+
 # SQLAlchemy設定
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG,  # SQL文をログ出力（開発時のみ）
+    poolclass=sync_pool_metrics.pool_class(QueuePool),
+    **_pool_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 )
+sync_pool_metrics.attach(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -36,6 +60,87 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# === 非同期データベース（asyncpg） ===
+
+def to_async_url(url: str) -> str:
+    """同期ドライバ用の接続URLを asyncpg 用に変換"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def _register_vector_codec(dbapi_connection, connection_record):
+    """pgvector の vector 型を同期ドライバと同じ文字列形式（'[1,2,...]'）で送受信する"""
+    dbapi_connection.await_(dbapi_connection.driver_connection.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=lambda value: value,
+        decoder=lambda value: value,
+        format="text"
+    ))
+
+
+# 同期・非同期どちらのセッションでも使える処理の型
+AnySession = Union[Session, AsyncSession]
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """非同期エンジンを取得（asyncpg が必要なため初回利用時に作成）"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+            poolclass=async_pool_metrics.pool_class(AsyncAdaptedQueuePool),
+            **_pool_options(settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW)
+        )
+        event.listen(_async_engine.sync_engine, "connect", _register_vector_codec)
+        async_pool_metrics.attach(_async_engine.sync_engine)
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """非同期セッションを作成"""
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """非同期データベースセッションを取得"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_async_engine():
+    """非同期エンジンの接続プールを解放"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
+async def execute(db: AnySession, statement, params: Optional[dict] = None):
+    """SQLを実行（AsyncSession の場合はイベントループを塞がない）"""
+    if isinstance(db, AsyncSession):
+        return await db.execute(statement, params)
+    return db.execute(statement, params)
+
+
+async def fetch_all(db: AnySession, statement, params: Optional[dict] = None) -> list:
+    """SQLを実行して全行を取得（AsyncSession の場合はイベントループを塞がない）"""
+    result = await execute(db, statement, params)
+    return result.fetchall()
+
+
 async def init_db():
     """データベース初期化"""
     try:
@@ -43,6 +148,8 @@ async def init_db():
         with engine.connect() as conn:
             # pgvector拡張を作成（存在しない場合）
             conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            # 語句検索の部分一致インデックス用
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             conn.commit()
             logger.info("✅ pgvector extension enabled")
         
@@ -50,6 +157,23 @@ async def init_db():
         Base.metadata.create_all(bind=engine)
         logger.info("✅ Database tables created")
         
+        # 既存テーブルへの短縮埋め込み列の追加
+        with engine.connect() as conn:
+            conn.execute(text(
+                "ALTER TABLE research_labs ADD COLUMN IF NOT EXISTS embedding_short "
+                f"vector({settings.EMBEDDING_SHORT_DIMENSION})"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_research_labs_embedding_short_hnsw "
+                "ON research_labs USING hnsw (embedding_short vector_cosine_ops)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_research_labs_lexical_trgm ON research_labs USING gin "
+                "((name || ' ' || research_theme || ' ' || research_content || ' ' || COALESCE(keywords, '')) "
+                "gin_trgm_ops)"
+            ))
+            conn.commit()
+        
         # データ初期化の確認
         await check_and_load_initial_data()
         
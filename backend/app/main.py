@@ -6,8 +6,16 @@ import uvicorn
 from contextlib import asynccontextmanager
 
 from app.api.endpoints import search, labs, universities
-from app.database import engine, init_db
+from app.database import engine, init_db, SessionLocal, close_async_engine
 from app.config import settings
+from app.core.semantic_search import search_engine
+from app.core.metrics import metrics
+from app.core.background import periodic_tasks
+from app.core.data_version import data_version
+from app.core.search_log_buffer import search_log_buffer
+from app.core.popular_queries import popular_queries
+from app.core.search_stats import search_stats_rollup
+from app.core.suggestion_index import suggestion_index
 
 
 @asynccontextmanager
@@ -19,9 +27,80 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("✅ Database initialized")
     
+    # よく使われるクエリ埋め込みを事前に読み込み、共有テーブルを定期的に整理
+    await search_engine.cache.warm_up(settings.QUERY_EMBEDDING_PREFETCH_LIMIT)
+    periodic_tasks.start(
+        "query_embedding_maintenance",
+        settings.QUERY_EMBEDDING_MAINTENANCE_INTERVAL_SECONDS,
+        lambda: search_engine.cache.maintain(settings.QUERY_EMBEDDING_MAX_ROWS)
+    )
+    
+    # 他ワーカー・データローダーによる研究室データの更新を検出
+    await data_version.poll(SessionLocal)
+    periodic_tasks.start(
+        "data_version_poll",
+        settings.DATA_VERSION_POLL_SECONDS,
+        lambda: data_version.poll(SessionLocal)
+    )
+    
+    # 粗検索用の短縮埋め込みが無い研究室を補完（他のワーカーが実行中なら任せる）
+    await search_engine.run_short_embedding_backfill()
+    
+    # VECTOR_SEARCH_BACKEND=memory の場合はインメモリインデックスを構築
+    await search_engine.load_vector_index()
+    
+    # 類似研究室テーブルを作成・更新（初回は起動直後にバックグラウンドで実行）
+    periodic_tasks.start(
+        "lab_neighbors_refresh",
+        settings.LAB_NEIGHBORS_REFRESH_SECONDS,
+        search_engine.refresh_lab_neighbors,
+        run_immediately=True
+    )
+    
+    # 検索ログの書き込みループを開始（月別パーティションは集計タスクが作成し、不足時は書き込み側で作成）
+    search_log_buffer.start()
+    
+    # 人気クエリランキングを復元し、全ワーカー分を定期的に合算
+    await popular_queries.sync_async(SessionLocal)
+    periodic_tasks.start(
+        "popular_queries_sync",
+        settings.POPULAR_QUERIES_SYNC_SECONDS,
+        lambda: popular_queries.sync_async(SessionLocal)
+    )
+    
+    # 研究室・大学のデータと人気クエリから検索候補インデックスを構築し、変更があれば更新
+    await suggestion_index.refresh_async(SessionLocal, popular_queries.top(settings.POPULAR_QUERIES_CAPACITY))
+    periodic_tasks.start(
+        "suggestion_index_refresh",
+        settings.SUGGESTION_INDEX_REFRESH_SECONDS,
+        lambda: suggestion_index.refresh_async(SessionLocal, popular_queries.top(settings.POPULAR_QUERIES_CAPACITY))
+    )
+    
+    # 検索ログを時間別・日別の集計に反映し、月別パーティションの作成と保持期間を過ぎたパーティションの削除も行う
+    periodic_tasks.start(
+        "search_stats_rollup",
+        settings.SEARCH_STATS_ROLLUP_SECONDS,
+        lambda: search_stats_rollup.run(SessionLocal),
+        run_immediately=True
+    )
+    
     yield
     
     print("🛑 Shutting down Research Lab Finder API...")
+    
+    await periodic_tasks.stop()
+    
+    # 未書き込みの検索ログを書き出す
+    await search_log_buffer.close()
+    
+    # 未反映の人気クエリの検索回数を書き出す
+    await popular_queries.sync_async(SessionLocal)
+    
+    # 埋め込みAPIの接続を解放
+    await search_engine.close()
+    
+    # 非同期DBの接続プールを解放
+    await close_async_engine()
 
 
 # FastAPIアプリケーション作成
@@ -41,6 +120,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # ルーター登録
@@ -77,6 +157,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """プロセス内メトリクス（キャッシュヒット率など）"""
+    return metrics.snapshot()
+
 # デバッグ用メイン関数
 if __name__ == "__main__":
     uvicorn.run(
@@ -1,5 +1,6 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Float
+from sqlalchemy import BigInteger, Boolean, Column, Integer, JSON, Sequence, SmallInteger, String, Text, ForeignKey, DateTime, Float
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
@@ -44,6 +45,7 @@ class ResearchLab(Base):
     
     # ベクトル検索用の埋め込み
     embedding = Column(Vector(settings.EMBEDDING_DIMENSION))
+    embedding_short = Column(Vector(settings.EMBEDDING_SHORT_DIMENSION))  # 粗検索用の短縮版
     
     # メタデータ
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -59,12 +61,89 @@ class ResearchLab(Base):
 class SearchLog(Base):
     """検索ログモデル"""
     __tablename__ = "search_logs"
+    # 月別のレンジパーティション（パーティションは app/core/search_log_partitions.py で作成・削除）
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
     
-    id = Column(Integer, primary_key=True, index=True)
+    # パーティションキーを主キーに含める必要がある（id は SERIAL と同じシーケンスから採番）
+    id = Column(Integer, Sequence("search_logs_id_seq"), primary_key=True)
     query = Column(Text, nullable=False)
     results_count = Column(Integer, nullable=False)
     search_time_ms = Column(Float)  # 検索時間（ミリ秒）
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<SearchLog(id={self.id}, query='{self.query[:50]}...', results={self.results_count})>"
+
+
+class QueryEmbedding(Base):
+    """クエリ埋め込みキャッシュモデル（全ワーカーで共有）"""
+    __tablename__ = "query_embeddings"
+    
+    query_hash = Column(String(64), primary_key=True)  # 正規化クエリ+モデル名のSHA-256
+    model = Column(String(100), nullable=False)
+    query_text = Column(Text, nullable=False)
+    embedding = Column(Vector(settings.EMBEDDING_DIMENSION), nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    def __repr__(self):
+        return f"<QueryEmbedding(query='{self.query_text[:50]}', model='{self.model}', hits={self.hit_count})>"
+
+
+class LabNeighbor(Base):
+    """類似研究室モデル（研究室ごとに事前計算した上位N件）"""
+    __tablename__ = "lab_neighbors"
+    
+    lab_id = Column(Integer, ForeignKey("research_labs.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(SmallInteger, primary_key=True)  # 類似度順位（1始まり）
+    neighbor_id = Column(Integer, ForeignKey("research_labs.id", ondelete="CASCADE"), nullable=False, index=True)
+    similarity = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<LabNeighbor(lab_id={self.lab_id}, rank={self.rank}, neighbor_id={self.neighbor_id})>"
+
+
+class PopularQuery(Base):
+    """人気検索クエリの集計モデル（全ワーカーの検索回数を時間減衰付きで合算）"""
+    __tablename__ = "popular_queries"
+    
+    query = Column(Text, primary_key=True)  # 正規化済みクエリ
+    score = Column(Float, nullable=False)  # updated_at 時点の減衰済みスコア
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<PopularQuery(query='{self.query[:50]}', score={self.score:.2f})>"
+
+
+class SearchStatsRollupMixin:
+    """検索統計の集計列（時間別・日別で共通）"""
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # 集計期間の開始時刻
+    search_count = Column(Integer, nullable=False)
+    results_sum = Column(BigInteger, nullable=False)
+    latency_count = Column(Integer, nullable=False)  # 検索時間が記録された件数
+    latency_sum = Column(Float, nullable=False)
+    latency_min = Column(Float)
+    latency_max = Column(Float)
+    latency_sketch = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)  # 検索時間の分位点スケッチ（バケット → 件数）
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SearchStatsHourly(SearchStatsRollupMixin, Base):
+    """検索統計の時間別集計モデル"""
+    __tablename__ = "search_stats_hourly"
+    
+    finalized = Column(Boolean, nullable=False, default=False)  # 以降は生ログから再集計しない
+    
+    def __repr__(self):
+        return f"<SearchStatsHourly(bucket_start={self.bucket_start}, searches={self.search_count})>"
+
+
+class SearchStatsDaily(SearchStatsRollupMixin, Base):
+    """検索統計の日別集計モデル（時間別集計をマージ）"""
+    __tablename__ = "search_stats_daily"
     
     def __repr__(self):
-        return f"<SearchLog(id={self.id}, query='{self.query[:50]}...', results={self.results_count})>"
\ No newline at end of file
+        return f"<SearchStatsDaily(bucket_start={self.bucket_start}, searches={self.search_count})>"
@@ -1,6 +1,6 @@
 # backend/app/schemas.py
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -28,6 +28,13 @@ class Region(str, Enum):
     KYUSHU = "九州"
 
 
+class SearchMode(str, Enum):
+    """検索方式"""
+    VECTOR = "vector"    # 埋め込みベクトルのみ
+    HYBRID = "hybrid"    # 語句一致とベクトルをRRFで統合
+    LEXICAL = "lexical"  # 語句一致のみ（埋め込みAPIを使わない）
+
+
 # === レスポンススキーマ ===
 
 class UniversityBase(BaseModel):
@@ -112,6 +119,8 @@ class SearchRequest(BaseModel):
     region_filter: Optional[List[str]] = Field(None, description="地域フィルター")
     field_filter: Optional[List[str]] = Field(None, description="研究分野フィルター")
     min_similarity: float = Field(0.2, ge=0.0, le=1.0, description="最小類似度（0-1）")
+    mode: SearchMode = Field(SearchMode.VECTOR, description="検索方式（vector / hybrid / lexical）")
+    lexical_weight: float = Field(0.3, ge=0.0, le=1.0, description="hybrid 時の語句一致の重み（0-1）")
     
     @validator('query')
     def validate_query(cls, v):
@@ -133,10 +142,52 @@ class SearchResponse(BaseModel):
         from_attributes = True
 
 
+class SimilarLabsBatchRequest(BaseModel):
+    """類似研究室一括取得リクエスト"""
+    lab_ids: List[int] = Field(..., min_length=1, max_length=50, description="対象研究室IDのリスト")
+    limit: int = Field(5, ge=1, le=20, description="研究室ごとの類似研究室数")
+    exclude_input: bool = Field(False, description="入力した研究室を類似研究室から除外")
+
+
+class SimilarLabsBatchResponse(BaseModel):
+    """類似研究室一括取得レスポンス（結果は対象研究室IDごと）"""
+    results: Dict[int, List[ResearchLabSearchResult]]
+    missing_ids: List[int] = Field(default_factory=list, description="存在しない研究室ID")
+    no_embedding_ids: List[int] = Field(default_factory=list, description="埋め込みベクトル未生成の研究室ID")
+
+
+# 研究室一括取得で1回に指定できるIDの上限
+MAX_LAB_BATCH_IDS = 100
+
+
+class LabBatchRequest(BaseModel):
+    """研究室一括取得リクエスト"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_LAB_BATCH_IDS, description="研究室IDのリスト（この順で返す）")
+
+
+class LabBatchResponse(BaseModel):
+    """研究室一括取得レスポンス"""
+    labs: List[ResearchLab]
+    missing_ids: List[int] = Field(default_factory=list, description="存在しない研究室ID")
+
+
+class UniversityLabStats(BaseModel):
+    """大学の研究室数（分野別）"""
+    total_labs: int
+    labs_by_field: Dict[str, int]
+
+
+class LabPageResponse(BaseModel):
+    """研究室詳細ページ用の複合レスポンス"""
+    lab: ResearchLab
+    similar_labs: List[ResearchLabSearchResult]
+    university_stats: UniversityLabStats
+
+
 class SearchSuggestion(BaseModel):
     """検索候補"""
     text: str
-    category: str  # 'keyword', 'field', 'university'
+    category: str  # 'keyword', 'field', 'lab', 'university'
 
 
 # === その他のスキーマ ===
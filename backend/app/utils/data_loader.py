@@ -220,10 +220,10 @@ async def generate_embeddings_safe(db: Session):
                 combined_text = f"{lab.research_theme} {lab.research_content} {lab.speciality} {lab.keywords}"
                 
                 # 埋め込みベクトルを生成
-                embedding_vector = await search_engine.get_embedding(combined_text)
+                embedding_vector = await search_engine.get_embedding(combined_text, use_cache=False)
                 
-                # データベースに保存
-                lab.embedding = embedding_vector
+                # データベースに保存（粗検索用の短縮版も同時に設定）
+                search_engine.set_lab_embedding(lab, embedding_vector)
                 embeddings_created += 1
                 
                 if embeddings_created % 5 == 0:
@@ -255,10 +255,8 @@ class TestSemanticSearchEngine:
     @pytest.mark.asyncio
     async def test_get_embedding_success(self, search_engine):
         """埋め込みベクトル生成成功テスト"""
-        with patch('openai.Embedding.create') as mock_create:
-            mock_create.return_value = {
-                'data': [{'embedding': [0.1] * 1536}]
-            }
+        with patch.object(search_engine.provider, 'embed', new_callable=AsyncMock) as mock_embed:
+            mock_embed.return_value = [[0.1] * 1536]
             
             result = await search_engine.get_embedding("テストテキスト")
             assert len(result) == 1536
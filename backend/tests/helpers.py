@@ -0,0 +1,114 @@
+# backend/tests/helpers.py
+"""テスト共通のフェイクセッションと SQLite のセッションファクトリ"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import ResearchLab, University
+
+
+class FakeResult:
+    """Session.execute の結果の代わり"""
+
+    def __init__(self, rows=(), scalar=None, rowcount=0):
+        self.rows = list(rows)
+        self._scalar = scalar
+        self.rowcount = rowcount
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def fetchall(self):
+        return self.rows
+
+    def scalar(self):
+        return self._scalar
+
+
+class FakeSession:
+    """実行したSQLとコミット回数を記録するセッション
+
+    どのSQLにも rows を返す。SQLごとに変える場合は respond を上書きする（行のリストか FakeResult を返す）。
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.calls = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, statement, params=None):
+        self.calls.append((statement, params))
+        result = self.respond(statement, params)
+        return result if isinstance(result, FakeResult) else FakeResult(result)
+
+    def respond(self, statement, params):
+        return self.rows
+
+    def statements(self):
+        return [statement for statement, _ in self.calls]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def add_universities(db):
+    """東京大学（関東）と京都大学（関西）を追加して返す"""
+    tokyo = University(name="東京大学", type="national", prefecture="東京都", region="関東")
+    kyoto = University(name="京都大学", type="national", prefecture="京都府", region="関西")
+    db.add_all([tokyo, kyoto])
+    db.flush()
+    return tokyo, kyoto
+
+
+def make_lab(university, **fields):
+    """必須項目を埋めた研究室"""
+    values = {"name": "研究室", "research_theme": "テーマ", "research_content": "内容", "research_field": "工学"}
+    values.update(fields)
+    return ResearchLab(university_id=university.id, **values)
+
+
+@contextmanager
+def sqlite_session_factory(seed=None):
+    """スキーマを作成したインメモリ SQLite のセッションファクトリ
+
+    seed(db) でデータを投入してからコミットする。実行したSQLは factory.statements に記録する。
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+
+    if seed is not None:
+        with factory() as db:
+            seed(db)
+            db.commit()
+
+    factory.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: factory.statements.append(args[2]))
+    try:
+        yield factory
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def seed():
+    """session_factory に投入するデータ（テストモジュールで上書きする）"""
+    return None
+
+
+@pytest.fixture
+def session_factory(seed):
+    with sqlite_session_factory(seed) as factory:
+        yield factory
@@ -0,0 +1,50 @@
+# backend/tests/test_async_db.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db_benchmark import percentile
+from app.database import fetch_all, to_async_url
+
+from helpers import FakeResult, FakeSession
+
+
+class TestAsyncDatabase:
+    """非同期DBレイヤーのテスト"""
+
+    @pytest.mark.parametrize("url,expected", [
+        ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+        ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+        ("postgres://u@db/app", "postgresql+asyncpg://u@db/app"),
+        ("postgresql+asyncpg://u@db/app", "postgresql+asyncpg://u@db/app"),
+    ])
+    def test_to_async_url(self, url, expected):
+        """同期ドライバのURLを asyncpg 用に変換"""
+        assert to_async_url(url) == expected
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_awaits_async_session(self, monkeypatch):
+        """AsyncSession では execute を await する"""
+        db = AsyncSession()
+        calls = []
+
+        async def fake_execute(statement, params=None):
+            calls.append(params)
+            return FakeResult([(1,)])
+
+        monkeypatch.setattr(db, "execute", fake_execute)
+
+        assert await fetch_all(db, text("SELECT :x"), {"x": 1}) == [(1,)]
+        assert calls == [{"x": 1}]
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_sync_session(self):
+        """同期セッションもそのまま使える"""
+        assert await fetch_all(FakeSession([(2,)]), text("SELECT 2")) == [(2,)]
+
+    def test_percentile(self):
+        """ベンチマークのパーセンタイル計算"""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile([], 95) == 0.0
@@ -0,0 +1,84 @@
+# backend/tests/test_catalog_stats.py
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.catalog_stats import CatalogStatsService, build_catalog_stats
+from app.core.data_version import DataVersion
+
+from helpers import FakeSession
+
+LATEST = datetime(2024, 4, 1, tzinfo=timezone.utc)
+
+
+def _group(region=None, field=None, count=0, latest=None):
+    return SimpleNamespace(
+        region=region,
+        research_field=field,
+        lab_count=count,
+        latest_update=latest,
+        no_region=int(region is None),
+        no_field=int(field is None),
+        total_universities=3
+    )
+
+
+ROWS = [
+    _group(region="関東", count=4, latest=LATEST),
+    _group(region="関西", count=2, latest=LATEST),
+    _group(field="工学", count=5, latest=LATEST),
+    _group(field="医学", count=1, latest=LATEST),
+    _group(count=6, latest=LATEST)
+]
+
+
+class TestCatalogStats:
+    """研究室・大学の集計サービスのテスト"""
+
+    def test_build_from_grouping_sets(self):
+        """GROUPING SETS の行を地域別・分野別・全体に振り分ける"""
+        stats = build_catalog_stats(ROWS, version=7)
+
+        assert stats.total_universities == 3
+        assert stats.total_labs == 6
+        assert stats.labs_by_region == {"関東": 4, "関西": 2}
+        assert stats.labs_by_field == {"工学": 5, "医学": 1}
+        assert stats.latest_update == LATEST
+        assert stats.version == 7
+
+    def test_empty_catalog(self):
+        """研究室が無くても大学数は返す"""
+        stats = build_catalog_stats([_group(count=0)], version=0)
+
+        assert stats.total_labs == 0
+        assert stats.labs_by_region == {}
+
+    @pytest.mark.asyncio
+    async def test_cached_until_version_changes(self):
+        """データバージョンが変わるまで集計し直さない"""
+        version = DataVersion()
+        service = CatalogStatsService(version)
+        db = FakeSession(ROWS)
+
+        first = await service.get(db)
+        second = await service.get(db)
+        assert first is second
+        assert len(db.calls) == 1
+
+        version.bump("test")
+        third = await service.get(db)
+        assert third is not first
+        assert len(db.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_refresh(self):
+        """同時に届いたリクエストは1回の集計を共有する"""
+        service = CatalogStatsService(DataVersion())
+        db = FakeSession(ROWS)
+
+        results = await asyncio.gather(*(service.get(db) for _ in range(10)))
+
+        assert len(db.calls) == 1
+        assert all(result is results[0] for result in results)
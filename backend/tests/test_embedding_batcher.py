@@ -0,0 +1,91 @@
+# backend/tests/test_embedding_batcher.py
+import asyncio
+
+import pytest
+
+from app.core.embedding_batcher import EmbeddingBatcher
+from app.core.embedding_client import EmbeddingProviderError
+
+
+class RecordingEmbedder:
+    """呼び出しごとの入力を記録するフェイク"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [[float(len(text))] for text in texts]
+
+
+class TestEmbeddingBatcher:
+    """マイクロバッチャーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_batched(self):
+        """同時の呼び出しが1回のリクエストにまとめられるテスト"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=10, max_wait_ms=5)
+
+        results = await asyncio.gather(*[batcher.embed(t) for t in ["a", "bb", "ccc", "bb"]])
+
+        assert results == [[1.0], [2.0], [3.0], [2.0]]
+        assert embedder.calls == [["a", "bb", "ccc"]]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_flushes_immediately(self):
+        """最大件数に達したら待たずに送信されるテスト"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=10_000)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("bb")),
+            timeout=1
+        )
+
+        assert results == [[1.0], [2.0]]
+        assert embedder.calls == [["a", "bb"]]
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        """API失敗時に待機中の全呼び出しへ例外が伝わるテスト"""
+        batcher = EmbeddingBatcher(RecordingEmbedder(fail=True), max_batch_size=10, max_wait_ms=1)
+
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_short_response_fails_all_waiters(self):
+        """返ってきたベクトルが入力より少なくても待機中の呼び出しを取り残さないテスト"""
+        async def short_embedder(texts):
+            return [[1.0]] * (len(texts) - 1)
+
+        batcher = EmbeddingBatcher(short_embedder, max_batch_size=10, max_wait_ms=1)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True),
+            timeout=1
+        )
+
+        assert all(isinstance(r, EmbeddingProviderError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_skipped(self):
+        """キャンセルされた呼び出しは送信対象から外れるテスト"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=10, max_wait_ms=20)
+
+        cancelled = asyncio.create_task(batcher.embed("gone"))
+        kept = asyncio.create_task(batcher.embed("kept"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        assert await kept == [4.0]
+        assert embedder.calls == [["kept"]]
@@ -0,0 +1,122 @@
+# backend/tests/test_embedding_cache.py
+import pytest
+
+from app.core.embedding_cache import (
+    EmbeddingCache,
+    EmbeddingStore,
+    FileEmbeddingStore,
+    make_cache_key,
+    normalize_query,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNormalizeQuery:
+    """クエリ正規化のテスト"""
+
+    def test_full_width_and_whitespace(self):
+        """全角英数字・全角空白・連続空白が統一されるテスト"""
+        assert normalize_query("　ＡＩ　と\n ロボット  ") == "AI と ロボット"
+
+    def test_same_key_for_equivalent_queries(self):
+        """表記揺れのあるクエリが同じキーになるテスト"""
+        a = make_cache_key(normalize_query("がん治療１"), "model")
+        b = make_cache_key(normalize_query(" がん治療1 "), "model")
+        c = make_cache_key(normalize_query("がん治療1"), "other-model")
+        assert a == b
+        assert a != c
+
+
+class TestEmbeddingCache:
+    """埋め込みキャッシュのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss(self):
+        """ヒット・ミスのカウントテスト"""
+        cache = EmbeddingCache(max_entries=4)
+
+        assert await cache.get("k") is None
+        await cache.set("k", "text", "model", [0.1, 0.2])
+        assert await cache.get("k") == [0.1, 0.2]
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """最も古く使われたエントリから追い出されるテスト"""
+        cache = EmbeddingCache(max_entries=2)
+        await cache.set("a", "a", "m", [1.0])
+        await cache.set("b", "b", "m", [2.0])
+        await cache.get("a")
+        await cache.set("c", "c", "m", [3.0])
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == [1.0]
+        assert await cache.get("c") == [3.0]
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """TTL経過後はミスになるテスト"""
+        clock = FakeClock()
+        cache = EmbeddingCache(max_entries=2, ttl_seconds=10, clock=clock)
+        await cache.set("a", "a", "m", [1.0])
+
+        clock.now = 9.9
+        assert await cache.get("a") == [1.0]
+        clock.now = 10.0
+        assert await cache.get("a") is None
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_file_store_survives_restart(self, tmp_path):
+        """永続層に保存したエントリが再起動後も参照できるテスト"""
+        path = str(tmp_path / "cache")
+        cache = EmbeddingCache(store=FileEmbeddingStore(path, ttl_seconds=60))
+        await cache.set("a", "a", "m", [0.5, 0.25])
+        await cache.close()
+
+        restarted = EmbeddingCache(store=FileEmbeddingStore(path, ttl_seconds=60))
+        assert await restarted.get("a") == [0.5, 0.25]
+        assert restarted.stats()["store_hits"] == 1
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_and_maintain(self):
+        """永続層からのウォームアップと、ヒットしたキーの反映テスト"""
+        class FakeStore(EmbeddingStore):
+            def __init__(self):
+                self.touched = []
+
+            async def get(self, key):
+                return None
+
+            async def put(self, key, text, model, embedding):
+                pass
+
+            async def touch(self, keys):
+                self.touched.extend(keys)
+
+            async def prefetch(self, limit):
+                return [("new", [2.0]), ("old", [1.0])][:limit]
+
+            async def evict(self, max_rows):
+                return 3
+
+        store = FakeStore()
+        cache = EmbeddingCache(max_entries=2, store=store)
+        assert await cache.warm_up(10) == 2
+        assert await cache.get("new") == [2.0]
+
+        assert await cache.maintain(max_rows=100) == 3
+        assert store.touched == ["new"]
@@ -0,0 +1,84 @@
+# backend/tests/test_embedding_client.py
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.embedding_client import OpenAIEmbeddingProvider, EmbeddingProviderError
+
+
+def make_provider(handler, **kwargs):
+    return OpenAIEmbeddingProvider(
+        api_key="test-key",
+        base_url="http://fake-embeddings.local/v1",
+        transport=httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+class TestOpenAIEmbeddingProvider:
+    """非同期埋め込みプロバイダーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_embed_returns_vectors_in_input_order(self):
+        """レスポンスの index 順に並べ直して返すテスト"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            assert request.url.path == "/v1/embeddings"
+            assert request.headers["Authorization"] == "Bearer test-key"
+            data = [
+                {"index": i, "embedding": [float(i)] * 3}
+                for i in range(len(body["input"]))
+            ]
+            return httpx.Response(200, json={"data": list(reversed(data))})
+
+        provider = make_provider(handler)
+        result = await provider.embed(["a", "b", "c"], "test-model")
+        await provider.aclose()
+
+        assert result == [[0.0] * 3, [1.0] * 3, [2.0] * 3]
+
+    @pytest.mark.asyncio
+    async def test_embed_http_error(self):
+        """HTTPエラーがプロバイダーエラーに変換されるテスト"""
+        provider = make_provider(lambda request: httpx.Response(500))
+
+        with pytest.raises(EmbeddingProviderError):
+            await provider.embed(["a"], "test-model")
+        await provider.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("response", [
+        httpx.Response(200, content=b"<html>bad gateway</html>"),
+        httpx.Response(200, json={"error": "overloaded"}),
+        httpx.Response(200, json={"data": [{"embedding": [0.1]}]}),
+        httpx.Response(200, json={"data": None}),
+    ])
+    async def test_embed_malformed_response(self, response):
+        """200でも不正なレスポンスはプロバイダーエラーに変換されるテスト"""
+        provider = make_provider(lambda request: response)
+
+        with pytest.raises(EmbeddingProviderError):
+            await provider.embed(["a"], "test-model")
+        await provider.aclose()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """同時リクエスト数が上限を超えないテスト"""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"data": [{"index": 0, "embedding": [0.1]}]})
+
+        provider = make_provider(handler, max_concurrency=2)
+        await asyncio.gather(*[provider.embed(["q"], "test-model") for _ in range(6)])
+        await provider.aclose()
+
+        assert peak == 2
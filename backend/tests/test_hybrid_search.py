@@ -0,0 +1,178 @@
+# backend/tests/test_hybrid_search.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import semantic_search
+from app.core.embedding_cache import EmbeddingCache, make_cache_key
+from app.core.embedding_client import EmbeddingProvider, EmbeddingProviderError
+from app.core.rank_fusion import reciprocal_rank_fusion
+from app.core.semantic_search import SemanticSearchEngine
+
+from helpers import FakeSession
+
+
+def _row(lab_id: int, score: float):
+    return SimpleNamespace(
+        id=lab_id,
+        name=f"研究室{lab_id}",
+        professor_name=None,
+        department=None,
+        research_theme="テーマ",
+        research_content="内容",
+        research_field="工学",
+        speciality=None,
+        keywords=None,
+        lab_url=None,
+        university_name="テスト大学",
+        prefecture="東京都",
+        region="関東",
+        similarity_score=score
+    )
+
+
+class FailingProvider(EmbeddingProvider):
+    """常に失敗する（または応答が遅い）埋め込みプロバイダー"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def embed(self, texts, model, timeout=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        raise EmbeddingProviderError("provider down")
+
+    async def aclose(self):
+        pass
+
+
+class TestRankFusion:
+    """reciprocal rank fusion のテスト"""
+
+    def test_items_in_both_lists_rank_first(self):
+        """両方の順位リストに現れる研究室が上位になる"""
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], [0.5, 0.5])
+        assert [item for item, _ in fused][:2] == [1, 3]
+
+    def test_weight_zero_ignores_list(self):
+        """重み0のリストは順位に影響しない"""
+        fused = reciprocal_rank_fusion([[1, 2], [9, 8]], [1.0, 0.0])
+        assert [item for item, _ in fused] == [1, 2]
+
+
+class TestHybridSearch:
+    """ハイブリッド検索と語句検索フォールバックのテスト"""
+
+    def _engine(self, provider):
+        engine = SemanticSearchEngine(provider=provider, cache=EmbeddingCache(max_entries=8))
+        engine.batcher = None
+        engine.vector_index = None
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_lexical_when_provider_down(self, monkeypatch):
+        """埋め込みAPIが失敗したら語句検索の結果を返す"""
+        engine = self._engine(FailingProvider())
+
+        async def fake_lexical(query, limit, region_filter, field_filter):
+            return [_row(1, 0.9), _row(2, 0.5)]
+
+        monkeypatch.setattr(engine, "_search_lexical_isolated", fake_lexical)
+        fallbacks = engine.lexical_fallbacks.value
+
+        results, _ = await engine.search_labs(db=None, query="がん治療", limit=1)
+
+        assert [r["id"] for r in results] == [1]
+        assert engine.lexical_fallbacks.value == fallbacks + 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_provider_slow(self, monkeypatch):
+        """埋め込みAPIが遅い場合もタイムアウトで語句検索に切り替わる"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "EMBEDDING_FALLBACK_TIMEOUT", 0.01)
+        engine = self._engine(FailingProvider(delay=1.0))
+
+        async def fake_lexical(query, limit, region_filter, field_filter):
+            return [_row(5, 0.4)]
+
+        monkeypatch.setattr(engine, "_search_lexical_isolated", fake_lexical)
+
+        results, search_time = await engine.search_labs(db=None, query="ロボット", mode="hybrid")
+
+        assert [r["id"] for r in results] == [5]
+        assert search_time < 1000
+
+    @pytest.mark.asyncio
+    async def test_hybrid_fuses_both_rankings(self, monkeypatch):
+        """ベクトル検索と語句検索の結果が1つの順位に統合される"""
+        engine = self._engine(FailingProvider())
+
+        async def fake_embedding(query):
+            return [0.1, 0.2]
+
+        async def fake_lexical(query, limit, region_filter, field_filter):
+            return [_row(3, 0.8), _row(1, 0.3)]
+
+        async def fake_vector(db, *args):
+            return [_row(1, 0.7), _row(2, 0.6)]
+
+        monkeypatch.setattr(engine, "_get_query_embedding", fake_embedding)
+        monkeypatch.setattr(engine, "_search_lexical_isolated", fake_lexical)
+        monkeypatch.setattr(engine, "_search_pgvector", fake_vector)
+
+        results, _ = await engine.search_labs(
+            db=None, query="免疫", limit=3, mode="hybrid", lexical_weight=0.5
+        )
+
+        assert [r["id"] for r in results][0] == 1
+        assert {r["id"] for r in results} == {1, 2, 3}
+        # 両方にある研究室はベクトル側の類似度を表示する
+        assert results[0]["similarity_score"] == pytest.approx(0.7)
+
+    @pytest.mark.asyncio
+    async def test_hybrid_cache_hit_skips_lexical(self, monkeypatch):
+        """埋め込みと結果がキャッシュ済みなら語句検索のスレッドを始めない"""
+        engine = self._engine(FailingProvider())
+        await engine.cache.set(make_cache_key("免疫", engine.model), "免疫", engine.model, [0.1, 0.2])
+        lexical_calls = []
+
+        async def fake_lexical(query, limit, region_filter, field_filter):
+            lexical_calls.append(query)
+            return [_row(3, 0.8)]
+
+        async def fake_vector(db, *args):
+            return [_row(1, 0.7)]
+
+        monkeypatch.setattr(engine, "_search_lexical_isolated", fake_lexical)
+        monkeypatch.setattr(engine, "_search_pgvector", fake_vector)
+
+        first, _ = await engine.search_labs(db=None, query="免疫", mode="hybrid")
+        second, _ = await engine.search_labs(db=None, query="免疫", mode="hybrid")
+
+        assert second == first
+        assert lexical_calls == ["免疫"]
+
+
+class TestLexicalSearch:
+    """語句一致検索のテスト"""
+
+    def test_filters_with_trigram_index(self):
+        """pg_trgm のインデックスで絞り込めるよう <% と閾値の SET LOCAL を使う"""
+        engine = SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+        db = FakeSession()
+
+        engine._search_lexical(db, " がん治療 ", 10, ["関東"], None)
+
+        threshold, (query, params) = db.statements()[0], db.calls[1]
+        assert threshold is semantic_search._WORD_SIMILARITY_THRESHOLD_SQL
+        assert ":query <% (rl.name" in str(query)
+        assert params["query"] == "がん治療" and params["region_filter"] == ["関東"]
+
+    def test_blank_query(self):
+        """空白だけのクエリは検索しない"""
+        engine = SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+        db = FakeSession()
+
+        assert engine._search_lexical(db, "   ", 10, None, None) == []
+        assert db.calls == []
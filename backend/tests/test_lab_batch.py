@@ -0,0 +1,55 @@
+# backend/tests/test_lab_batch.py
+import pytest
+from fastapi import HTTPException
+
+from app.api.endpoints.labs import _parse_ids, fetch_labs_by_ids
+from app.schemas import MAX_LAB_BATCH_IDS
+
+from helpers import add_universities, make_lab
+
+pytest_plugins = ["helpers"]
+
+
+@pytest.fixture
+def seed():
+    def seed_labs(db):
+        tokyo, _ = add_universities(db)
+        db.add_all([make_lab(tokyo, id=lab_id, name=f"研究室{lab_id}") for lab_id in range(1, 11)])
+    return seed_labs
+
+
+class TestFetchLabsByIds:
+    """研究室一括取得のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order_and_reports_missing(self, session_factory):
+        """指定順に返し、存在しないIDを報告する"""
+        with session_factory() as db:
+            labs, missing = await fetch_labs_by_ids(db, [7, 99, 2, 5, 42])
+
+            assert [lab.id for lab in labs] == [7, 2, 5]
+            assert missing == [99, 42]
+
+    @pytest.mark.asyncio
+    async def test_single_query_with_university(self, session_factory):
+        """大学情報も含めて1回のクエリで取得する"""
+        with session_factory() as db:
+            session_factory.statements.clear()
+            labs, _ = await fetch_labs_by_ids(db, [3, 1, 3, 2])
+
+            assert [lab.id for lab in labs] == [3, 1, 2]
+            assert [lab.university.name for lab in labs] == ["東京大学"] * 3
+            assert len(session_factory.statements) == 1
+
+
+class TestParseIds:
+    """カンマ区切りIDの解析のテスト"""
+
+    def test_parses_comma_separated(self):
+        assert _parse_ids("3, 1,2,") == [3, 1, 2]
+
+    @pytest.mark.parametrize("value", ["", "1,a", ",".join(["1"] * (MAX_LAB_BATCH_IDS + 1))])
+    def test_rejects_invalid(self, value):
+        with pytest.raises(HTTPException) as error:
+            _parse_ids(value)
+        assert error.value.status_code == 400
@@ -0,0 +1,167 @@
+# backend/tests/test_lab_neighbors.py
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core import lab_neighbors
+from app.core.embedding_cache import EmbeddingCache
+from app.core.lab_neighbors import compute_neighbors
+from app.core.semantic_search import SemanticSearchEngine
+from helpers import FakeResult, FakeSession
+
+
+def _normalized(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestComputeNeighbors:
+    """類似研究室の一括計算のテスト"""
+
+    @pytest.mark.parametrize("block_size", [1, 7, 64, 1024])
+    def test_matches_full_similarity_matrix(self, block_size):
+        """ブロック分割しても全ペア類似度行列と同じ結果になる"""
+        matrix = _normalized(50, 16)
+        rows, scores = compute_neighbors(matrix, top_n=5, block_size=block_size)
+
+        full = matrix @ matrix.T
+        np.fill_diagonal(full, -np.inf)
+        expected = np.argsort(-full, axis=1, kind="stable")[:, :5]
+
+        np.testing.assert_array_equal(rows, expected)
+        np.testing.assert_allclose(scores, np.take_along_axis(full, expected, axis=1), rtol=1e-5)
+
+    def test_excludes_self(self):
+        """自分自身は近傍に含まれない"""
+        matrix = _normalized(10, 4)
+        rows, _ = compute_neighbors(matrix, top_n=9, block_size=3)
+        for i in range(10):
+            assert i not in rows[i]
+
+    def test_default_block_size_within_budget(self):
+        """既定のブロック行数はメモリ上限から決まり、結果は全ペア計算と同じ"""
+        assert lab_neighbors.block_rows(100_000) == 55
+        assert lab_neighbors.block_rows(100_000, memory_bytes=1) == 1
+
+        matrix = _normalized(50, 16)
+        rows, _ = compute_neighbors(matrix, top_n=5)
+        np.testing.assert_array_equal(rows, compute_neighbors(matrix, top_n=5, block_size=1)[0])
+
+    def test_top_n_larger_than_catalog(self):
+        """研究室数が少ない場合は n-1 件まで"""
+        rows, scores = compute_neighbors(_normalized(3, 4), top_n=20)
+        assert rows.shape == (3, 2)
+        assert compute_neighbors(_normalized(1, 4), top_n=20)[0].shape == (1, 0)
+
+
+class StaleSession(FakeSession):
+    """ロックが取れ、stale 件の研究室が古くなっているセッション"""
+
+    def __init__(self, stale):
+        super().__init__()
+        self.stale = stale
+
+    def respond(self, statement, params):
+        if statement is lab_neighbors._STALE_LABS_SQL:
+            return [(lab_id,) for lab_id in range(self.stale)]
+        return FakeResult(scalar=True)
+
+
+class TestRefreshIfStale:
+    """定期更新のテスト"""
+
+    def test_defers_rebuild(self, monkeypatch):
+        """rebuild=False なら全体の再構築をせず None を返す"""
+        monkeypatch.setattr(lab_neighbors, "rebuild_all", lambda *args: pytest.fail("rebuilt in worker"))
+        db = StaleSession(stale=51)
+
+        assert lab_neighbors.refresh_if_stale(db, max_incremental=50, rebuild=False) is None
+        assert db.rollbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_engine_rebuilds_in_subprocess(self, monkeypatch):
+        """全体の再構築は Web ワーカーではなく別プロセスで実行"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "LAB_NEIGHBORS_ENABLED", True)
+
+        calls = []
+        monkeypatch.setattr(lab_neighbors, "refresh_if_stale", lambda db, top_n, rebuild: calls.append(rebuild))
+
+        async def fake_rebuild():
+            calls.append("subprocess")
+            return True
+
+        monkeypatch.setattr(lab_neighbors, "rebuild_in_subprocess", fake_rebuild)
+
+        class Factory:
+            def __call__(self):
+                return self
+
+            def __enter__(self):
+                return None
+
+            def __exit__(self, *exc):
+                return False
+
+        engine = SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+        engine.session_factory = Factory()
+
+        assert await engine.refresh_lab_neighbors() == 0
+        assert calls == [False, "subprocess"]
+
+
+class _Query:
+    def __init__(self, lab):
+        self.lab = lab
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.lab
+
+
+class TestUpdateLabEmbedding:
+    """埋め込み更新時の近傍テーブル反映のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_neighbors_updated_off_event_loop(self, monkeypatch):
+        """近傍の更新はイベントループ外で専用セッションを使って行う"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "LAB_NEIGHBORS_ENABLED", True)
+
+        lab = SimpleNamespace(id=7, name="研究室7")
+        request_db = SimpleNamespace(query=lambda model: _Query(lab), commit=lambda: None)
+        neighbors_db = SimpleNamespace()
+
+        class Factory:
+            def __call__(self):
+                return self
+
+            def __enter__(self):
+                return neighbors_db
+
+            def __exit__(self, *exc):
+                return False
+
+        engine = SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+        engine.session_factory = Factory()
+
+        async def fake_embedding(lab):
+            return [0.1, 0.2]
+
+        monkeypatch.setattr(engine, "generate_research_content_embedding", fake_embedding)
+        monkeypatch.setattr(engine, "set_lab_embedding", lambda lab, embedding: None)
+        calls = []
+        monkeypatch.setattr(
+            lab_neighbors,
+            "update_lab",
+            lambda db, lab_id, top_n: calls.append((db, lab_id, threading.current_thread()))
+        )
+
+        await engine.update_lab_embedding(request_db, 7)
+
+        assert calls == [(neighbors_db, 7, calls[0][2])]
+        assert calls[0][2] is not threading.main_thread()
@@ -0,0 +1,156 @@
+# backend/tests/test_lab_page.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.api.endpoints import labs as labs_module
+from app.api.endpoints.labs import _etag_matches, build_lab_page, lab_page_etag
+
+from helpers import add_universities, make_lab
+
+pytest_plugins = ["helpers"]
+
+
+def _similar_row(lab_id, score):
+    return SimpleNamespace(
+        id=lab_id,
+        name=f"研究室{lab_id}",
+        professor_name=None,
+        department=None,
+        research_theme="テーマ",
+        research_content="内容",
+        research_field="工学",
+        speciality=None,
+        keywords=None,
+        lab_url=None,
+        university_name="東京大学",
+        prefecture="東京都",
+        region="関東",
+        similarity_score=score
+    )
+
+
+class _SessionFactory:
+    """同期セッションを async with で使えるようにする（並行して開かれた数も記録）"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.open = 0
+        self.max_open = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        await asyncio.sleep(0)
+        self.session = self.factory()
+        return self.session
+
+    async def __aexit__(self, *exc):
+        self.open -= 1
+        return False
+
+
+@pytest.fixture
+def seed():
+    def seed_labs(db):
+        tokyo, kyoto = add_universities(db)
+        db.add_all([
+            make_lab(tokyo, id=lab_id, name=f"研究室{lab_id}", research_field=field)
+            for lab_id, field in enumerate(["工学", "工学", "医学", "化学"], start=1)
+        ])
+        db.add(make_lab(kyoto, id=10, name="研究室10"))
+        db.flush()
+        # 研究室10は埋め込み未生成
+        db.execute(text("UPDATE research_labs SET embedding = '[1]' WHERE id < 10"))
+    return seed_labs
+
+
+@pytest.fixture
+def page_sessions(session_factory):
+    return _SessionFactory(session_factory)
+
+
+@pytest.fixture
+def similar(monkeypatch):
+    """類似研究室の検索結果を差し替える"""
+    rows = {"value": [_similar_row(2, 0.9), _similar_row(3, 0.8)], "calls": []}
+
+    async def find_similar_labs(db, lab_id, limit=5):
+        rows["calls"].append(lab_id)
+        if isinstance(rows["value"], Exception):
+            raise rows["value"]
+        return rows["value"][:limit]
+
+    monkeypatch.setattr(labs_module.search_engine, "find_similar_labs", find_similar_labs)
+    return rows
+
+
+class TestBuildLabPage:
+    """研究室詳細ページの複合レスポンスのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_composes_all_parts(self, page_sessions, similar):
+        page = await build_lab_page(1, session_factory=page_sessions)
+
+        assert page.lab.id == 1
+        assert page.lab.university.name == "東京大学"
+        assert [lab.id for lab in page.similar_labs] == [2, 3]
+        assert page.similar_labs[0].professor_name == ""
+        assert page.university_stats.total_labs == 4
+        assert page.university_stats.labs_by_field == {"工学": 2, "医学": 1, "化学": 1}
+
+    @pytest.mark.asyncio
+    async def test_parts_fetched_concurrently(self, page_sessions, similar):
+        """各部分は別セッションで並行して取得する"""
+        await build_lab_page(1, session_factory=page_sessions)
+
+        assert page_sessions.max_open == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_lab(self, page_sessions, similar):
+        assert await build_lab_page(99, session_factory=page_sessions) is None
+        assert similar["calls"] == []
+
+    @pytest.mark.asyncio
+    async def test_skips_similar_without_embedding(self, page_sessions, similar):
+        """埋め込み未生成の研究室では類似検索を行わない"""
+        page = await build_lab_page(10, session_factory=page_sessions)
+
+        assert page.similar_labs == []
+        assert page.university_stats.labs_by_field == {"工学": 1}
+        assert similar["calls"] == []
+
+    @pytest.mark.asyncio
+    async def test_similar_failure_keeps_page(self, page_sessions, similar):
+        """類似研究室の取得に失敗しても詳細は返す"""
+        similar["value"] = OperationalError("SELECT", {}, Exception("timeout"))
+
+        page = await build_lab_page(1, session_factory=page_sessions)
+
+        assert page.lab.id == 1
+        assert page.similar_labs == []
+
+
+class TestLabPageEtag:
+    """複合 ETag のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_stable_and_changes_with_any_part(self, page_sessions, similar):
+        first = lab_page_etag(await build_lab_page(1, session_factory=page_sessions))
+        assert first == lab_page_etag(await build_lab_page(1, session_factory=page_sessions))
+
+        similar["value"] = [_similar_row(3, 0.8)]
+        assert first != lab_page_etag(await build_lab_page(1, session_factory=page_sessions))
+
+    def test_if_none_match(self):
+        assert _etag_matches('"abc"', '"abc"')
+        assert _etag_matches('"x", W/"abc"', '"abc"')
+        assert _etag_matches("*", '"abc"')
+        assert not _etag_matches('"abd"', '"abc"')
+        assert not _etag_matches(None, '"abc"')
@@ -0,0 +1,93 @@
+# backend/tests/test_lab_pagination.py
+import pytest
+
+from app.core.lab_pagination import InvalidCursor, decode_cursor, encode_cursor, list_labs_query, sort_key
+
+from helpers import add_universities, make_lab
+
+pytest_plugins = ["helpers"]
+
+FIELDS = ["工学", "医学", "化学"]
+NO_FILTERS = {"research_field": None, "region": None, "university_name": None}
+
+
+@pytest.fixture
+def seed():
+    def seed_labs(db):
+        tokyo, kyoto = add_universities(db)
+        db.add_all([
+            make_lab(tokyo if i % 2 else kyoto, name=f"研究室{i}", research_field=FIELDS[i % len(FIELDS)])
+            for i in range(25)
+        ])
+    return seed_labs
+
+
+def _page_through(db, order, limit, filters=NO_FILTERS):
+    """継続トークンを使って最後のページまで取得"""
+    seen, cursor, pages = [], None, 0
+    while True:
+        after = decode_cursor(cursor, order, filters) if cursor else None
+        labs = db.execute(list_labs_query(order, after, limit + 1, **filters)).scalars().all()
+        pages += 1
+        seen.extend(labs[:limit])
+        if len(labs) <= limit:
+            return seen, pages
+        cursor = encode_cursor(order, sort_key(labs[limit - 1], order), filters)
+
+
+class TestCursor:
+    """継続トークンのテスト"""
+
+    def test_round_trip(self):
+        token = encode_cursor("research_field", ["工学", 42], NO_FILTERS)
+
+        assert decode_cursor(token, "research_field", NO_FILTERS) == ["工学", 42]
+        assert "=" not in token
+
+    def test_rejects_other_order_or_filters(self):
+        """別の並び順・フィルターで発行されたトークンは使えない"""
+        token = encode_cursor("id", [10], NO_FILTERS)
+
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, "research_field", NO_FILTERS)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, "id", {**NO_FILTERS, "region": "関東"})
+
+    def test_rejects_garbage(self):
+        for token in ("not-base64!", "e30", encode_cursor("id", [1], NO_FILTERS)[:-3]):
+            with pytest.raises(InvalidCursor):
+                decode_cursor(token, "id", NO_FILTERS)
+
+
+class TestKeysetPagination:
+    """キーセットページングのテスト"""
+
+    @pytest.mark.parametrize("order", ["id", "research_field"])
+    def test_pages_cover_all_rows_once(self, session_factory, order):
+        """全ページを通して全件を重複なく、並び順どおりに返す"""
+        with session_factory() as db:
+            labs, pages = _page_through(db, order, limit=7)
+            keys = [sort_key(lab, order) for lab in labs]
+
+            assert len(labs) == 25
+            assert pages == 4
+            assert keys == sorted(keys)
+            assert len({lab.id for lab in labs}) == 25
+
+    def test_filters_apply_across_pages(self, session_factory):
+        filters = {**NO_FILTERS, "region": "関東", "research_field": "医学"}
+        with session_factory() as db:
+            labs, _ = _page_through(db, "id", limit=2, filters=filters)
+
+            assert labs
+            assert all(lab.university.region == "関東" and lab.research_field == "医学" for lab in labs)
+
+    def test_university_loaded_in_same_query(self, session_factory):
+        """大学情報を遅延ロードせず1回のクエリで取得する"""
+        with session_factory() as db:
+            session_factory.statements.clear()
+            labs = db.execute(list_labs_query("id", [5], 10)).scalars().all()
+            names = [lab.university.name for lab in labs]
+
+            assert len(names) == 10
+            assert len(session_factory.statements) == 1
@@ -0,0 +1,58 @@
+# backend/tests/test_pool_metrics.py
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.pool_metrics import PoolInstrumentation
+
+
+def _engine(instrumentation: PoolInstrumentation, **options):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=instrumentation.pool_class(QueuePool),
+        **options
+    )
+    instrumentation.attach(engine)
+    return engine
+
+
+class TestPoolInstrumentation:
+    """接続プール計測のテスト"""
+
+    def test_records_checkout_wait_and_usage(self):
+        """接続取得時間と同時使用数の最大値を記録"""
+        instrumentation = PoolInstrumentation("test_usage")
+        engine = _engine(instrumentation, pool_size=2, max_overflow=0)
+
+        with engine.connect() as first, engine.connect() as second:
+            first.execute(text("SELECT 1"))
+            second.execute(text("SELECT 1"))
+            assert instrumentation.stats()["checked_out"] == 2
+
+        stats = instrumentation.stats()
+        assert stats["peak_in_use"] == 2
+        assert stats["checked_out"] == 0
+        assert instrumentation.checkout_wait_ms.snapshot()["count"] == 2
+
+    def test_counts_overflow_and_timeouts(self):
+        """プールサイズ超過の接続とタイムアウトを数える"""
+        instrumentation = PoolInstrumentation("test_overflow")
+        engine = _engine(instrumentation, pool_size=1, max_overflow=1, pool_timeout=0.05)
+
+        with engine.connect(), engine.connect():
+            assert instrumentation.overflow_connections.value == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        assert instrumentation.checkout_timeouts.value == 1
+
+    def test_counts_pre_ping_failures(self):
+        """pre-ping の失敗だけを数える"""
+        instrumentation = PoolInstrumentation("test_ping")
+
+        instrumentation._on_error(SimpleNamespace(is_pre_ping=True, original_exception=OSError("gone")))
+        instrumentation._on_error(SimpleNamespace(is_pre_ping=False, original_exception=ValueError()))
+
+        assert instrumentation.pre_ping_failures.value == 1
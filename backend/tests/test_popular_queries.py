@@ -0,0 +1,127 @@
+# backend/tests/test_popular_queries.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import popular_queries as module
+from app.core.popular_queries import DecayedSpaceSaving, PopularQueries
+
+from helpers import FakeSession
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDecayedSpaceSaving:
+    """時間減衰付き Space-Saving スケッチのテスト"""
+
+    def test_keeps_heavy_hitters(self):
+        """容量を超える種類の項目があっても頻出項目は残る"""
+        sketch = DecayedSpaceSaving(capacity=5, half_life=1e9, clock=FakeClock())
+        for i in range(200):
+            sketch.add("がん治療")
+            if i % 2 == 0:
+                sketch.add("ロボット")
+            sketch.add(f"rare-{i}")
+
+        top = sketch.top(2)
+        assert [item for item, _ in top] == ["がん治療", "ロボット"]
+        count, error = sketch.estimate("がん治療")
+        # 推定値は真の値以上、過大評価は error 以下
+        assert 200 <= count <= 200 + error + 1e-6
+        assert len(sketch) == 5
+
+    def test_decay_halves_after_half_life(self):
+        """半減期が経過するとスコアが半分になる"""
+        clock = FakeClock()
+        sketch = DecayedSpaceSaving(capacity=10, half_life=60.0, clock=clock)
+        sketch.add("a", 4)
+
+        clock.now += 60.0
+        assert sketch.estimate("a")[0] == pytest.approx(2.0)
+
+        # 新しい検索は古い検索より重い
+        sketch.add("b", 3)
+        assert [item for item, _ in sketch.top(2)] == ["b", "a"]
+
+    def test_renormalize_keeps_scores(self):
+        """基準時刻を進めても推定値は変わらない"""
+        clock = FakeClock()
+        sketch = DecayedSpaceSaving(capacity=10, half_life=1.0, clock=clock)
+        sketch.add("a", 8)
+        clock.now += 40.0
+        sketch.add("b", 1)
+
+        assert sketch.estimate("a")[0] == pytest.approx(8 * 2.0 ** -40)
+        assert sketch.estimate("b")[0] == pytest.approx(1.0)
+
+
+class TestPopularQueries:
+    """人気クエリランキングのテスト"""
+
+    def test_orders_by_frequency(self):
+        """検索回数の多い順に返す（表記ゆれは正規化）"""
+        ranking = PopularQueries(capacity=10, clock=FakeClock())
+        for query in ["AI", "がん治療", "ＡＩ", " AI ", "がん治療", "宇宙"]:
+            ranking.record(query)
+
+        assert [query for query, _ in ranking.top(2)] == ["AI", "がん治療"]
+
+    def test_sync_flushes_deltas_and_loads_global_top(self):
+        """未反映分をテーブルへ加算し、全ワーカー分の上位を読み戻す"""
+        ranking = PopularQueries(capacity=10, clock=FakeClock())
+        ranking.record("宇宙")
+        ranking.record("宇宙")
+        db = FakeSession([
+            SimpleNamespace(query="がん治療", score=50.0),
+            SimpleNamespace(query="宇宙", score=2.0)
+        ])
+
+        assert ranking.sync(db) == 1
+
+        statement, params = db.calls[0]
+        assert statement is module._UPSERT_SQL
+        assert params["queries"] == ["宇宙"] and params["counts"] == [2.0]
+        assert db.commits == 1
+        assert ranking.top(2) == [("がん治療", 50.0), ("宇宙", 2.0)]
+        assert ranking.stats()["unsynced_queries"] == 0
+
+        # 次回は新しい検索だけを加算する
+        ranking.record("宇宙")
+        ranking.sync(db)
+        assert db.calls[-3][1]["counts"] == [1.0]
+
+    def test_evicted_queries_still_synced(self):
+        """スケッチから追い出されたクエリの未反映分もテーブルに加算する"""
+        ranking = PopularQueries(capacity=2, clock=FakeClock())
+        for query in ["宇宙", "がん治療", "AI", "ロボット"]:
+            ranking.record(query)
+        db = FakeSession()
+
+        ranking.sync(db)
+
+        params = db.calls[0][1]
+        assert dict(zip(params["queries"], params["counts"])) == {
+            "宇宙": 1.0, "がん治療": 1.0, "AI": 1.0, "ロボット": 1.0
+        }
+
+    def test_unsynced_capped_while_sync_fails(self):
+        """同期できない間も未反映分は max_rows 件までで、回数の少ないクエリから捨てる"""
+        ranking = PopularQueries(capacity=2, max_rows=3, clock=FakeClock())
+        dropped = ranking.unsynced_dropped.value
+        for query in ["宇宙", "宇宙", "がん治療", "がん治療", "AI", "ロボット", "細胞"]:
+            ranking.record(query)
+        db = FakeSession()
+
+        ranking.sync(db)
+
+        params = db.calls[0][1]
+        assert dict(zip(params["queries"], params["counts"])) == {
+            "宇宙": 2.0, "がん治療": 2.0, "細胞": 1.0
+        }
+        assert ranking.unsynced_dropped.value == dropped + 2
@@ -0,0 +1,70 @@
+# backend/tests/test_quantization.py
+import numpy as np
+import pytest
+
+from app.core.data_version import DataVersion
+from app.core.quantization import evaluate, quantize
+from app.core.vector_index import VectorIndex, build_index_data
+
+
+def _normalized(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestQuantization:
+    """埋め込み量子化と2段階検索のテスト"""
+
+    @pytest.mark.parametrize("mode,ratio", [("float16", 2), ("int8", 4), ("binary", 32)])
+    def test_footprint(self, mode, ratio):
+        """圧縮コードのサイズが float32 の 1/ratio 程度"""
+        matrix = _normalized(100, 256)
+        codes = quantize(matrix, mode)
+        assert codes.mode == mode
+        assert codes.nbytes <= matrix.nbytes / ratio + 256 * 4
+
+    def test_none_mode(self):
+        """'none' では量子化しない"""
+        assert quantize(_normalized(10, 8), "none") is None
+        with pytest.raises(ValueError):
+            quantize(_normalized(10, 8), "pq")
+
+    @pytest.mark.parametrize("mode", ["float16", "int8"])
+    def test_rerank_keeps_exact_scores(self, mode):
+        """リランク後のスコアは元のベクトルで計算した値"""
+        matrix = _normalized(500, 64)
+        data = build_index_data(list(range(500)), matrix, ["-"] * 500, ["-"] * 500)
+        exact = VectorIndex(DataVersion())
+        exact.swap(data)
+        quantized = VectorIndex(DataVersion(), quantization=mode)
+        quantized.swap(data)
+
+        query = matrix[42]
+        expected = exact.search(query, 10)
+        hits = quantized.search(query, 10)
+        assert [lab_id for lab_id, _ in hits] == [lab_id for lab_id, _ in expected]
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected], abs=1e-6)
+
+    def test_binary_with_full_rerank_is_exact(self):
+        """候補数が全件以上なら binary でも厳密な結果になる"""
+        matrix = _normalized(200, 64)
+        data = build_index_data(list(range(200)), matrix, ["a"] * 200, ["b"] * 200)
+        index = VectorIndex(DataVersion(), quantization="binary", rerank_factor=100)
+        index.swap(data)
+
+        hits = index.search(matrix[0], 5, exclude_ids=[0])
+
+        expected = np.argsort(-(matrix @ matrix[0]))[1:6]
+        assert [lab_id for lab_id, _ in hits] == expected.tolist()
+
+    def test_evaluate_reports_each_mode(self):
+        """方式ごとにメモリ量と recall@k を報告"""
+        matrix = _normalized(300, 32)
+        report = evaluate(matrix, matrix[:5], k=5, rerank_factor=4)
+
+        assert [row["mode"] for row in report] == ["none", "float16", "int8", "binary"]
+        assert report[0]["recall_at_k"] == 1.0
+        assert report[3]["scan_bytes"] < report[0]["scan_bytes"]
+        # リランク用の float32 行列も保持するため、常駐量は 'none' 以上
+        assert all(row["resident_bytes"] >= report[0]["resident_bytes"] for row in report)
+        assert report[0]["resident_bytes"] == matrix.astype("float32").nbytes
@@ -0,0 +1,76 @@
+# backend/tests/test_query_embedding_store.py
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import settings
+from app.core.embedding_cache import EmbeddingCache
+from app.core.query_embedding_store import DatabaseEmbeddingStore
+from app.models import QueryEmbedding
+
+pytest_plugins = ["helpers"]
+
+
+def _vector(value):
+    return [value] * settings.EMBEDDING_DIMENSION
+
+
+@pytest.fixture
+def seed():
+    def seed_embeddings(db):
+        db.add_all([
+            QueryEmbedding(
+                query_hash=key,
+                model="model",
+                query_text=key,
+                embedding=_vector(float(month)),
+                hit_count=0,
+                last_used_at=datetime(2024, month, 1, tzinfo=timezone.utc)
+            )
+            for month, key in enumerate(["a", "b", "c"], start=1)
+        ])
+    return seed_embeddings
+
+
+def _rows(session_factory):
+    with session_factory() as db:
+        return {row.query_hash: row for row in db.query(QueryEmbedding)}
+
+
+class TestDatabaseEmbeddingStore:
+    """query_embeddings を使う永続層のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_get_updates_usage(self, session_factory):
+        """取得と同時に最終利用日時とヒット数を1回のUPDATEで更新"""
+        store = DatabaseEmbeddingStore(session_factory)
+
+        assert await store.get("a") == _vector(1.0)
+        assert await store.get("missing") is None
+
+        updates = [sql for sql in session_factory.statements if sql.startswith("UPDATE")]
+        assert len(updates) == 2 and all("RETURNING" in sql for sql in updates)
+
+        rows = _rows(session_factory)
+        assert rows["a"].hit_count == 1
+        assert rows["a"].last_used_at.year > 2024
+        assert rows["b"].hit_count == 0
+
+    @pytest.mark.asyncio
+    async def test_prefetch_recent_first(self, session_factory):
+        """最近使われた順に上限件数まで読み込む"""
+        store = DatabaseEmbeddingStore(session_factory)
+
+        assert await store.prefetch(2) == [("c", _vector(3.0)), ("b", _vector(2.0))]
+
+    @pytest.mark.asyncio
+    async def test_maintain_evicts_to_max_rows(self, session_factory, monkeypatch):
+        """一次キャッシュのヒットを反映してから、古い行を上限件数まで削除"""
+        monkeypatch.setattr(settings, "QUERY_EMBEDDING_MAX_ROWS", 2)
+        cache = EmbeddingCache(max_entries=8, store=DatabaseEmbeddingStore(session_factory))
+
+        assert await cache.warm_up(10) == 3
+        assert await cache.get("a") == _vector(1.0)  # 一次キャッシュのヒット
+
+        assert await cache.maintain(settings.QUERY_EMBEDDING_MAX_ROWS) == 1
+        assert set(_rows(session_factory)) == {"a", "c"}
@@ -0,0 +1,70 @@
+# backend/tests/test_result_cache.py
+from app.core.data_version import DataVersion, data_version
+from app.core.result_cache import SearchResultCache, embedding_fingerprint, make_result_key
+from app.models import University
+
+pytest_plugins = ["helpers"]
+
+
+class TestSearchResultCache:
+    """検索結果キャッシュのテスト"""
+
+    def test_key_ignores_filter_order(self):
+        """フィルターの順序が違っても同じキーになるテスト"""
+        fp = embedding_fingerprint([0.1, 0.2])
+        assert make_result_key(fp, ["関東", "関西"], None, 20, 0.2) == \
+            make_result_key(fp, ["関西", "関東"], [], 20, 0.2)
+        assert embedding_fingerprint([0.1, 0.2]) != embedding_fingerprint([0.1, 0.3])
+
+    def test_invalidated_by_version_bump(self):
+        """データバージョンが進むとキャッシュが無効になるテスト"""
+        version = DataVersion()
+        cache = SearchResultCache(version, max_entries=8)
+
+        cache.set("k", ["result"])
+        assert cache.get("k") == ["result"]
+
+        version.bump("test")
+        assert cache.get("k") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["invalidations"] == 1
+
+    def test_lru_bound(self):
+        """最大件数を超えると古いエントリが消えるテスト"""
+        cache = SearchResultCache(DataVersion(), max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+
+class TestDataVersion:
+    """データバージョンのテスト"""
+
+    def test_orm_commit_bumps_version(self, session_factory):
+        """研究室データのコミットでバージョンが進むテスト"""
+        before = data_version.current
+        with session_factory() as db:
+            db.add(University(name="テスト大学", type="national", prefecture="東京都", region="関東"))
+            db.commit()
+
+        assert data_version.current == before + 1
+
+    def test_refresh_from_db_detects_external_change(self, session_factory):
+        """フィンガープリントの変化でバージョンが進むテスト"""
+        version = DataVersion()
+        with session_factory() as db:
+            assert version.refresh_from_db(db) is False
+            assert version.refresh_from_db(db) is False
+
+            db.add(University(name="別の大学", type="private", prefecture="大阪府", region="関西"))
+            db.commit()
+            assert version.refresh_from_db(db) is True
+
+        assert version.current == 1
@@ -0,0 +1,115 @@
+# backend/tests/test_search_log_buffer.py
+import asyncio
+
+import pytest
+
+from app.core.search_log_buffer import SearchLogBuffer
+
+
+class RecordingWriter:
+    """書き込まれたバッチを記録する（fail=True なら失敗する）"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+
+    async def __call__(self, records):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("database down")
+        self.batches.append([record["query"] for record in records])
+
+
+class TestSearchLogBuffer:
+    """検索ログ write-behind バッファのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_size(self):
+        """バッチ件数に達したら待たずに書き込む"""
+        writer = RecordingWriter()
+        buffer = SearchLogBuffer(writer, max_batch_size=3, flush_interval=10.0)
+        buffer.start()
+
+        for i in range(3):
+            buffer.record(f"q{i}", 1, 10.0)
+        await asyncio.sleep(0.05)
+
+        assert writer.batches == [["q0", "q1", "q2"]]
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self):
+        """件数に達しなくても一定時間で書き込む"""
+        writer = RecordingWriter()
+        buffer = SearchLogBuffer(writer, max_batch_size=100, flush_interval=0.05)
+        buffer.start()
+
+        buffer.record("がん治療", 5, 12.0)
+        await asyncio.sleep(0.01)
+        assert writer.batches == []
+        await asyncio.sleep(0.1)
+
+        assert writer.batches == [["がん治療"]]
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_drops_when_full(self):
+        """未書き込みが上限を超えた分は破棄して数える"""
+        buffer = SearchLogBuffer(RecordingWriter(), max_pending=2)
+        dropped = buffer.dropped.value
+
+        results = [buffer.record(f"q{i}", 0, 1.0) for i in range(4)]
+
+        assert results == [True, True, False, False]
+        assert buffer.dropped.value == dropped + 2
+        assert buffer.pending == 2
+
+    @pytest.mark.asyncio
+    async def test_close_drains_pending(self):
+        """停止時に書き込み中・未書き込みのログをすべて書き出す"""
+        writer = RecordingWriter(delay=0.05)
+        buffer = SearchLogBuffer(writer, max_batch_size=2, flush_interval=0.01)
+        buffer.start()
+
+        for i in range(5):
+            buffer.record(f"q{i}", 1, 1.0)
+        await asyncio.sleep(0.02)
+        await buffer.close()
+
+        assert sum(writer.batches, []) == [f"q{i}" for i in range(5)]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_oldest_pending(self):
+        """書き込み中のバッチの先頭の時刻を返す"""
+        buffer = SearchLogBuffer(RecordingWriter(delay=0.05), max_batch_size=2, flush_interval=0.01)
+        assert buffer.oldest_pending() is None
+        buffer.start()
+
+        for i in range(3):
+            buffer.record(f"q{i}", 1, 1.0)
+        await asyncio.sleep(0.02)
+        first = buffer._batch[0]
+
+        assert first["query"] == "q0"
+        assert buffer.oldest_pending() == first["timestamp"]
+
+        await buffer.close()
+        assert buffer.oldest_pending() is None
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_counted(self):
+        """書き込み失敗時はバッチを破棄して数え、ループは継続する"""
+        buffer = SearchLogBuffer(RecordingWriter(fail=True), max_batch_size=2, flush_interval=0.01)
+        failed, dropped = buffer.failed_batches.value, buffer.dropped.value
+        buffer.start()
+
+        buffer.record("q", 1, 1.0)
+        await asyncio.sleep(0.05)
+
+        assert buffer.failed_batches.value == failed + 1
+        assert buffer.dropped.value == dropped + 1
+        assert not buffer._task.done()
+        await buffer.close()
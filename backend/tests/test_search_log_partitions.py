@@ -0,0 +1,217 @@
+# backend/tests/test_search_log_partitions.py
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from app.core import search_log_partitions as partitions_module
+from app.core import search_stats
+from app.core.search_log_partitions import (
+    SearchLogPartitions,
+    add_months,
+    month_start,
+    is_missing_partition_error,
+    partition_bounds,
+    partition_name
+)
+from app.core.search_stats import SearchStatsRollup
+
+from helpers import FakeResult, FakeSession
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+
+
+class CatalogSession(FakeSession):
+    """カタログ照会に決まった値を返し、実行したDDLを記録するセッション"""
+
+    def __init__(self, partitions=(), partitioned=True, watermark=None, rollup_locked=True, legacy_oldest=None):
+        super().__init__()
+        self.legacy_oldest = legacy_oldest
+        self.partitions = list(partitions)
+        self.partitioned = partitioned
+        self.watermark = watermark
+        self.rollup_locked = rollup_locked
+        self.ddl = []
+        self.ddl_locks = 0
+
+    def respond(self, statement, params):
+        if "pg_try_advisory_xact_lock" in str(statement):
+            return FakeResult(scalar=self.rollup_locked)
+        if statement is search_stats._FIRST_LOG_HOUR_SQL:
+            return FakeResult(scalar=None)
+        if statement is partitions_module._DDL_LOCK_SQL:
+            self.ddl_locks += 1
+            return FakeResult()
+        if statement is partitions_module._PARTITIONS_SQL:
+            return [(name,) for name in self.partitions]
+        if statement is partitions_module._IS_PARTITIONED_SQL:
+            return FakeResult(scalar=self.partitioned)
+        if statement is search_stats._WATERMARK_SQL:
+            return FakeResult(scalar=self.watermark)
+        if statement is search_stats._PRUNE_SQL:
+            return FakeResult(rowcount=3)
+        if statement is partitions_module._TABLE_EXISTS_SQL:
+            return FakeResult(scalar=True)
+        if statement is partitions_module._LEGACY_INDEXES_SQL:
+            return [("search_logs_pkey",), ("idx_search_logs_timestamp",)]
+        if statement is partitions_module._LEGACY_OLDEST_SQL:
+            return FakeResult(scalar=self.legacy_oldest)
+        if statement is partitions_module._COPY_LEGACY_SQL:
+            return FakeResult(rowcount=42)
+        if str(statement).strip().startswith(("CREATE", "DROP", "ALTER")):
+            self.ddl.append(str(statement).strip())
+        return FakeResult()
+
+
+def _clock(*args):
+    return lambda: datetime(*args, tzinfo=timezone.utc)
+
+
+class TestPartitionNames:
+    """パーティションの命名と範囲のテスト"""
+
+    def test_month_start_uses_timezone(self):
+        """月の区切りは設定したタイムゾーンの日付"""
+        moment = datetime(2024, 3, 31, 16, tzinfo=timezone.utc)  # 日本時間 4/1 1時
+
+        assert month_start(moment, TOKYO) == datetime(2024, 4, 1, tzinfo=TOKYO)
+
+    def test_add_months_crosses_year(self):
+        start = datetime(2024, 11, 1, tzinfo=TOKYO)
+
+        assert add_months(start, 2) == datetime(2025, 1, 1, tzinfo=TOKYO)
+
+    def test_bounds_round_trip(self):
+        """名前から求めた範囲が作成時の範囲と一致する"""
+        start = datetime(2024, 12, 1, tzinfo=TOKYO)
+
+        assert partition_bounds(partition_name(start), TOKYO) == (start, datetime(2025, 1, 1, tzinfo=TOKYO))
+        assert partition_bounds("search_logs_default", TOKYO) is None
+
+    def test_missing_partition_error(self):
+        error = Exception('no partition of relation "search_logs" found for row')
+
+        assert is_missing_partition_error(error)
+        assert not is_missing_partition_error(Exception("deadlock detected"))
+
+
+class TestSearchLogPartitions:
+    """パーティションの作成と削除のテスト"""
+
+    def test_ensure_creates_missing_months(self):
+        """当月から指定月数先までのうち、無いものだけを作成する"""
+        manager = SearchLogPartitions("Asia/Tokyo", months_ahead=2, clock=_clock(2024, 12, 15))
+        db = CatalogSession(partitions=["search_logs_202412"])
+
+        created = manager.ensure(db)
+
+        assert created == ["search_logs_202501", "search_logs_202502"]
+        assert "FOR VALUES FROM ('2025-01-01T00:00:00+09:00') TO ('2025-02-01T00:00:00+09:00')" in db.ddl[0]
+        assert db.ddl_locks == 1
+        assert db.commits == 0
+
+    def test_drop_before_only_fully_expired(self):
+        """範囲の終わりが cutoff 以前のパーティションだけを削除する"""
+        manager = SearchLogPartitions("Asia/Tokyo")
+        db = CatalogSession(partitions=["search_logs_202401", "search_logs_202402", "search_logs_default"])
+
+        dropped = manager.drop_before(db, datetime(2024, 2, 20, tzinfo=TOKYO))
+
+        assert dropped == ["search_logs_202401"]
+        assert db.ddl == ["DROP TABLE IF EXISTS search_logs_202401"]
+
+
+    def test_migrate_unpartitioned_table(self):
+        """既存の非パーティションのテーブルを改名し、親テーブルと古い月からのパーティションを作ってコピーする"""
+        manager = SearchLogPartitions("Asia/Tokyo", months_ahead=0, clock=_clock(2024, 6, 1))
+        db = CatalogSession(partitioned=False, legacy_oldest=datetime(2024, 4, 20, tzinfo=timezone.utc))
+
+        assert manager.migrate(db) == 42
+
+        assert db.ddl[:4] == [
+            "ALTER TABLE search_logs RENAME TO search_logs_unpartitioned",
+            "ALTER SEQUENCE IF EXISTS search_logs_id_seq OWNED BY NONE",
+            'ALTER INDEX "search_logs_pkey" RENAME TO "search_logs_pkey_unpartitioned"',
+            'ALTER INDEX "idx_search_logs_timestamp" RENAME TO "idx_search_logs_timestamp_unpartitioned"',
+        ]
+        assert db.ddl[4] == "CREATE SEQUENCE IF NOT EXISTS search_logs_id_seq"
+        assert db.ddl[5].startswith("CREATE TABLE search_logs (")
+        assert [ddl.split()[5] for ddl in db.ddl[6:9]] == [
+            "search_logs_202404", "search_logs_202405", "search_logs_202406"
+        ]
+        assert db.ddl[-1] == "DROP TABLE search_logs_unpartitioned"
+        statements = db.statements()
+        assert statements.index(partitions_module._COPY_LEGACY_SQL) < statements.index(partitions_module._RESET_SEQUENCE_SQL)
+        assert db.commits == 0
+
+    def test_migrate_skips_partitioned_table(self):
+        manager = SearchLogPartitions("Asia/Tokyo")
+        db = CatalogSession(partitioned=True)
+
+        assert manager.migrate(db) is None
+        assert db.ddl == []
+
+
+class TestPrune:
+    """集計済みの生ログ削除のテスト"""
+
+    def _rollup(self, now):
+        clock = _clock(*now)
+        return SearchStatsRollup(
+            retention_days=30,
+            partitions=SearchLogPartitions("Asia/Tokyo", months_ahead=0, clock=clock),
+            clock=clock
+        )
+
+    def test_keeps_logs_until_rollup_finalized(self):
+        """集計が確定していない時間帯のパーティションは保持期間を過ぎても残す"""
+        watermark = datetime(2024, 1, 15, tzinfo=timezone.utc)
+        db = CatalogSession(partitions=["search_logs_202401", "search_logs_202406"], watermark=watermark)
+
+        assert self._rollup((2024, 6, 1)).prune(db) == 0
+
+        db.watermark = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        assert self._rollup((2024, 6, 1)).prune(db) == 1
+        assert db.ddl == ["DROP TABLE IF EXISTS search_logs_202401"]
+
+    def test_no_rollup_keeps_everything(self):
+        """集計がまだ無い場合は何も削除しない"""
+        db = CatalogSession(partitions=["search_logs_202401", "search_logs_202406"])
+
+        assert self._rollup((2024, 6, 1)).prune(db) == 0
+        assert db.ddl == []
+
+    def test_rollup_maintains_partitions_under_lock(self):
+        """ロックを取得したワーカーだけが、集計と同じトランザクションでパーティションを作成・削除する"""
+        rollup = self._rollup((2024, 6, 1))
+        db = CatalogSession(
+            partitions=["search_logs_202401"],
+            watermark=datetime(2024, 3, 1, tzinfo=timezone.utc)
+        )
+
+        rollup.rollup(db)
+
+        assert db.ddl[0].startswith("CREATE TABLE IF NOT EXISTS search_logs_202406 PARTITION OF")
+        assert db.ddl[1] == "DROP TABLE IF EXISTS search_logs_202401"
+        assert db.commits == 1
+        assert db.ddl_locks == 2
+
+        other = CatalogSession(partitions=["search_logs_202401"], rollup_locked=False)
+        assert rollup.rollup(other) == 0
+        assert other.ddl == [] and other.commits == 0
+
+    def test_unpartitioned_table_deletes_rows(self):
+        """パーティション化されていない場合は行を削除する"""
+        db = CatalogSession(partitioned=False, watermark=datetime(2024, 5, 1, tzinfo=timezone.utc))
+
+        assert self._rollup((2024, 6, 1)).prune(db) == 3
+
+    def test_unpartitioned_table_warns_once(self, caplog):
+        """パーティション化されていない場合は移行を促す警告を1回だけ出す"""
+        rollup = self._rollup((2024, 6, 1))
+        db = CatalogSession(partitioned=False, watermark=datetime(2024, 5, 1, tzinfo=timezone.utc))
+
+        with caplog.at_level("WARNING", logger=search_stats.__name__):
+            rollup.prune(db)
+            rollup.prune(db)
+
+        assert [record.levelname for record in caplog.records] == ["WARNING"]
+        assert "app.core.search_log_partitions" in caplog.records[0].getMessage()
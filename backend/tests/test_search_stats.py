@@ -0,0 +1,223 @@
+# backend/tests/test_search_stats.py
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.core import search_stats
+from app.core.search_stats import (
+    LATENCY_SKETCH_ACCURACY,
+    LatencySketch,
+    SearchStatsRollup,
+    day_start,
+    merge_rollups,
+    read_summary,
+    summarize
+)
+
+from helpers import FakeResult, FakeSession
+
+T0 = datetime(2024, 4, 1, 10, tzinfo=timezone.utc)
+
+
+def _rollup_row(values, results_sum=0):
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+    return SimpleNamespace(
+        search_count=len(values),
+        results_sum=results_sum,
+        latency_count=len(values),
+        latency_sum=float(sum(values)),
+        latency_min=min(values) if values else None,
+        latency_max=max(values) if values else None,
+        latency_sketch=sketch.to_json()
+    )
+
+
+def _hour_row(bucket_start, count):
+    return SimpleNamespace(
+        bucket_start=bucket_start,
+        search_count=count,
+        results_sum=0,
+        latency_count=0,
+        latency_sum=0.0,
+        latency_min=None,
+        latency_max=None
+    )
+
+
+class RollupSession(FakeSession):
+    """生ログの時間別件数を返し、書き込んだ時間別集計を記録するセッション"""
+
+    def __init__(self, log_counts, watermark=None, late=()):
+        super().__init__()
+        self.log_counts = log_counts
+        self.watermark = watermark
+        self.late = list(late)
+
+    def respond(self, statement, params):
+        if "pg_try_advisory_xact_lock" in str(statement):
+            return FakeResult(scalar=True)
+        if statement is search_stats._WATERMARK_SQL:
+            return FakeResult(scalar=self.watermark)
+        if statement is search_stats._FIRST_LOG_HOUR_SQL:
+            return FakeResult(scalar=min(self.log_counts))
+        if statement is search_stats._HOURLY_TOTALS_SQL:
+            return [
+                _hour_row(hour, count) for hour, count in self.log_counts.items()
+                if params["start"] <= hour < params["end"]
+            ]
+        if statement is search_stats._LATE_HOURS_SQL:
+            return [SimpleNamespace(bucket_start=hour, late_count=count) for hour, count in self.late]
+        return []
+
+    def hourly(self):
+        """書き込んだ時間別集計の {時間帯: (件数, 確定)}"""
+        records = [params for statement, params in self.calls if statement is search_stats._UPSERT_HOURLY_SQL]
+        return {
+            record["bucket_start"]: (record["search_count"], record["finalized"])
+            for record in records[-1]
+        }
+
+
+class TestLatencySketch:
+    """分位点スケッチのテスト"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """分位点が相対誤差の範囲に収まる"""
+        rng = random.Random(0)
+        values = [rng.lognormvariate(3, 1) for _ in range(5000)]
+        sketch = LatencySketch()
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.9, 0.95, 0.99):
+            exact = float(np.quantile(values, q, method="lower"))
+            assert sketch.quantile(q) == pytest.approx(exact, rel=LATENCY_SKETCH_ACCURACY * 1.01)
+
+    def test_merge_equals_single_sketch(self):
+        """分割して集計したスケッチのマージは、まとめて集計した結果と一致する"""
+        rng = random.Random(1)
+        values = [rng.uniform(1, 500) for _ in range(1000)]
+        whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (first if i % 3 else second).add(value)
+
+        first.merge(second)
+
+        assert first.counts == whole.counts
+        assert first.quantile(0.95) == whole.quantile(0.95)
+
+    def test_json_round_trip(self):
+        """JSON（DBの JSONB 列）を経由しても中身が変わらない"""
+        sketch = LatencySketch()
+        for value in (0.0, 1.5, 20.0, 20.1, 900.0):
+            sketch.add(value)
+
+        assert LatencySketch.from_json(sketch.to_json()).counts == sketch.counts
+
+    def test_empty(self):
+        """空のスケッチの分位点は None"""
+        assert LatencySketch().quantile(0.5) is None
+
+
+class TestRollups:
+    """集計行のマージのテスト"""
+
+    def test_merge_rollups(self):
+        """件数・合計は加算、最小・最大は全体の値になる"""
+        merged = merge_rollups([
+            _rollup_row([10.0, 20.0], results_sum=7),
+            _rollup_row([], results_sum=0),
+            _rollup_row([0.0, 40.0], results_sum=3)
+        ])
+
+        assert merged["search_count"] == 4
+        assert merged["results_sum"] == 10
+        assert merged["latency_sum"] == 70.0
+        assert merged["latency_min"] == 0.0
+        assert merged["latency_max"] == 40.0
+        assert merged["latency_sketch"].count == 4
+
+    def test_summarize(self):
+        """統計APIの形式に変換する"""
+        summary = summarize(merge_rollups([_rollup_row([10.0, 30.0], results_sum=9)]))
+
+        assert summary["total_searches"] == 2
+        assert summary["average_results_per_search"] == 4.5
+        assert summary["average_search_time_ms"] == 20.0
+        assert summary["p50_search_time_ms"] == pytest.approx(10.0, rel=LATENCY_SKETCH_ACCURACY)
+
+    def test_summarize_empty(self):
+        """集計が無い場合は0を返す"""
+        summary = summarize(merge_rollups([]))
+
+        assert summary["total_searches"] == 0
+        assert summary["average_search_time_ms"] == 0
+        assert summary["p95_search_time_ms"] == 0
+
+    def test_day_start_uses_timezone(self):
+        """日別集計の区切りは設定したタイムゾーンの日付"""
+        tz = ZoneInfo("Asia/Tokyo")
+        hour = datetime(2024, 4, 1, 15, tzinfo=timezone.utc)  # 日本時間 4/2 0時
+
+        assert day_start(hour, tz) == datetime(2024, 4, 2, tzinfo=tz)
+        assert day_start(hour - timedelta(hours=1), tz) == datetime(2024, 4, 1, tzinfo=tz)
+
+    @pytest.mark.asyncio
+    async def test_read_summary(self):
+        """日別集計だけから全期間の統計を求める"""
+        db = FakeSession([_rollup_row([5.0, 15.0], results_sum=4), _rollup_row([25.0], results_sum=2)])
+
+        summary = await read_summary(db)
+
+        assert summary["total_searches"] == 3
+        assert summary["average_results_per_search"] == 2.0
+        assert summary["average_search_time_ms"] == 15.0
+
+
+class TestRollup:
+    """時間別集計の確定のテスト"""
+
+    def _rollup(self, now):
+        rollup = SearchStatsRollup(finalize_delay=300, clock=lambda: now)
+        rollup.prune = lambda db: 0
+        return rollup
+
+    def test_finalizes_after_delay(self):
+        db = RollupSession({T0: 5, T0 + timedelta(hours=1): 3})
+
+        self._rollup(T0 + timedelta(hours=2, minutes=10)).rollup(db)
+
+        assert db.hourly() == {T0: (5, True), T0 + timedelta(hours=1): (3, True)}
+
+    def test_pending_buffer_delays_finalization(self):
+        """バッファに未書き込みのログが残っている時間帯は確定しない"""
+        db = RollupSession({T0: 5, T0 + timedelta(hours=1): 3})
+
+        self._rollup(T0 + timedelta(hours=2, minutes=10)).rollup(db, oldest_pending=T0 + timedelta(minutes=90))
+
+        assert db.hourly() == {T0: (5, True), T0 + timedelta(hours=1): (3, False)}
+
+    def test_late_logs_recounted(self):
+        """確定後に届いたログは時間帯を集計し直し、件数を数える"""
+        late_hour = T0 - timedelta(hours=2)
+        db = RollupSession({late_hour: 7, T0: 2}, watermark=T0 - timedelta(hours=1), late=[(late_hour, 2)])
+        rollup = self._rollup(T0 + timedelta(minutes=10))
+        late_logs = rollup.late_logs.value
+
+        rollup.rollup(db)
+
+        assert db.hourly() == {late_hour: (7, True), T0: (2, False)}
+        assert rollup.late_logs.value == late_logs + 2
+
+    def test_hours_truncated_in_utc(self):
+        """時間帯の区切りはセッションのタイムゾーンによらず UTC"""
+        assert "AT TIME ZONE 'UTC'" in str(search_stats._HOURLY_TOTALS_SQL)
+        assert "AT TIME ZONE 'UTC'" in str(search_stats._HOURLY_SKETCH_SQL)
+        assert "AT TIME ZONE 'UTC'" in str(search_stats._FIRST_LOG_HOUR_SQL)
@@ -0,0 +1,48 @@
+# backend/tests/test_serialization.py
+import json
+
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from app.core.lab_pagination import list_labs_query
+from app.core.serialization import lab_dict, search_result_dict
+from app.core.serialization_benchmark import fast_path, pydantic_path, sample_rows
+from app.schemas import ResearchLab as ResearchLabSchema, ResearchLabSearchResult
+
+from helpers import add_universities, make_lab, sqlite_session_factory
+
+
+class TestSearchResultDict:
+    """検索結果の dict 変換のテスト"""
+
+    def test_matches_schema(self):
+        """ResearchLabSearchResult を通した場合と同じ内容になる"""
+        row = sample_rows(1, 50)[0]
+        row.professor_name = None
+
+        result = search_result_dict(row)
+
+        assert result == ResearchLabSearchResult.model_validate(row).model_dump()
+        assert isinstance(result["similarity_score"], float)
+
+    @pytest.mark.asyncio
+    async def test_fast_response_matches_pydantic_path(self):
+        """orjson で直列化したレスポンスは従来の経路と同じJSONになる"""
+        rows = sample_rows(20, 300)
+
+        assert json.loads(await fast_path(rows)) == json.loads(await pydantic_path(rows))
+
+
+class TestLabDict:
+    """研究室一覧の dict 変換のテスト"""
+
+    def test_matches_schema(self):
+        def seed_lab(db):
+            tokyo, _ = add_universities(db)
+            db.add(make_lab(tokyo, keywords="AI, ロボット"))
+
+        with sqlite_session_factory(seed_lab) as factory, factory() as db:
+            lab = db.execute(list_labs_query()).scalars().one()
+            expected = ResearchLabSchema.model_validate(lab).model_dump_json()
+
+            assert json.loads(ORJSONResponse([lab_dict(lab)]).body) == [json.loads(expected)]
@@ -0,0 +1,131 @@
+# backend/tests/test_short_embedding.py
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core import semantic_search
+from app.core.data_version import data_version
+from app.core.embedding_cache import EmbeddingCache
+from app.core.semantic_search import SemanticSearchEngine, shorten_embedding
+
+from helpers import FakeResult, FakeSession
+
+
+class FakeQuery:
+    def __init__(self, session):
+        self.session = session
+
+    def filter(self, *args):
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def all(self):
+        return self.session.missing[:self._limit]
+
+
+class BackfillSession(FakeSession):
+    """短縮埋め込みが未生成の研究室を返し、補完の UPDATE を反映するセッション"""
+
+    def __init__(self, missing, locked=True):
+        super().__init__()
+        self.missing = missing
+        self.locked = locked
+        self.updated = []
+
+    def query(self, *columns):
+        return FakeQuery(self)
+
+    def respond(self, statement, params):
+        if statement is semantic_search._BACKFILL_SHORT_SQL:
+            ids = {param["id"] for param in params}
+            self.updated.extend(sorted(ids))
+            self.missing = [row for row in self.missing if row.id not in ids]
+            return FakeResult()
+        return FakeResult(scalar=self.locked)
+
+
+class TestShortEmbedding:
+    """粗検索用の短縮埋め込みのテスト"""
+
+    def test_prefix_is_renormalized(self):
+        """先頭次元を切り出して単位ベクトルにする"""
+        embedding = np.random.default_rng(0).normal(size=1536)
+
+        short = shorten_embedding(embedding, 256)
+
+        assert len(short) == 256
+        assert np.linalg.norm(short) == pytest.approx(1.0, abs=1e-5)
+        expected = embedding[:256] / np.linalg.norm(embedding[:256])
+        np.testing.assert_allclose(short, expected, atol=1e-6)
+
+    def test_zero_vector(self):
+        """ゼロベクトルはそのまま返す"""
+        assert shorten_embedding([0.0] * 8, 4) == [0.0] * 4
+
+    def test_coarse_ranking_preserves_nearest_neighbors(self):
+        """クラスタ構造がある場合、短縮版の上位候補に元の最近傍が含まれる"""
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 1536))
+        labs = np.repeat(centers, 25, axis=0) + 0.3 * rng.normal(size=(500, 1536))
+        query = centers[3] + 0.3 * rng.normal(size=1536)
+
+        full = labs / np.linalg.norm(labs, axis=1, keepdims=True)
+        short = np.array([shorten_embedding(lab, 256) for lab in labs])
+        query_short = np.array(shorten_embedding(query, 256))
+
+        exact_top = set(np.argsort(-(full @ query))[:10])
+        candidates = set(np.argsort(-(short @ query_short))[:100])
+        assert exact_top <= candidates
+
+
+class TestBackfillShortEmbeddings:
+    """短縮埋め込みの補完のテスト"""
+
+    def _rows(self, n):
+        return [SimpleNamespace(id=i, embedding=[1.0] * 8) for i in range(n)]
+
+    def _engine(self):
+        return SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+
+    def test_backfills_in_batches_and_bumps_version(self):
+        """全件をバッチで補完し、このプロセスのデータバージョンを進める"""
+        db = BackfillSession(self._rows(5))
+        version = data_version.current
+
+        assert self._engine().backfill_short_embeddings(db, batch_size=2) == 5
+
+        assert db.updated == [0, 1, 2, 3, 4]
+        assert data_version.current == version + 1
+
+    def test_skips_when_other_worker_holds_lock(self):
+        """他のワーカーが補完中なら何もしない"""
+        db = BackfillSession(self._rows(3), locked=False)
+        version = data_version.current
+
+        assert self._engine().backfill_short_embeddings(db) == 0
+
+        assert db.updated == []
+        assert data_version.current == version
+
+
+class TestCoarseToFineSearch:
+    """粗検索から精密検索への2段階検索のテスト"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("limit,ef_search", [(20, 200), (500, 1000)])
+    async def test_widens_ef_search(self, monkeypatch, limit, ef_search):
+        """同じトランザクション内で hnsw.ef_search を候補数まで（上限 1000）広げる"""
+        monkeypatch.setattr(semantic_search.settings, "COARSE_CANDIDATE_FACTOR", 10)
+        engine = SemanticSearchEngine(provider=object(), cache=EmbeddingCache(max_entries=8))
+        db = FakeSession()
+
+        await engine._search_coarse_to_fine(db, [1.0] * 8, limit, None, None, 0.0)
+
+        statements = [str(statement) for statement in db.statements()]
+        assert statements[0] == f"SET LOCAL hnsw.ef_search = {ef_search}"
+        assert "LIMIT :candidate_limit" in statements[1]
+        assert db.calls[1][1]["candidate_limit"] == limit * 10
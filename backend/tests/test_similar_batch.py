@@ -0,0 +1,156 @@
+# backend/tests/test_similar_batch.py
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core import semantic_search
+from app.core.data_version import DataVersion
+from app.core.embedding_cache import EmbeddingCache
+from app.core.semantic_search import SemanticSearchEngine
+from app.core.vector_index import VectorIndex, build_index_data
+
+from helpers import FakeSession
+
+
+def _normalized(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _row(target_id: int, lab_id: int, score: float):
+    return SimpleNamespace(
+        target_id=target_id,
+        id=lab_id,
+        name=f"研究室{lab_id}",
+        professor_name=None,
+        department=None,
+        research_theme="テーマ",
+        research_content="内容",
+        research_field="工学",
+        speciality=None,
+        keywords=None,
+        lab_url=None,
+        university_name="テスト大学",
+        prefecture="東京都",
+        region="関東",
+        similarity_score=score
+    )
+
+
+class SimilarSession(FakeSession):
+    """SQL ごとに決まった行を返すセッション"""
+
+    def __init__(self, targets, neighbor_rows=(), lateral_rows=()):
+        super().__init__()
+        self.targets = targets
+        self.neighbor_rows = list(neighbor_rows)
+        self.lateral_rows = list(lateral_rows)
+
+    def respond(self, statement, params):
+        if statement is semantic_search._BATCH_TARGETS_SQL:
+            return [
+                SimpleNamespace(id=lab_id, has_embedding=has_embedding)
+                for lab_id, has_embedding in self.targets.items()
+                if lab_id in params["target_ids"]
+            ]
+        if statement is semantic_search._NEIGHBOR_BATCH_SQL:
+            return [row for row in self.neighbor_rows if row.target_id in params["target_ids"]]
+        if statement is semantic_search._SIMILAR_BATCH_SQL:
+            return [row for row in self.lateral_rows if row.target_id in params["target_ids"]]
+        if statement is semantic_search._HYDRATE_PAIRS_SQL:
+            return [
+                _row(target_id, lab_id, score)
+                for target_id, lab_id, score in zip(params["target_ids"], params["ids"], params["scores"])
+            ]
+        raise AssertionError("unexpected query")
+
+
+class TestSimilarMany:
+    """インメモリインデックスの一括類似検索のテスト"""
+
+    def test_matches_single_lookup(self):
+        """1件ずつ求めた結果と一致する"""
+        matrix = _normalized(200, 32)
+        index = VectorIndex(DataVersion())
+        index.swap(build_index_data(list(range(200)), matrix, ["-"] * 200, ["-"] * 200))
+
+        batch = index.similar_many([3, 50, 999], 5)
+
+        assert set(batch) == {3, 50}
+        for lab_id in (3, 50):
+            assert [hit for hit, _ in batch[lab_id]] == [hit for hit, _ in index.similar(lab_id, 5)]
+
+    def test_excludes_input(self):
+        """除外指定した研究室は近傍に含めない"""
+        matrix = _normalized(50, 16, seed=1)
+        index = VectorIndex(DataVersion())
+        index.swap(build_index_data(list(range(50)), matrix, ["-"] * 50, ["-"] * 50))
+
+        batch = index.similar_many([1, 2], 10, exclude_ids=[1, 2])
+
+        for neighbors in batch.values():
+            assert not {1, 2} & {lab_id for lab_id, _ in neighbors}
+            assert len(neighbors) == 10
+
+
+class TestSimilarLabsBatch:
+    """類似研究室一括取得のテスト"""
+
+    def _engine(self, vector_index=None):
+        engine = SemanticSearchEngine(cache=EmbeddingCache(max_entries=8))
+        engine.batcher = None
+        engine.vector_index = vector_index
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_reports_missing_and_no_embedding(self, monkeypatch):
+        """存在しない研究室と埋め込み未生成の研究室を区別して返す"""
+        monkeypatch.setattr(semantic_search.settings, "LAB_NEIGHBORS_ENABLED", False)
+        db = SimilarSession(
+            targets={1: True, 2: False},
+            lateral_rows=[_row(1, 7, 0.9), _row(1, 8, 0.8)]
+        )
+
+        results, missing, no_embedding = await self._engine().find_similar_labs_batch(db, [1, 2, 3, 1], 5)
+
+        assert list(results) == [1]
+        assert [r.id for r in results[1]] == [7, 8]
+        assert missing == [3]
+        assert no_embedding == [2]
+        # 対象確認とLATERALの2クエリだけで済む
+        assert db.statements() == [semantic_search._BATCH_TARGETS_SQL, semantic_search._SIMILAR_BATCH_SQL]
+
+    @pytest.mark.asyncio
+    async def test_neighbor_table_then_lateral(self, monkeypatch):
+        """近傍テーブルに無い研究室だけをLATERALクエリで計算する"""
+        monkeypatch.setattr(semantic_search.settings, "LAB_NEIGHBORS_ENABLED", True)
+        monkeypatch.setattr(semantic_search.settings, "LAB_NEIGHBORS_TOP_N", 20)
+        db = SimilarSession(
+            targets={1: True, 2: True},
+            neighbor_rows=[_row(1, 5, 0.9), _row(1, 6, 0.8), _row(1, 7, 0.7)],
+            lateral_rows=[_row(2, 9, 0.6)]
+        )
+
+        results, _, _ = await self._engine().find_similar_labs_batch(db, [1, 2], limit=2, exclude_input=True)
+
+        assert [r.id for r in results[1]] == [5, 6]
+        assert [r.id for r in results[2]] == [9]
+        _, lateral_params = db.calls[-1]
+        assert lateral_params["target_ids"] == [2]
+        assert lateral_params["exclude_ids"] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_memory_index_uses_single_hydration(self, monkeypatch):
+        """インメモリインデックスの結果は1回のクエリで行に展開する"""
+        monkeypatch.setattr(semantic_search.settings, "LAB_NEIGHBORS_ENABLED", False)
+        matrix = _normalized(30, 8, seed=2)
+        index = VectorIndex(DataVersion())
+        index.swap(build_index_data(list(range(30)), matrix, ["-"] * 30, ["-"] * 30))
+        db = SimilarSession(targets={0: True, 1: True})
+
+        results, _, _ = await self._engine(index).find_similar_labs_batch(db, [0, 1], limit=3)
+
+        assert [r.id for r in results[0]] == [lab_id for lab_id, _ in index.similar(0, 3)]
+        assert len(results[1]) == 3
+        assert db.statements() == [semantic_search._BATCH_TARGETS_SQL, semantic_search._HYDRATE_PAIRS_SQL]
@@ -0,0 +1,99 @@
+# backend/tests/test_single_flight.py
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """同時実行の重複排除のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """同じキーの同時呼び出しが1回の実行を共有するテスト"""
+        flight = SingleFlight("test_share")
+        executions = 0
+
+        async def work():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*[flight.do("q", work) for _ in range(30)])
+
+        assert results == ["result"] * 30
+        assert executions == 1
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """異なるキーは別々に実行されるテスト"""
+        flight = SingleFlight("test_keys")
+
+        async def work(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: work(1)),
+            flight.do("b", lambda: work(2))
+        )
+        assert results == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """1人の待機者のキャンセルが他の待機者に影響しないテスト"""
+        flight = SingleFlight("test_cancel_one")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("q", work))
+        second = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancels_work(self):
+        """全待機者がキャンセルすると処理自体が中止されるテスト"""
+        flight = SingleFlight("test_cancel_all")
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared(self):
+        """処理の例外が全待機者に伝わるテスト"""
+        flight = SingleFlight("test_error")
+
+        async def work():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("q", work), flight.do("q", work), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
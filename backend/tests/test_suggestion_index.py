@@ -0,0 +1,152 @@
+# backend/tests/test_suggestion_index.py
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.core import suggestion_index as suggestion_module
+from app.core.data_version import DataVersion
+from app.core.suggestion_index import Suggestion, SuggestionIndex, SuggestionSnapshot, split_keywords
+
+from helpers import FakeSession
+
+T0 = datetime(2024, 4, 1, tzinfo=timezone.utc)
+
+
+def _lab(lab_id, name, field, keywords=None, university_id=1, updated_at=T0):
+    return SimpleNamespace(
+        id=lab_id,
+        university_id=university_id,
+        name=name,
+        research_field=field,
+        keywords=keywords,
+        updated_at=updated_at
+    )
+
+
+class CatalogSession(FakeSession):
+    """研究室と大学の行を返し、差分読み込みの条件を記録するセッション"""
+
+    def __init__(self, labs, universities):
+        super().__init__()
+        self.labs = labs
+        self.universities = universities
+        self.since = []
+
+    def respond(self, statement, params):
+        if statement is suggestion_module._ALL_LABS_SQL:
+            return self.labs
+        if statement is suggestion_module._LABS_SINCE_SQL:
+            self.since.append(params["since"])
+            return [lab for lab in self.labs if lab.updated_at >= params["since"]]
+        if statement is suggestion_module._LAB_IDS_SQL:
+            return [(lab.id,) for lab in self.labs]
+        if statement is suggestion_module._UNIVERSITIES_SQL:
+            return [SimpleNamespace(id=i, name=name) for i, name in self.universities.items()]
+        raise AssertionError("unexpected query")
+
+
+def _texts(suggestions):
+    return [suggestion.text for suggestion in suggestions]
+
+
+class TestSuggestionSnapshot:
+    """候補インデックスの検索のテスト"""
+
+    def _snapshot(self):
+        return SuggestionSnapshot([
+            Suggestion("免疫学", "field", 3.0),
+            Suggestion("免疫療法", "keyword", 5.0),
+            Suggestion("がん免疫", "keyword", 4.0),
+            Suggestion("Machine Learning", "keyword", 1.0),
+            Suggestion("東京大学", "university", 2.0)
+        ])
+
+    def test_prefix_by_weight(self):
+        """前方一致は重みの大きい順"""
+        assert _texts(self._snapshot().suggest("免疫")) == ["免疫療法", "免疫学", "がん免疫"]
+
+    def test_mid_word_match(self):
+        """語中の一致も n-gram で見つける"""
+        assert _texts(self._snapshot().suggest("疫療")) == ["免疫療法"]
+        assert _texts(self._snapshot().suggest("大")) == ["東京大学"]
+
+    def test_prefix_before_infix(self):
+        """前方一致を語中の一致より先に返す"""
+        snapshot = SuggestionSnapshot([
+            Suggestion("がん免疫", "keyword", 10.0),
+            Suggestion("免疫学", "field", 1.0)
+        ])
+
+        assert _texts(snapshot.suggest("免疫")) == ["免疫学", "がん免疫"]
+
+    def test_normalized_matching(self):
+        """全角・大文字の違いを無視する"""
+        assert _texts(self._snapshot().suggest("ｍａｃｈｉｎｅ")) == ["Machine Learning"]
+
+    def test_limit_and_no_match(self):
+        snapshot = self._snapshot()
+
+        assert len(snapshot.suggest("免疫", limit=2)) == 2
+        assert snapshot.suggest("ロボット") == []
+
+    def test_duplicate_text_keeps_heaviest(self):
+        """同じ文字列の候補は重みの大きいカテゴリを残す"""
+        snapshot = SuggestionSnapshot([Suggestion("工学", "field", 2.0), Suggestion("工学", "keyword", 1.0)])
+
+        assert [(s.text, s.category) for s in snapshot.suggest("工")] == [("工学", "field")]
+
+
+class TestSuggestionIndex:
+    """DBのデータから作る候補インデックスのテスト"""
+
+    def test_split_keywords(self):
+        assert split_keywords("AI, ロボット、 制御 ,") == ["AI", "ロボット", "制御"]
+
+    def test_weights_by_lab_count_and_popularity(self):
+        """研究室数と人気クエリで重み付けする"""
+        db = CatalogSession(
+            labs=[
+                _lab(1, "免疫制御研究室", "医学", "免疫, 細胞"),
+                _lab(2, "免疫工学研究室", "工学", "免疫"),
+                _lab(3, "細胞生物学研究室", "生物学", "細胞")
+            ],
+            universities={1: "東京大学"}
+        )
+        index = SuggestionIndex(DataVersion())
+        index.refresh(db)
+
+        assert _texts(index.suggest("免疫"))[0] == "免疫"
+        assert "東京大学" in _texts(index.suggest("東京"))
+
+        index.refresh(db, popular=[("細胞の研究がしたい", 100.0)])
+        assert _texts(index.suggest("細"))[0] == "細胞"
+
+    def test_incremental_refresh(self):
+        """データ更新後は更新された研究室だけを読み直し、削除も反映する"""
+        version = DataVersion()
+        db = CatalogSession(
+            labs=[_lab(1, "量子研究室", "物理学", "量子"), _lab(2, "ロボット研究室", "工学", "ロボット")],
+            universities={1: "京都大学"}
+        )
+        index = SuggestionIndex(version)
+        index.refresh(db)
+        assert index.refresh(db) is False
+
+        later = T0 + timedelta(hours=1)
+        db.labs = [_lab(1, "量子情報研究室", "物理学", "量子計算", updated_at=later)]
+        version.bump("test")
+        assert index.refresh(db) is True
+
+        assert db.since == [T0 - suggestion_module._CHANGE_OVERLAP]
+        assert "量子計算" in _texts(index.suggest("量子"))
+        assert "量子研究室" not in _texts(index.suggest("量子"))
+        assert "ロボット研究室" not in _texts(index.suggest("ロボ"))
+
+    def test_decay_alone_does_not_rebuild(self):
+        """時間減衰でスコア全体が縮んだだけでは作り直さない"""
+        db = CatalogSession(labs=[_lab(1, "細胞研究室", "生物学", "細胞")], universities={1: "東京大学"})
+        index = SuggestionIndex(DataVersion())
+        index.refresh(db, popular=[("細胞の研究", 10.0), ("がん治療", 4.0)])
+
+        assert index.refresh(db, popular=[("細胞の研究", 5.0), ("がん治療", 2.0)]) is False
+        assert index.refresh(db, popular=[("細胞の研究", 5.0), ("がん治療", 4.0)]) is True
+        assert index.refresh(db, popular=[("細胞の研究", 5.0), ("がん治療", 4.0), ("宇宙", 1.0)]) is True
@@ -0,0 +1,112 @@
+# backend/tests/test_vector_index.py
+import numpy as np
+
+from app.core.data_version import DataVersion
+from app.core.vector_index import VectorIndex, build_index_data
+
+
+def _make_index(n: int = 200, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(n, dim)).astype(np.float32)
+    regions = ["関東" if i % 3 == 0 else "関西" for i in range(n)]
+    fields = ["医学" if i % 2 == 0 else "工学" for i in range(n)]
+    ids = list(range(1, n + 1))
+
+    index = VectorIndex(DataVersion())
+    index.swap(build_index_data(ids, embeddings, regions, fields))
+    return index, embeddings, regions, fields
+
+
+def _brute_force(embeddings, query, k, mask=None):
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    order = np.argsort(-scores)[:k]
+    return [int(i) + 1 for i in order if np.isfinite(scores[i])]
+
+
+class TestVectorIndex:
+    """インメモリ・ベクトルインデックスのテスト"""
+
+    def test_matches_brute_force(self):
+        """全件ソートと同じ上位k件を返す"""
+        index, embeddings, _, _ = _make_index()
+        query = np.random.default_rng(1).normal(size=16)
+
+        hits = index.search(query, 10)
+
+        assert [lab_id for lab_id, _ in hits] == _brute_force(embeddings, query, 10)
+        scores = [score for _, score in hits]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_filters_applied_as_mask(self):
+        """地域・分野フィルターを満たす研究室だけを返す"""
+        index, embeddings, regions, fields = _make_index()
+        query = np.random.default_rng(2).normal(size=16)
+
+        hits = index.search(query, 5, region_filter=["関東"], field_filter=["医学"])
+
+        mask = np.array([r == "関東" and f == "医学" for r, f in zip(regions, fields)])
+        assert [lab_id for lab_id, _ in hits] == _brute_force(embeddings, query, 5, mask)
+
+    def test_filter_accepts_generator(self):
+        """フィルターは1回しか走査できない iterable でもよい"""
+        index, embeddings, regions, _ = _make_index()
+        query = np.random.default_rng(3).normal(size=16)
+
+        hits = index.search(query, 5, region_filter=(region for region in ["関東"]))
+
+        mask = np.array([r == "関東" for r in regions])
+        assert [lab_id for lab_id, _ in hits] == _brute_force(embeddings, query, 5, mask)
+
+    def test_unknown_filter_value_returns_nothing(self):
+        """存在しないフィルター値では結果が空"""
+        index, _, _, _ = _make_index()
+        assert index.search(np.ones(16), 5, region_filter=["北海道"]) == []
+
+    def test_min_similarity(self):
+        """類似度の閾値未満は返さない"""
+        index, _, _, _ = _make_index()
+        hits = index.search(np.ones(16), 50, min_similarity=0.3)
+        assert all(score >= 0.3 for _, score in hits)
+
+    def test_similar_excludes_target(self):
+        """類似研究室検索は自分自身を含まない"""
+        index, _, _, _ = _make_index()
+
+        hits = index.similar(7, 5)
+
+        assert len(hits) == 5
+        assert 7 not in [lab_id for lab_id, _ in hits]
+        assert index.similar(9999, 5) is None
+
+    def test_stale_after_data_version_bump(self):
+        """データバージョンが進むと再構築が必要になる"""
+        index, _, _, _ = _make_index()
+        assert not index.stale
+
+        index.data_version.bump("test")
+
+        assert index.stale
+        assert index.loaded
+
+
+class TestIndexData:
+    """インデックスの構築と行番号の検索のテスト"""
+
+    def test_build_does_not_modify_input(self):
+        """呼び出し側の float32 配列を正規化で書き換えない"""
+        embeddings = np.random.default_rng(0).normal(size=(10, 4)).astype(np.float32)
+        original = embeddings.copy()
+
+        data = build_index_data(list(range(10)), embeddings, ["-"] * 10, ["-"] * 10)
+
+        np.testing.assert_array_equal(embeddings, original)
+        np.testing.assert_allclose(np.linalg.norm(data.matrix, axis=1), 1.0, rtol=1e-5)
+
+    def test_row_of(self):
+        data = build_index_data([2, 5, 9], np.ones((3, 4)), ["-"] * 3, ["-"] * 3)
+
+        assert [data.row_of(lab_id) for lab_id in (2, 5, 9)] == [0, 1, 2]
+        assert [data.row_of(lab_id) for lab_id in (1, 3, 10)] == [None, None, None]
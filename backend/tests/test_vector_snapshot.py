@@ -0,0 +1,83 @@
+# backend/tests/test_vector_snapshot.py
+import numpy as np
+
+from app.core import vector_snapshot
+from app.core.data_version import DataVersion
+from app.core.vector_index import VectorIndex, build_index_data
+from app.core.vector_snapshot import SnapshotStore
+
+
+def _index_data(n: int = 50, dim: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return build_index_data(
+        ids=list(range(1, n + 1)),
+        embeddings=rng.normal(size=(n, dim)),
+        regions=["関東" if i % 2 else "九州" for i in range(n)],
+        fields=["工学"] * n
+    )
+
+
+class TestSnapshotStore:
+    """ベクトルスナップショットのテスト"""
+
+    def test_export_and_memory_map(self, tmp_path):
+        """書き出したスナップショットがメモリマップで開ける"""
+        store = SnapshotStore(str(tmp_path))
+        data = _index_data()
+
+        name = store.export(data, "a" * 40)
+        opened = store.open()
+
+        assert store.current_name() == name
+        assert isinstance(opened.matrix, np.memmap)
+        np.testing.assert_array_equal(opened.matrix, data.matrix)
+        np.testing.assert_array_equal(opened.ids, data.ids)
+        assert opened.regions == data.regions
+        assert opened.source == f"snapshot:{name}"
+
+    def test_search_on_snapshot(self, tmp_path):
+        """メモリマップしたインデックスでも検索結果が同じ"""
+        store = SnapshotStore(str(tmp_path))
+        data = _index_data()
+        store.export(data, "a" * 40)
+
+        in_memory = VectorIndex(DataVersion())
+        in_memory.swap(data)
+        mapped = VectorIndex(DataVersion())
+        mapped.swap(store.open())
+
+        query = np.random.default_rng(3).normal(size=8)
+        assert mapped.search(query, 5, region_filter=["関東"]) == \
+            in_memory.search(query, 5, region_filter=["関東"])
+
+    def test_load_or_export_reuses_matching_snapshot(self, tmp_path, monkeypatch):
+        """フィンガープリントが同じなら再エクスポートしない"""
+        store = SnapshotStore(str(tmp_path))
+        fingerprint = {"value": "a" * 40}
+        exports = []
+
+        def fake_read(_db):
+            exports.append(1)
+            return _index_data(seed=len(exports))
+
+        monkeypatch.setattr(vector_snapshot, "catalog_fingerprint", lambda _db: fingerprint["value"])
+        monkeypatch.setattr(vector_snapshot, "read_index_data", fake_read)
+
+        first = store.load_or_export(db=None)
+        store.load_or_export(db=None)
+        assert len(exports) == 1
+
+        fingerprint["value"] = "b" * 40
+        second = store.load_or_export(db=None)
+        assert len(exports) == 2
+        assert first.source != second.source
+
+    def test_prune_keeps_latest(self, tmp_path):
+        """古いスナップショットは keep 件を残して削除"""
+        store = SnapshotStore(str(tmp_path), keep=2)
+        for i in range(4):
+            store.export(_index_data(seed=i), f"{i}" * 40)
+
+        snapshots = store.list_snapshots()
+        assert len(snapshots) == 2
+        assert store.current_name() in snapshots
@@ -46,6 +46,7 @@ CREATE TABLE research_labs (
     funding_sources TEXT,
     notable_achievements TEXT,
     embedding vector(1536),  -- OpenAI text-embedding-3-small
+    embedding_short vector(256),  -- 粗検索用の短縮埋め込み（先頭256次元を再正規化）
     content_hash VARCHAR(64), -- コンテンツ変更検出用
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -53,10 +54,10 @@ CREATE TABLE research_labs (
     CONSTRAINT unique_lab_per_university UNIQUE(university_id, name)
 );
 
--- 検索ログテーブル（拡張版）
+-- 検索ログテーブル（拡張版、月別のレンジパーティション）
 DROP TABLE IF EXISTS search_logs CASCADE;
 CREATE TABLE search_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     session_id VARCHAR(255),
     user_ip INET,
     query TEXT NOT NULL,
@@ -65,20 +66,83 @@ CREATE TABLE search_logs (
     filters_applied JSONB,  -- 適用されたフィルター
     clicked_lab_id INTEGER REFERENCES research_labs(id),
     search_quality_score FLOAT,  -- 検索品質スコア (0-1)
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    
+    -- パーティションキーを主キーに含める
+    PRIMARY KEY (id, timestamp),
     
     -- プライバシー考慮：IPアドレスは24時間後に削除
     CONSTRAINT ip_retention CHECK (
         user_ip IS NULL OR 
         timestamp > CURRENT_TIMESTAMP - INTERVAL '24 hours'
     )
+) PARTITION BY RANGE (timestamp);
+
+-- クエリ埋め込みキャッシュテーブル（全ワーカーで共有）
+DROP TABLE IF EXISTS query_embeddings CASCADE;
+CREATE TABLE query_embeddings (
+    query_hash VARCHAR(64) PRIMARY KEY,  -- 正規化クエリ + モデル名の SHA-256
+    model VARCHAR(100) NOT NULL,
+    query_text TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 類似研究室テーブル（研究室ごとに事前計算した上位N件）
+DROP TABLE IF EXISTS lab_neighbors CASCADE;
+CREATE TABLE lab_neighbors (
+    lab_id INTEGER NOT NULL REFERENCES research_labs(id) ON DELETE CASCADE,
+    rank SMALLINT NOT NULL,  -- 類似度順位（1始まり）
+    neighbor_id INTEGER NOT NULL REFERENCES research_labs(id) ON DELETE CASCADE,
+    similarity FLOAT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (lab_id, rank)
+);
+
+-- 人気検索クエリテーブル（全ワーカーの検索回数を時間減衰付きで合算）
+DROP TABLE IF EXISTS popular_queries CASCADE;
+CREATE TABLE popular_queries (
+    query TEXT PRIMARY KEY,  -- 正規化済みクエリ
+    score FLOAT NOT NULL,  -- updated_at 時点の減衰済みスコア
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 検索統計の時間別集計テーブル（生ログを削除しても履歴を残す）
+DROP TABLE IF EXISTS search_stats_hourly CASCADE;
+CREATE TABLE search_stats_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE PRIMARY KEY,  -- 集計期間の開始時刻
+    search_count INTEGER NOT NULL,
+    results_sum BIGINT NOT NULL,
+    latency_count INTEGER NOT NULL,  -- 検索時間が記録された件数
+    latency_sum FLOAT NOT NULL,
+    latency_min FLOAT,
+    latency_max FLOAT,
+    latency_sketch JSONB NOT NULL,  -- 検索時間の分位点スケッチ（バケット → 件数）
+    finalized BOOLEAN NOT NULL DEFAULT FALSE,  -- 以降は生ログから再集計しない
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 検索統計の日別集計テーブル（時間別集計をマージ）
+DROP TABLE IF EXISTS search_stats_daily CASCADE;
+CREATE TABLE search_stats_daily (
+    bucket_start TIMESTAMP WITH TIME ZONE PRIMARY KEY,  -- 集計期間の開始時刻
+    search_count INTEGER NOT NULL,
+    results_sum BIGINT NOT NULL,
+    latency_count INTEGER NOT NULL,  -- 検索時間が記録された件数
+    latency_sum FLOAT NOT NULL,
+    latency_min FLOAT,
+    latency_max FLOAT,
+    latency_sketch JSONB NOT NULL,  -- 検索時間の分位点スケッチ（バケット → 件数）
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ユーザーフィードバックテーブル（将来拡張用）
 DROP TABLE IF EXISTS user_feedback CASCADE;
 CREATE TABLE user_feedback (
     id SERIAL PRIMARY KEY,
-    search_log_id INTEGER REFERENCES search_logs(id),
+    search_log_id INTEGER,  -- search_logs.id（ログはパーティションごと削除するため外部キーにしない）
     lab_id INTEGER REFERENCES research_labs(id),
     feedback_type VARCHAR(50) CHECK (feedback_type IN ('helpful', 'not_helpful', 'report')),
     feedback_text TEXT,
@@ -105,6 +169,7 @@ CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_universities_type ON universities(ty
 
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_university_id ON research_labs(university_id);
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_research_field ON research_labs(research_field);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_field_id ON research_labs(research_field, id);  -- 分野順の一覧のキーセットページング
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_professor_name ON research_labs(professor_name);
 
 -- ベクトル検索インデックス（HNSW）
@@ -112,6 +177,10 @@ CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_embedding_hnsw
 ON research_labs USING hnsw (embedding vector_cosine_ops) 
 WITH (m = 16, ef_construction = 64);
 
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_embedding_short_hnsw 
+ON research_labs USING hnsw (embedding_short vector_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
+
 -- 全文検索インデックス（日本語対応）
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_content_gin 
 ON research_labs USING gin(
@@ -122,6 +191,12 @@ ON research_labs USING gin(
     )
 );
 
+-- 語句検索の部分一致インデックス（semantic_search._LEXICAL_SQL の <% と同じ式）
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_research_labs_lexical_trgm 
+ON research_labs USING gin(
+    (name || ' ' || research_theme || ' ' || research_content || ' ' || COALESCE(keywords, '')) gin_trgm_ops
+);
+
 -- 複合インデックス（頻繁なクエリパターン用）
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_labs_university_field 
 ON research_labs(university_id, research_field);
@@ -129,10 +204,44 @@ ON research_labs(university_id, research_field);
 CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_labs_field_updated 
 ON research_labs(research_field, updated_at DESC);
 
--- 検索ログインデックス
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_logs_timestamp ON search_logs(timestamp DESC);
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_logs_query_hash ON search_logs USING hash(query);
-CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_search_logs_session ON search_logs(session_id, timestamp);
+-- 検索ログインデックス（パーティション化したテーブルには CONCURRENTLY を使えない。
+-- 親テーブルに定義すると既存・今後作成する各パーティションに作成される）
+CREATE INDEX IF NOT EXISTS idx_search_logs_timestamp ON search_logs(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_search_logs_query_hash ON search_logs USING hash(query);
+CREATE INDEX IF NOT EXISTS idx_search_logs_session ON search_logs(session_id, timestamp);
+
+-- 検索ログの月別パーティションを作成（当月から months_ahead か月先まで）
+-- 月の区切りは日本時間（アプリの SEARCH_STATS_TIMEZONE と合わせる）
+CREATE OR REPLACE FUNCTION create_search_log_partitions(months_ahead INTEGER DEFAULT 2)
+RETURNS INTEGER AS $$
+DECLARE
+    local_start TIMESTAMP;
+    partition_name TEXT;
+    created_count INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        local_start := DATE_TRUNC('month', CURRENT_TIMESTAMP AT TIME ZONE 'Asia/Tokyo') + MAKE_INTERVAL(months => i);
+        partition_name := 'search_logs_' || TO_CHAR(local_start, 'YYYYMM');
+        IF TO_REGCLASS(partition_name) IS NULL THEN
+            EXECUTE FORMAT(
+                'CREATE TABLE %I PARTITION OF search_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                local_start AT TIME ZONE 'Asia/Tokyo',
+                (local_start + INTERVAL '1 month') AT TIME ZONE 'Asia/Tokyo'
+            );
+            created_count := created_count + 1;
+        END IF;
+    END LOOP;
+    
+    RETURN created_count;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_search_log_partitions();
+
+-- クエリ埋め込みキャッシュインデックス（LRU削除用）
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_query_embeddings_last_used_at ON query_embeddings(last_used_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_lab_neighbors_neighbor_id ON lab_neighbors(neighbor_id);
 
 -- ===== トリガー関数 =====
 
@@ -247,17 +356,34 @@ ON CONFLICT (name) DO NOTHING;
 
 -- ===== パフォーマンス監視用ビュー =====
 
--- 検索パフォーマンス監視ビュー
+-- 分位点スケッチ（バケット → 件数）から q 分位点を求める（app/core/search_stats.py と同じ計算）
+CREATE OR REPLACE FUNCTION latency_sketch_quantile(sketch JSONB, q DOUBLE PRECISION, accuracy DOUBLE PRECISION DEFAULT 0.01)
+RETURNS DOUBLE PRECISION AS $$
+    WITH buckets AS (
+        SELECT key::INTEGER AS key, value::BIGINT AS count
+        FROM jsonb_each_text(sketch)
+    ),
+    ranked AS (
+        SELECT key, SUM(count) OVER (ORDER BY key) AS cumulative, SUM(count) OVER () AS total
+        FROM buckets
+    )
+    SELECT 2 * POWER((1 + accuracy) / (1 - accuracy), key) / ((1 + accuracy) / (1 - accuracy) + 1)
+    FROM ranked
+    WHERE cumulative > q * (total - 1)
+    ORDER BY key
+    LIMIT 1
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 検索パフォーマンス監視ビュー（時間別集計を参照し、生ログは読まない）
 CREATE OR REPLACE VIEW search_performance_stats AS
 SELECT 
-    DATE_TRUNC('hour', timestamp) as hour,
-    COUNT(*) as search_count,
-    AVG(search_time_ms) as avg_search_time,
-    PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY search_time_ms) as p95_search_time,
-    AVG(results_count) as avg_results_count
-FROM search_logs 
-WHERE timestamp > CURRENT_TIMESTAMP - INTERVAL '24 hours'
-GROUP BY DATE_TRUNC('hour', timestamp)
+    bucket_start as hour,
+    search_count,
+    latency_sum / NULLIF(latency_count, 0) as avg_search_time,
+    latency_sketch_quantile(latency_sketch, 0.95) as p95_search_time,
+    results_sum::FLOAT / NULLIF(search_count, 0) as avg_results_count
+FROM search_stats_hourly 
+WHERE bucket_start > DATE_TRUNC('hour', CURRENT_TIMESTAMP) - INTERVAL '24 hours'
 ORDER BY hour DESC;
 
 -- 人気研究分野ビュー
@@ -288,26 +414,68 @@ UNION ALL
 SELECT 
     'search_logs' as table_name,
     COUNT(*) as row_count,
-    pg_size_pretty(pg_total_relation_size('search_logs')) as table_size
+    pg_size_pretty((
+        SELECT SUM(pg_total_relation_size(inhrelid))
+        FROM pg_inherits
+        WHERE inhparent = 'search_logs'::regclass
+    )) as table_size
 FROM search_logs;
 
 -- ===== メンテナンス用関数 =====
 
--- 古いログの削除関数
+-- 古いログの削除関数（削除したパーティション数を返す）
+-- 30日以上前、かつ集計が確定した時間帯までのパーティションを行削除ではなく DROP する
 CREATE OR REPLACE FUNCTION cleanup_old_logs()
 RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMP WITH TIME ZONE;
+    partition RECORD;
+    dropped_count INTEGER := 0;
+BEGIN
+    cutoff := (
+        SELECT MAX(bucket_start) + INTERVAL '1 hour'
+        FROM search_stats_hourly
+        WHERE finalized
+    );
+    IF cutoff IS NULL THEN
+        RETURN 0;
+    END IF;
+    cutoff := LEAST(cutoff, CURRENT_TIMESTAMP - INTERVAL '30 days');
+    
+    FOR partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'search_logs'::regclass
+        AND c.relname ~ '^search_logs_[0-9]{6}$'
+        AND (TO_DATE(RIGHT(c.relname, 6), 'YYYYMM') + INTERVAL '1 month') AT TIME ZONE 'Asia/Tokyo' <= cutoff
+    LOOP
+        EXECUTE FORMAT('DROP TABLE %I', partition.relname);
+        dropped_count := dropped_count + 1;
+    END LOOP;
+    
+    -- 今後のパーティションを補充
+    PERFORM create_search_log_partitions();
+    
+    RETURN dropped_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- クエリ埋め込みキャッシュの削減関数（最終利用日時が古いものから削除）
+CREATE OR REPLACE FUNCTION evict_query_embeddings(max_rows INTEGER)
+RETURNS INTEGER AS $$
 DECLARE
     deleted_count INTEGER;
 BEGIN
-    -- 30日以上古い検索ログを削除
-    DELETE FROM search_logs 
-    WHERE timestamp < CURRENT_TIMESTAMP - INTERVAL '30 days';
+    DELETE FROM query_embeddings
+    WHERE query_hash IN (
+        SELECT query_hash FROM query_embeddings
+        ORDER BY last_used_at DESC
+        OFFSET max_rows
+    );
     
     GET DIAGNOSTICS deleted_count = ROW_COUNT;
     
-    -- 統計情報を更新
-    ANALYZE search_logs;
-    
     RETURN deleted_count;
 END;
 $$ LANGUAGE plpgsql;
@@ -318,6 +486,7 @@ RETURNS VOID AS $$
 BEGIN
     -- ベクトルインデックスを再構築
     REINDEX INDEX CONCURRENTLY idx_research_labs_embedding_hnsw;
+    REINDEX INDEX CONCURRENTLY idx_research_labs_embedding_short_hnsw;
     
     -- 統計情報を更新
     ANALYZE research_labs;
@@ -369,7 +538,7 @@ VACUUM ANALYZE search_logs;
 DO $$
 BEGIN
     RAISE NOTICE '✅ 研究室ファインダー データベース初期化完了';
-    RAISE NOTICE '📊 テーブル作成: universities, research_labs, search_logs, user_feedback, research_categories';
+    RAISE NOTICE '📊 テーブル作成: universities, research_labs, search_logs, query_embeddings, lab_neighbors, popular_queries, search_stats_hourly, search_stats_daily, user_feedback, research_categories';
     RAISE NOTICE '🚀 インデックス作成: ベクトル検索、全文検索、複合インデックス';
     RAISE NOTICE '⚡ パフォーマンス最適化設定適用済み';
     RAISE NOTICE '🔒 セキュリティ設定適用済み';
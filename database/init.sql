@@ -32,17 +32,74 @@ CREATE TABLE IF NOT EXISTS research_labs (
     keywords TEXT,
     lab_url VARCHAR(500),
     embedding vector(1536), -- OpenAI text-embedding-3-small の次元数
+    embedding_short vector(256), -- 粗検索用の短縮埋め込み（先頭256次元を再正規化）
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
--- 検索ログテーブル
+-- 検索ログテーブル（月別のレンジパーティション、保持期間を過ぎたパーティションは DROP する）
 CREATE TABLE IF NOT EXISTS search_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     query TEXT NOT NULL,
     results_count INTEGER NOT NULL,
     search_time_ms FLOAT,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp) -- パーティションキーを主キーに含める
+) PARTITION BY RANGE (timestamp);
+
+-- クエリ埋め込みキャッシュテーブル（全ワーカーで共有）
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    query_hash VARCHAR(64) PRIMARY KEY, -- 正規化クエリ + モデル名の SHA-256
+    model VARCHAR(100) NOT NULL,
+    query_text TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 類似研究室テーブル（研究室ごとに事前計算した上位N件）
+CREATE TABLE IF NOT EXISTS lab_neighbors (
+    lab_id INTEGER NOT NULL REFERENCES research_labs(id) ON DELETE CASCADE,
+    rank SMALLINT NOT NULL, -- 類似度順位（1始まり）
+    neighbor_id INTEGER NOT NULL REFERENCES research_labs(id) ON DELETE CASCADE,
+    similarity FLOAT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (lab_id, rank)
+);
+
+-- 人気検索クエリテーブル（全ワーカーの検索回数を時間減衰付きで合算）
+CREATE TABLE IF NOT EXISTS popular_queries (
+    query TEXT PRIMARY KEY, -- 正規化済みクエリ
+    score FLOAT NOT NULL, -- updated_at 時点の減衰済みスコア
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 検索統計の時間別集計テーブル（生ログを削除しても履歴を残す）
+CREATE TABLE IF NOT EXISTS search_stats_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE PRIMARY KEY, -- 集計期間の開始時刻
+    search_count INTEGER NOT NULL,
+    results_sum BIGINT NOT NULL,
+    latency_count INTEGER NOT NULL, -- 検索時間が記録された件数
+    latency_sum FLOAT NOT NULL,
+    latency_min FLOAT,
+    latency_max FLOAT,
+    latency_sketch JSONB NOT NULL, -- 検索時間の分位点スケッチ（バケット → 件数）
+    finalized BOOLEAN NOT NULL DEFAULT FALSE, -- 以降は生ログから再集計しない
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 検索統計の日別集計テーブル（時間別集計をマージ）
+CREATE TABLE IF NOT EXISTS search_stats_daily (
+    bucket_start TIMESTAMP WITH TIME ZONE PRIMARY KEY, -- 集計期間の開始時刻
+    search_count INTEGER NOT NULL,
+    results_sum BIGINT NOT NULL,
+    latency_count INTEGER NOT NULL, -- 検索時間が記録された件数
+    latency_sum FLOAT NOT NULL,
+    latency_min FLOAT,
+    latency_max FLOAT,
+    latency_sketch JSONB NOT NULL, -- 検索時間の分位点スケッチ（バケット → 件数）
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- インデックスの作成
@@ -53,6 +110,7 @@ CREATE INDEX IF NOT EXISTS idx_universities_prefecture ON universities(prefectur
 CREATE INDEX IF NOT EXISTS idx_research_labs_university_id ON research_labs(university_id);
 CREATE INDEX IF NOT EXISTS idx_research_labs_name ON research_labs(name);
 CREATE INDEX IF NOT EXISTS idx_research_labs_research_field ON research_labs(research_field);
+CREATE INDEX IF NOT EXISTS idx_research_labs_field_id ON research_labs(research_field, id); -- 分野順の一覧のキーセットページング
 CREATE INDEX IF NOT EXISTS idx_research_labs_created_at ON research_labs(created_at);
 
 -- ベクトル検索用インデックス (HNSW)
@@ -60,13 +118,50 @@ CREATE INDEX IF NOT EXISTS idx_research_labs_embedding_hnsw
 ON research_labs USING hnsw (embedding vector_cosine_ops) 
 WITH (m = 16, ef_construction = 64);
 
+CREATE INDEX IF NOT EXISTS idx_research_labs_embedding_short_hnsw 
+ON research_labs USING hnsw (embedding_short vector_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
+
 -- フルテキスト検索用インデックス
 CREATE INDEX IF NOT EXISTS idx_research_labs_content_fts 
 ON research_labs USING gin(to_tsvector('english', research_content || ' ' || research_theme));
 
+-- 親テーブルに定義したインデックスは各パーティションに作成される
 CREATE INDEX IF NOT EXISTS idx_search_logs_timestamp ON search_logs(timestamp);
 CREATE INDEX IF NOT EXISTS idx_search_logs_query ON search_logs(query);
 
+-- 検索ログの月別パーティションを作成（当月から months_ahead か月先まで）
+-- 月の区切りは日本時間（アプリの SEARCH_STATS_TIMEZONE と合わせる）
+CREATE OR REPLACE FUNCTION create_search_log_partitions(months_ahead INTEGER DEFAULT 2)
+RETURNS INTEGER AS $$
+DECLARE
+    local_start TIMESTAMP;
+    partition_name TEXT;
+    created_count INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        local_start := DATE_TRUNC('month', CURRENT_TIMESTAMP AT TIME ZONE 'Asia/Tokyo') + MAKE_INTERVAL(months => i);
+        partition_name := 'search_logs_' || TO_CHAR(local_start, 'YYYYMM');
+        IF TO_REGCLASS(partition_name) IS NULL THEN
+            EXECUTE FORMAT(
+                'CREATE TABLE %I PARTITION OF search_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                local_start AT TIME ZONE 'Asia/Tokyo',
+                (local_start + INTERVAL '1 month') AT TIME ZONE 'Asia/Tokyo'
+            );
+            created_count := created_count + 1;
+        END IF;
+    END LOOP;
+    
+    RETURN created_count;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_search_log_partitions();
+
+CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used_at ON query_embeddings(last_used_at);
+CREATE INDEX IF NOT EXISTS idx_lab_neighbors_neighbor_id ON lab_neighbors(neighbor_id);
+
 -- updated_at の自動更新トリガー
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -85,6 +180,11 @@ CREATE TRIGGER update_research_labs_updated_at
 ANALYZE universities;
 ANALYZE research_labs;
 ANALYZE search_logs;
+ANALYZE query_embeddings;
+ANALYZE lab_neighbors;
+ANALYZE popular_queries;
+ANALYZE search_stats_hourly;
+ANALYZE search_stats_daily;
 
 -- サンプルデータ（開発用）
 INSERT INTO universities (name, type, prefecture, region) VALUES
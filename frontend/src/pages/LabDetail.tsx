@@ -12,8 +12,8 @@ import {
   Share2
 } from 'lucide-react'
 import LabCard from '../components/LabCard'
-import { getLabDetail, getSimilarLabs } from '../utils/api'
-import type { ResearchLab, ResearchLabSearchResult } from '../types'
+import { getLabPage } from '../utils/api'
+import type { LabPage, ResearchLab, ResearchLabSearchResult } from '../types'
 
 const LabDetail: React.FC = () => {
   const { id } = useParams<{ id: string }>()
@@ -23,7 +23,7 @@ const LabDetail: React.FC = () => {
   const [similarLabs, setSimilarLabs] = useState<ResearchLabSearchResult[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState<string>('')
-  const [similarLoading, setSimilarLoading] = useState(false)
+  const [universityStats, setUniversityStats] = useState<LabPage['university_stats'] | null>(null)
 
   useEffect(() => {
     if (id) {
@@ -36,12 +36,11 @@ const LabDetail: React.FC = () => {
     setError('')
 
     try {
-      // 研究室詳細を取得
-      const labDetail = await getLabDetail(labId)
-      setLab(labDetail)
-      
-      // 類似研究室を別途取得（エラーが発生しても詳細は表示する）
-      loadSimilarLabs(labId)
+      // 詳細・類似研究室・大学の分野別研究室数を1回のリクエストで取得
+      const page = await getLabPage(labId)
+      setLab(page.lab)
+      setSimilarLabs(page.similar_labs)
+      setUniversityStats(page.university_stats)
     } catch (err) {
       console.error('研究室詳細取得エラー:', err)
       setError('研究室の詳細情報を取得できませんでした。')
@@ -50,22 +49,6 @@ const LabDetail: React.FC = () => {
     }
   }
 
-  const loadSimilarLabs = async (labId: number) => {
-    setSimilarLoading(true)
-    try {
-      // 修正：引数は1つのみ（limit削除）
-      const similar = await getSimilarLabs(labId)
-      setSimilarLabs(similar)
-      console.log('類似研究室を取得:', similar)
-    } catch (err) {
-      console.error('類似研究室取得エラー:', err)
-      // 類似研究室の取得に失敗してもエラー表示はしない（メイン機能ではないため）
-      setSimilarLabs([])
-    } finally {
-      setSimilarLoading(false)
-    }
-  }
-
   const handleSimilarLabClick = (similarLab: ResearchLabSearchResult) => {
     console.log('類似研究室クリック:', similarLab)
     navigate(`/lab/${similarLab.id}`)
@@ -175,6 +158,12 @@ const LabDetail: React.FC = () => {
                   <span className="font-medium">所属</span>
                   <p className="text-lg">{lab.university.name}</p>
                   <p className="text-sm text-gray-600">{lab.department}</p>
+                  {universityStats && (
+                    <p className="text-sm text-gray-500">
+                      この大学の研究室: {universityStats.total_labs}件
+                      （{lab.research_field} {universityStats.labs_by_field[lab.research_field] ?? 0}件）
+                    </p>
+                  )}
                 </div>
               </div>
               
@@ -276,12 +265,7 @@ const LabDetail: React.FC = () => {
             関連する研究室
           </h2>
           
-          {similarLoading ? (
-            <div className="text-center py-8">
-              <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600 mx-auto mb-4"></div>
-              <p className="text-gray-600">関連研究室を検索中...</p>
-            </div>
-          ) : similarLabs.length > 0 ? (
+          {similarLabs.length > 0 ? (
             <div className="space-y-4">
               {similarLabs.map((similarLab) => (
                 <LabCard
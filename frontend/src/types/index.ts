@@ -42,12 +42,23 @@ export interface ResearchLabSearchResult {
   similarity_score: number
 }
 
+export interface LabPage {
+  lab: ResearchLab
+  similar_labs: ResearchLabSearchResult[]
+  university_stats: {
+    total_labs: number
+    labs_by_field: Record<string, number>
+  }
+}
+
 export interface SearchRequest {
   query: string
   limit?: number
   region_filter?: string[]
   field_filter?: string[]
   min_similarity?: number
+  mode?: 'vector' | 'hybrid' | 'lexical'
+  lexical_weight?: number
 }
 
 export interface SearchResponse {
@@ -42,6 +42,15 @@ export interface ResearchLabSearchResult {
   similarity_score: number
 }
 
+export interface LabPage {
+  lab: ResearchLab
+  similar_labs: ResearchLabSearchResult[]
+  university_stats: {
+    total_labs: number
+    labs_by_field: Record<string, number>
+  }
+}
+
 export interface SearchRequest {
   query: string
   limit?: number
@@ -84,6 +93,17 @@ export const getLabDetail = async (labId: number): Promise<ResearchLab> => {
   return response.json()
 }
 
+// 研究室詳細ページ取得（詳細・類似研究室・大学の分野別研究室数を1回で取得）
+export const getLabPage = async (labId: number): Promise<LabPage> => {
+  const response = await fetch(`${API_BASE_URL}/api/labs/${labId}/page`)
+
+  if (!response.ok) {
+    throw new Error(`研究室詳細取得エラー: ${response.status}`)
+  }
+
+  return response.json()
+}
+
 // 類似研究室取得（修正版 - 大学情報を確実に設定）
 export const getSimilarLabs = async (labId: number): Promise<ResearchLabSearchResult[]> => {
   // 実際のAPIを試す